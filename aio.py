@@ -0,0 +1,253 @@
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import httpx
+except ImportError:  # Optional dependency, see the 'async' extra.
+    httpx = None
+
+from .helper import _batch_read, _filter_params_for_function, _read_only
+from .metrics import (
+    CACHE_HITS,
+    CACHE_MISSES,
+    HTTP_BYTES,
+    HTTP_REQUESTS,
+    HTTP_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+if httpx is not None:
+    HTTPError = httpx.HTTPError
+else:
+
+    class HTTPError(Exception):
+        pass
+
+
+_settings = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "timeout": 30.0,
+    "db_workers": 4,
+}
+_clients = weakref.WeakKeyDictionary()
+_db_executor = None
+_db_workers = 0
+_db_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(
+    max_connections: int = None,
+    max_keepalive_connections: int = None,
+    timeout: float = None,
+    db_workers: int = None,
+) -> None:
+    """
+    Tune the shared HTTP connection pool and the SQLite executor.
+
+    Only affects clients and executors created afterwards, call it before the
+    first async request.
+
+    Parameters
+    ----------
+    max_connections : int, optional
+        Concurrent connections per event loop, by default 100.
+    max_keepalive_connections : int, optional
+        Idle connections kept open for reuse, by default 20.
+    timeout : float, optional
+        Request timeout in seconds, by default 30.0.
+    db_workers : int, optional
+        Threads that run SQLite work, by default 4.
+    """
+    updates = {
+        "max_connections": max_connections,
+        "max_keepalive_connections": max_keepalive_connections,
+        "timeout": timeout,
+        "db_workers": db_workers,
+    }
+    _settings.update({k: v for k, v in updates.items() if v is not None})
+
+
+def get_client() -> "httpx.AsyncClient":
+    """The event loop's shared HTTP client, created on first use."""
+    if httpx is None:
+        raise ImportError(
+            "The asyncio API needs httpx, install it with 'pip install polymarketscraper[async]'."
+        )
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=_settings["max_connections"],
+                max_keepalive_connections=_settings["max_keepalive_connections"],
+            ),
+            timeout=_settings["timeout"],
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose() -> None:
+    """Close the current loop's HTTP client, the SQLite executor and its databases."""
+    global _db_executor
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+    with _db_lock:
+        executor, _db_executor = _db_executor, None
+        workers = _db_workers
+    if executor is not None:
+        # One task per worker thread, the barrier keeps a thread from taking two.
+        barrier = threading.Barrier(workers)
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, _close_thread_dbs, barrier)
+                for _ in range(workers)
+            )
+        )
+        await loop.run_in_executor(None, executor.shutdown)
+
+
+async def fetch_url_async(
+    url: str,
+    endpoint: str,
+    params: dict = None,
+    method: str = "GET",
+    json_body=None,
+) -> "httpx.Response":
+    """Async counterpart of 'helper.fetch_url' using the shared client."""
+    client = get_client()
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, params=params, json=json_body)
+    except HTTPError:
+        HTTP_REQUESTS.inc(endpoint=endpoint, status="error")
+        raise
+    finally:
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    HTTP_BYTES.inc(len(response.content), endpoint=endpoint)
+    return response
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor, _db_workers
+    with _db_lock:
+        if _db_executor is None:
+            _db_workers = _settings["db_workers"]
+            _db_executor = ThreadPoolExecutor(_db_workers, thread_name_prefix="pms-sqlite")
+        return _db_executor
+
+
+def _thread_db(db_class, db_path: str):
+    # SQLite connections are bound to their thread, so each executor thread keeps
+    # one database object per (class, path) instead of reconnecting every call.
+    dbs = getattr(_local, "dbs", None)
+    if dbs is None:
+        dbs = _local.dbs = {}
+    key = (db_class, str(db_path))
+    db = dbs.get(key)
+    if db is None:
+        db = dbs[key] = db_class(db_path)
+    return db
+
+
+def _close_thread_dbs(barrier: threading.Barrier) -> None:
+    # Connections can only be closed by the thread that opened them.
+    try:
+        barrier.wait(timeout=_settings["timeout"])
+    except threading.BrokenBarrierError:
+        logger.warning("Not every SQLite worker was free to close its databases")
+    dbs = getattr(_local, "dbs", None) or {}
+    _local.dbs = {}
+    for db in dbs.values():
+        db.close()
+
+
+def _call_db(db_class, db_path: str, method: str, args: tuple, kwargs: dict):
+    return getattr(_thread_db(db_class, db_path), method)(*args, **kwargs)
+
+
+def _db_read_only(db_class, db_path: str, method: str) -> bool:
+    return _read_only(getattr(_thread_db(db_class, db_path), method))
+
+
+async def run_db(db_class, db_path: str, method: str, *args, **kwargs):
+    """
+    Run 'db_class(db_path).method(*args, **kwargs)' on the SQLite executor.
+
+    Parameters
+    ----------
+    db_class : type
+        A Database subclass, e.g. EventsDB.
+    db_path : str
+        Path to database.
+    method : str
+        Name of the method to call.
+    Returns
+    -------
+    Whatever the method returns.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_db_executor(), _call_db, db_class, db_path, method, args, kwargs
+    )
+
+
+async def get_data_async(
+    db_class,
+    db_path: str,
+    read_method: str,
+    read_params: dict,
+    fetch_func,
+    fetch_params: dict,
+    insert_methods,
+    force_update: bool,
+    log: bool = True,
+):
+    """Async counterpart of 'helper.get_data', 'fetch_func' is a coroutine function."""
+    read_params = _filter_params_for_function(getattr(db_class, read_method), read_params)
+    fetch_params = _filter_params_for_function(fetch_func, fetch_params)
+    if isinstance(insert_methods, str):
+        insert_methods = [insert_methods]
+    if force_update:
+        if log:
+            logger.info("Force updating")
+    else:
+        local_data = await run_db(db_class, db_path, read_method, **read_params)
+        if not local_data.is_empty():
+            CACHE_HITS.inc(source=read_method)
+            return local_data
+        CACHE_MISSES.inc(source=read_method)
+        # Readers cannot store what they would fetch, and the scrapers fetch one
+        # key at a time.
+        if _batch_read(read_params):
+            return local_data
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(
+            _get_db_executor(), _db_read_only, db_class, db_path, read_method
+        ):
+            return local_data
+        if log:
+            logger.info("Fetching from the web for data: %s", read_params)
+
+    web_data = await fetch_func(**fetch_params)
+    if web_data is None:
+        # The request failed, serve what is stored (the empty read keeps the columns).
+        if force_update:
+            return await run_db(db_class, db_path, read_method, **read_params)
+        return local_data
+    if len(insert_methods) > 1:
+        for method, data in zip(insert_methods, web_data):
+            await run_db(db_class, db_path, method, data)
+    else:
+        await run_db(db_class, db_path, insert_methods[0], web_data)
+    return await run_db(db_class, db_path, read_method, **read_params)
@@ -0,0 +1,304 @@
+import re
+import json
+import sqlite3
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import polars as pl
+
+try:
+    import duckdb
+except ImportError:  # Optional dependency, see the 'duckdb' extra.
+    duckdb = None
+
+_VALUES_PATTERN = re.compile(r"VALUES\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_REAL_PATTERN = re.compile(r"\bREAL\b", re.IGNORECASE)
+
+
+class Backend:
+    """
+    Storage engine behind 'Database'.
+
+    Backends own connection setup, dialect differences, reads into polars and
+    bulk inserts. SQL passed in uses '?' placeholders and the SQLite dialect
+    shared by both engines (CREATE TABLE IF NOT EXISTS, INSERT OR IGNORE, ...).
+    """
+
+    name = ""
+    supports_fts = False
+    supports_attach = False
+    # Whether rowid can be written explicitly, so a rebuilt table keeps its rowids.
+    supports_rowid_insert = False
+    supports_triggers = False
+
+    def connect(self, db_path: Path, timeout: int = 30, read_only: bool = False):
+        """Open 'db_path', read-only connections never take a write lock."""
+        raise NotImplementedError
+
+    def ddl(self, query: str) -> str:
+        """Adapt a CREATE statement to the engine."""
+        return query
+
+    def transaction(self, conn):
+        raise NotImplementedError
+
+    def exclusive(self, conn):
+        """
+        A transaction that holds the write lock from its first statement, so no
+        other process writes until it ends. Reads, inserts and nested transactions
+        inside it join it instead of committing. Nothing by default, for engines
+        that only let one process open a file for writing (DuckDB).
+        """
+        return nullcontext(conn)
+
+    def read(self, conn, query: str, params: tuple = None) -> pl.DataFrame:
+        raise NotImplementedError
+
+    def insert(self, conn, df: pl.DataFrame, insert_query: str) -> int:
+        """Insert 'df' with 'insert_query', returns the number of rows written."""
+        raise NotImplementedError
+
+    def write(self, conn, query: str, params: tuple = ()) -> int:
+        """Run an UPDATE/DELETE in a transaction, returns the number of rows affected."""
+        raise NotImplementedError
+
+    def reclaim(self, conn, pages: int = 0) -> int:
+        """Return free space to the file system, returns the number of pages freed."""
+        return 0
+
+    def tables(self, conn) -> set:
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return {row[0] for row in rows}
+
+    def version_probe(self, db_path: Path):
+        """
+        A read-only connection any thread may use for 'data_version', None if the
+        engine cannot tell when the database changed.
+        """
+        return None
+
+    def in_list(self, column: str, values: list) -> tuple:
+        """Condition matching 'column' against any of 'values', and its parameters."""
+        if not values:
+            return "1 = 0", ()
+        return f"{column} IN ({', '.join('?' for _ in values)})", tuple(values)
+
+    def data_version(self, conn) -> int:
+        """A number that changes whenever another connection commits to the database."""
+        raise NotImplementedError
+
+    def in_transaction(self, conn) -> bool:
+        """Whether 'conn' has uncommitted changes only it can see."""
+        return False
+
+
+class SQLiteBackend(Backend):
+    name = "sqlite"
+    supports_fts = True
+    supports_attach = True
+    supports_rowid_insert = True
+    supports_triggers = True
+    # Readers map the file into memory, so processes reading the same database
+    # share the OS page cache instead of each copying pages into their own.
+    reader_mmap_size = 2**30
+    reader_cache_kib = 65_536
+    # Longer IN lists are bound as one JSON array, SQLite caps bound parameters.
+    max_inline_params = 500
+
+    def __init__(self):
+        # Connections inside "exclusive", only for its duration.
+        self._exclusive = set()
+
+    def connect(
+        self, db_path: Path, timeout: int = 30, read_only: bool = False
+    ) -> sqlite3.Connection:
+        if read_only:
+            return self._connect_reader(db_path, timeout)
+        conn = sqlite3.connect(
+            str(db_path), timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        # Only takes effect on new files, and must come before anything is written.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("PRAGMA busy_timeout = 30000;")
+        return conn
+
+    def _connect_reader(self, db_path: Path, timeout: int = 30) -> sqlite3.Connection:
+        # No pragma that writes (journal_mode, auto_vacuum), the writer set those up.
+        conn = sqlite3.connect(
+            f"{Path(db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            timeout=timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        conn.execute("PRAGMA query_only = ON;")
+        conn.execute(f"PRAGMA mmap_size = {int(self.reader_mmap_size)};")
+        conn.execute(f"PRAGMA cache_size = -{int(self.reader_cache_kib)};")
+        conn.execute("PRAGMA busy_timeout = 30000;")
+        return conn
+
+    @contextmanager
+    def transaction(self, conn):
+        # sqlite3 connections commit on success and roll back on error. The explicit
+        # BEGIN also puts DDL (DROP, ALTER) inside the transaction.
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        with self._commit(conn):
+            yield conn
+
+    @contextmanager
+    def exclusive(self, conn):
+        # IMMEDIATE takes the write lock at BEGIN, other writers wait (busy_timeout).
+        conn.execute("BEGIN IMMEDIATE")
+        self._exclusive.add(conn)
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._exclusive.discard(conn)
+
+    def _commit(self, conn):
+        # Statements inside 'exclusive' commit with it, not on their own.
+        if conn in self._exclusive:
+            return nullcontext(conn)
+        return conn
+
+    def read(self, conn, query: str, params: tuple = None) -> pl.DataFrame:
+        with self._commit(conn):
+            cur = conn.cursor()
+            if params is None:
+                cur.execute(query)
+            else:
+                cur.execute(query, params)
+            rows = cur.fetchall()
+            columns = [col[0] for col in cur.description]
+        return frame_from_rows(rows, columns)
+
+    def write(self, conn, query: str, params: tuple = ()) -> int:
+        with self._commit(conn):
+            return max(conn.execute(query, params).rowcount, 0)
+
+    def in_list(self, column: str, values: list) -> tuple:
+        if len(values) <= self.max_inline_params:
+            return super().in_list(column, values)
+        return f"{column} IN (SELECT value FROM json_each(?))", (json.dumps(values),)
+
+    def version_probe(self, db_path: Path) -> sqlite3.Connection:
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def data_version(self, conn) -> int:
+        return conn.execute("PRAGMA data_version;").fetchone()[0]
+
+    def in_transaction(self, conn) -> bool:
+        return conn.in_transaction
+
+    def reclaim(self, conn, pages: int = 0) -> int:
+        """
+        Free at most 'pages' pages (0 for all) with incremental vacuum.
+
+        Files created before auto_vacuum=INCREMENTAL was the default are converted
+        with a one-time full VACUUM.
+        """
+        before = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            conn.execute("VACUUM;")
+            return before
+        # Each step of the pragma frees one page, so it has to be stepped to the end.
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)});").fetchall()
+        conn.commit()
+        return before - conn.execute("PRAGMA freelist_count;").fetchone()[0]
+
+    def insert(self, conn, df: pl.DataFrame, insert_query: str) -> int:
+        records = df.to_numpy().tolist()
+        with self._commit(conn):
+            before = conn.total_changes
+            conn.executemany(insert_query, records)
+            return conn.total_changes - before
+
+
+class DuckDBBackend(Backend):
+    """
+    Embedded DuckDB, for columnar and aggregate workloads over large histories.
+
+    Reads come back as Arrow and are handed to polars without copying; inserts scan
+    the polars frame directly instead of binding rows one at a time. Needs the
+    'duckdb' and 'pyarrow' packages.
+    """
+
+    name = "duckdb"
+
+    def connect(self, db_path: Path, timeout: int = 30, read_only: bool = False):
+        if duckdb is None:
+            raise ImportError(
+                "The DuckDB backend needs duckdb, install it with 'pip install polymarketscraper[duckdb]'."
+            )
+        return duckdb.connect(str(db_path), read_only=read_only)
+
+    def ddl(self, query: str) -> str:
+        # SQLite's REAL is 8 bytes, DuckDB's is 4.
+        return _REAL_PATTERN.sub("DOUBLE", query)
+
+    def write(self, conn, query: str, params: tuple = ()) -> int:
+        with self.transaction(conn):
+            # The affected row count comes back as the statement's result.
+            row = conn.execute(query, list(params)).fetchone()
+        return row[0] if row else 0
+
+    def reclaim(self, conn, pages: int = 0) -> int:
+        # DuckDB reuses freed blocks after a checkpoint, there is no page count.
+        conn.execute("CHECKPOINT")
+        return 0
+
+    @contextmanager
+    def transaction(self, conn):
+        conn.begin()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def read(self, conn, query: str, params: tuple = None) -> pl.DataFrame:
+        result = conn.execute(query, list(params) if params else None)
+        return result.pl()
+
+    def insert(self, conn, df: pl.DataFrame, insert_query: str) -> int:
+        # Frame columns are positional, exactly like the executemany records.
+        query = _VALUES_PATTERN.sub("SELECT * FROM __pms_frame", insert_query)
+        conn.register("__pms_frame", df)
+        try:
+            with self.transaction(conn):
+                row = conn.execute(query).fetchone()
+        finally:
+            conn.unregister("__pms_frame")
+        return row[0] if row else 0
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "duckdb": DuckDBBackend}
+
+
+def get_backend(db_path, backend=None) -> Backend:
+    """
+    Resolve a backend name or instance; by default '.duckdb'/'.ddb' files use
+    DuckDB and everything else SQLite.
+    """
+    if isinstance(backend, Backend):
+        return backend
+    if backend is None:
+        suffix = Path(db_path).suffix.lower()
+        backend = "duckdb" if suffix in (".duckdb", ".ddb") else "sqlite"
+    try:
+        return BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {backend}") from None
+
+
+def frame_from_rows(rows: list, columns: list) -> pl.DataFrame:
+    if not rows:
+        return pl.DataFrame({c: [] for c in columns})
+    return pl.from_records(rows, schema=columns, orient="row", infer_schema_length=None)
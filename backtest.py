@@ -0,0 +1,432 @@
+import time
+import logging
+
+import numpy as np
+import polars as pl
+
+from .database import Database
+from .events.interface import safe_parse_embedded_lists
+from .events.local import EventsDB
+from .events.web import EventsScraper
+from .metrics import PARSE_SECONDS
+from .prices.local import PricesDB
+
+logger = logging.getLogger(__name__)
+
+_SECONDS_PER_DAY = 86_400
+RESOLUTION_SCHEMA = {
+    "clob_token_id": pl.String,
+    "event_id": pl.String,
+    "market_id": pl.String,
+    "outcome": pl.String,
+    "payout": pl.Float64,
+    "contract_end": pl.Int64,
+    "resolved": pl.Int64,
+}
+
+
+class ResolutionsDB(Database):
+    """
+    How every outcome token of a settled market paid out: 1 for the winning
+    outcome, 0 for the others, 0.5 each for a 50-50 resolution.
+
+    Rows come from the API ('source' "api") or are inferred from settled prices
+    ('source' "prices"); API rows replace inferred ones.
+    """
+
+    def __init__(self, db_path: str, log: bool = True, read_only: bool = None):
+        self.TABLE = "resolutions"
+        super().__init__(db_path, log, read_only=read_only)
+        self._create_resolutions_table()
+
+    def _create_resolutions_table(self):
+        query = f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    clob_token_id TEXT NOT NULL,
+                    event_id TEXT,
+                    market_id TEXT,
+                    outcome TEXT,
+                    payout REAL,
+                    contract_end BIGINT,
+                    resolved BIGINT,
+                    source TEXT,
+                    PRIMARY KEY (clob_token_id));
+                    """
+        self._init_schema(query, "")
+
+    def _insert_resolutions(self, df: pl.DataFrame, source: str = "api"):
+        verb = "INSERT OR REPLACE" if source == "api" else "INSERT OR IGNORE"
+        query = f"""{verb} INTO {self.TABLE} (clob_token_id, event_id, market_id, outcome, payout, contract_end, resolved, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                """
+        df = df.select(list(RESOLUTION_SCHEMA)).with_columns(source=pl.lit(source))
+        self._insert_data(df, query)
+
+    def _read_resolutions(self, clob_token_id: str | list = "", market_id: str | list = ""):
+        query, params = self._build_param_query(
+            f"SELECT * FROM {self.TABLE}",
+            {"clob_token_id": "clob_token_id", "market_id": "market_id"},
+            clob_token_id=clob_token_id,
+            market_id=market_id,
+        )
+        return self._read_data(query, params)
+
+    def _read_final_prices(self, horizon: int) -> pl.DataFrame:
+        """Prices of every resolved token in the last 'horizon' seconds before it closed."""
+        if "prices" not in self.backend.tables(self.conn):
+            return pl.DataFrame(
+                schema={
+                    "clob_token_id": pl.String,
+                    "date": pl.Int64,
+                    "price": pl.Float64,
+                    "end_date": pl.Int64,
+                }
+            )
+        # The end is the actual close, whichever of the contract end and the
+        # resolution came first (the market may settle early), so no price from
+        # after the resolution reaches the panel. Written as a CASE since the
+        # two-argument min() is SQLite only.
+        # The primary key of 'prices' turns this into one range scan per token.
+        return self._read_data(
+            f"""SELECT p.clob_token_id, p.date, p.price, r.end_date
+                FROM (
+                    SELECT clob_token_id,
+                           CASE WHEN resolved < contract_end THEN resolved
+                                ELSE coalesce(contract_end, resolved) END AS end_date
+                    FROM {self.TABLE}
+                ) r
+                JOIN prices p ON p.clob_token_id = r.clob_token_id
+                WHERE p.date <= r.end_date
+                AND p.date > r.end_date - ?""",
+            (horizon,),
+        )
+
+
+class PricePanel:
+    """
+    Prices of resolved tokens, aligned on time to resolution.
+
+    'prices' is a (tokens x steps) array. Column j holds each token's last price
+    observed 'dtr[j]' days or more before it closed (its contract end, or its
+    resolution if earlier), carried forward, NaN before its first price; the last
+    column is the close. 'tokens' has one row per row of 'prices': clob_token_id,
+    event_id, market_id, outcome and payout.
+    """
+
+    def __init__(self, tokens: pl.DataFrame, prices: np.ndarray, step: int):
+        self.tokens = tokens
+        self.prices = prices
+        self.step = step
+        self.payout = tokens["payout"].to_numpy()
+        steps = prices.shape[1]
+        self.dtr = (steps - 1 - np.arange(steps)) * step / _SECONDS_PER_DAY
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def column(self, dtr: float) -> int:
+        """First column at most 'dtr' days before resolution."""
+        return int(np.searchsorted(-self.dtr, -dtr))
+
+    def at(self, dtr: float) -> np.ndarray:
+        """Every token's price 'dtr' days before resolution."""
+        return self.prices[:, min(self.column(dtr), self.prices.shape[1] - 1)]
+
+
+def ingest_resolutions(
+    db_path: str, offset: int = 0, page_size: int = 100, max_pages: int = None
+) -> dict:
+    """
+    Page through every closed event and store how its settled markets resolved.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    offset : int, optional
+        Event offset to start at, by default 0; pass the returned 'offset' to resume.
+    page_size : int, optional
+        Events per request, by default 100.
+    max_pages : int, optional
+        Stop after this many pages, by default None (until the last page).
+    Returns
+    -------
+    dict
+        'pages', 'events', 'resolutions' (token rows stored), 'offset' (where to
+        resume) and 'finished'.
+    """
+    scraper = EventsScraper()
+    stats = {"pages": 0, "events": 0, "resolutions": 0, "offset": offset, "finished": False}
+    with ResolutionsDB(db_path, log=False) as db:
+        while max_pages is None or stats["pages"] < max_pages:
+            result = scraper.fetch_resolutions_page(stats["offset"], page_size)
+            if result is None:
+                break
+            events, df = result
+            if not df.is_empty():
+                db._insert_resolutions(df)
+            stats["pages"] += 1
+            stats["events"] += events
+            stats["resolutions"] += len(df)
+            stats["offset"] += events
+            if events < page_size:
+                stats["finished"] = True
+                break
+    logger.info("Stored %d resolutions from %d events", stats["resolutions"], stats["events"])
+    return stats
+
+
+def infer_resolutions(db_path: str, settled: float = 0.99, now: int = None) -> int:
+    """
+    Resolve markets past their end date whose latest prices have settled.
+
+    A market counts as resolved when each of its tokens last traded at 'settled'
+    or more (payout 1) or at 1 - 'settled' or less (payout 0), with exactly one
+    winner. Useful for databases filled before 'ingest_resolutions' existed;
+    resolutions from the API are never overwritten.
+
+    Returns
+    -------
+    int
+        Token rows inferred.
+    """
+    now = int(time.time()) if now is None else now
+    with EventsDB(db_path, log=False) as events_db:
+        markets = events_db._read_data(
+            f"""SELECT event_id, market_id, outcomes, clob_token_ids, contract_end
+                FROM {events_db.MARKET_TABLE}
+                WHERE contract_end < ?""",
+            (now,),
+        )
+    with PricesDB(db_path, log=False) as prices_db:
+        if markets.is_empty() or prices_db.LATEST_TABLE not in prices_db.backend.tables(
+            prices_db.conn
+        ):
+            return 0
+        latest = prices_db._read_data(
+            f"SELECT clob_token_id, date AS resolved, price FROM {prices_db.LATEST_TABLE}"
+        )
+    markets = safe_parse_embedded_lists(markets, "outcomes")
+    markets = safe_parse_embedded_lists(markets, "clob_token_ids")
+    tokens = (
+        markets.filter(pl.col("outcomes").list.len() == pl.col("clob_token_ids").list.len())
+        .explode("outcomes", "clob_token_ids")
+        .rename({"outcomes": "outcome", "clob_token_ids": "clob_token_id"})
+        .join(latest.cast({"price": pl.Float64}), on="clob_token_id")
+        .with_columns(
+            payout=pl.when(pl.col("price") >= settled)
+            .then(1.0)
+            .when(pl.col("price") <= 1 - settled)
+            .then(0.0)
+        )
+        .filter(
+            pl.col("payout").is_not_null().all().over("market_id")
+            & (pl.col("payout").sum().over("market_id") == 1)
+        )
+    )
+    if tokens.is_empty():
+        return 0
+    with ResolutionsDB(db_path, log=False) as db:
+        db._insert_resolutions(tokens.cast(RESOLUTION_SCHEMA), source="prices")
+    return len(tokens)
+
+
+def load_panel(db_path: str, step: int = 3_600, horizon: float = 30.0) -> PricePanel:
+    """
+    Align the final 'horizon' days of every resolved token's prices in one array.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    step : int, optional
+        Seconds per column, by default 3,600.
+    horizon : float, optional
+        Days before resolution to keep, by default 30.
+    Returns
+    -------
+    PricePanel
+    """
+    steps = int(horizon * _SECONDS_PER_DAY // step)
+    with ResolutionsDB(db_path, log=False) as db:
+        tokens = db._read_resolutions().cast(RESOLUTION_SCHEMA, strict=False)
+        prices = db._read_final_prices(steps * step)
+    with PARSE_SECONDS.time(stage="backtest"):
+        tokens = (
+            tokens.filter(pl.col("payout").is_not_null())
+            .select("clob_token_id", "event_id", "market_id", "outcome", "payout")
+            .sort("clob_token_id")
+            .with_row_index("row")
+        )
+        cells = (
+            prices.join(tokens.select("clob_token_id", "row"), on="clob_token_id")
+            .with_columns(
+                column=steps - 1 - (pl.col("end_date") - pl.col("date")) // step,
+                price=pl.col("price").cast(pl.Float64, strict=False),
+            )
+            .filter(pl.col("column") >= 0)
+            .sort("date")
+            .group_by("row", "column")
+            .agg(pl.col("price").last())
+        )
+        matrix = np.full((len(tokens), steps), np.nan)
+        matrix[cells["row"].to_numpy(), cells["column"].to_numpy()] = cells["price"].to_numpy()
+        # Carry each price forward to the columns without one.
+        last = np.where(np.isnan(matrix), 0, np.arange(steps))
+        np.maximum.accumulate(last, axis=1, out=last)
+        matrix = np.take_along_axis(matrix, last, axis=1)
+    return PricePanel(tokens.drop("row"), matrix, step)
+
+
+def backtest(
+    panel: PricePanel,
+    max_price: float,
+    max_dtr: float,
+    min_price: float = 0.0,
+    fee: float = 0.0,
+) -> pl.DataFrame:
+    """
+    Buy one share of every token the first time it is priced in
+    ['min_price', 'max_price') within 'max_dtr' days of resolution, and hold it.
+
+    Parameters
+    ----------
+    panel : PricePanel
+        From 'load_panel'.
+    max_price : float
+        Buy below this price.
+    max_dtr : float
+        Only buy this many days or less before resolution.
+    min_price : float, optional
+        Do not buy below this price, by default 0.
+    fee : float, optional
+        Fee as a fraction of the price paid, by default 0.
+    Returns
+    -------
+    pl.DataFrame
+        One row per trade: the token columns plus entry_dtr, entry_price, cost,
+        pnl and return.
+    """
+    with PARSE_SECONDS.time(stage="backtest"):
+        entry, entry_dtr = _entries(panel, max_price, max_dtr, min_price)
+        traded = ~np.isnan(entry)
+        cost = entry[traded] * (1 + fee)
+        pnl = panel.payout[traded] - cost
+        return panel.tokens.filter(pl.Series(traded)).with_columns(
+            entry_dtr=pl.Series(entry_dtr[traded]),
+            entry_price=pl.Series(entry[traded]),
+            cost=pl.Series(cost),
+            pnl=pl.Series(pnl),
+            **{"return": pl.Series(pnl / cost)},
+        )
+
+
+def sweep(
+    panel: PricePanel,
+    max_prices: list,
+    max_dtrs: list,
+    min_price: float = 0.0,
+    fee: float = 0.0,
+) -> pl.DataFrame:
+    """
+    Evaluate 'backtest' for every combination of 'max_prices' and 'max_dtrs'.
+
+    Returns
+    -------
+    pl.DataFrame
+        One row per combination: max_price, max_dtr, trades, hit_rate (share of
+        trades with a profit), pnl, cost, roi (pnl / cost) and mean_entry.
+    """
+    rows = []
+    with PARSE_SECONDS.time(stage="backtest"):
+        for max_dtr in max_dtrs:
+            for max_price in max_prices:
+                entry, _ = _entries(panel, max_price, max_dtr, min_price)
+                traded = ~np.isnan(entry)
+                cost = entry[traded] * (1 + fee)
+                pnl = panel.payout[traded] - cost
+                trades = int(traded.sum())
+                rows.append(
+                    {
+                        "max_price": float(max_price),
+                        "max_dtr": float(max_dtr),
+                        "trades": trades,
+                        "hit_rate": float((pnl > 0).mean()) if trades else None,
+                        "pnl": float(pnl.sum()),
+                        "cost": float(cost.sum()),
+                        "roi": float(pnl.sum() / cost.sum()) if cost.sum() else None,
+                        "mean_entry": float(entry[traded].mean()) if trades else None,
+                    }
+                )
+    return pl.DataFrame(
+        rows,
+        schema={
+            "max_price": pl.Float64,
+            "max_dtr": pl.Float64,
+            "trades": pl.Int64,
+            "hit_rate": pl.Float64,
+            "pnl": pl.Float64,
+            "cost": pl.Float64,
+            "roi": pl.Float64,
+            "mean_entry": pl.Float64,
+        },
+    )
+
+
+def summarize(trades: pl.DataFrame) -> dict:
+    """P&L and hit rate of the trades returned by 'backtest'."""
+    cost = trades["cost"].sum()
+    return {
+        "trades": len(trades),
+        "hit_rate": (trades["pnl"] > 0).mean() if len(trades) else None,
+        "pnl": trades["pnl"].sum(),
+        "cost": cost,
+        "roi": trades["pnl"].sum() / cost if cost else None,
+        "mean_entry": trades["entry_price"].mean(),
+    }
+
+
+def calibration_curve(prices, payouts, bins: int = 10) -> pl.DataFrame:
+    """
+    How often outcomes priced in each probability bin paid out.
+
+    Pass e.g. 'panel.at(1.0)' and 'panel.payout' for the market's calibration one
+    day out, or a backtest's 'entry_price' and 'payout' for its entries.
+
+    Returns
+    -------
+    pl.DataFrame
+        One row per non-empty bin: bin (lower edge), price (mean price), frequency
+        (mean payout) and count.
+    """
+    df = pl.DataFrame(
+        {"price": np.asarray(prices, dtype=float), "payout": np.asarray(payouts, dtype=float)}
+    ).filter(pl.col("price").is_not_nan() & pl.col("payout").is_not_nan())
+    return (
+        df.with_columns(
+            bin=((pl.col("price") * bins).floor().clip(0, bins - 1) / bins)
+        )
+        .group_by("bin")
+        .agg(
+            price=pl.col("price").mean(),
+            frequency=pl.col("payout").mean(),
+            count=pl.len(),
+        )
+        .sort("bin")
+    )
+
+
+def _entries(panel: PricePanel, max_price: float, max_dtr: float, min_price: float) -> tuple:
+    """Entry price and dtr of every token, NaN where the rule never fires."""
+    n, steps = panel.prices.shape
+    start = panel.column(max_dtr)
+    entry = np.full(n, np.nan)
+    entry_dtr = np.full(n, np.nan)
+    if start >= steps or n == 0:
+        return entry, entry_dtr
+    window = panel.prices[:, start:]
+    hit = (window < max_price) & (window >= min_price)
+    fired = hit.any(axis=1)
+    first = hit.argmax(axis=1)
+    entry[fired] = window[fired, first[fired]]
+    entry_dtr[fired] = panel.dtr[start + first[fired]]
+    return entry, entry_dtr
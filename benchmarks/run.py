@@ -0,0 +1,251 @@
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import datetime as dt
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from .synthetic import EPOCH, generate_database, _prices_frame
+from ..events.contract import Contract
+from ..events.interface import calc_dtr, safe_parse_embedded_lists
+from ..events.local import EventsDB
+from ..prices.interface import get_latest_prices, get_price_data
+from ..prices.local import PricesDB
+from ..prices.movers import MoversEngine
+from ..scanner import scan_events
+from ..utils.dates import date_extract
+
+
+def run_benchmarks(
+    db_path: str = "",
+    n_markets: int = 10_000,
+    markets_per_event: int = 5,
+    price_points: int = 1_000_000,
+    n_tags: int = 1_000,
+    insert_rows: int = 100_000,
+    repeat: int = 5,
+    seed: int = 0,
+    epoch: int = EPOCH,
+) -> dict:
+    """
+    Generate a synthetic database and time the hot paths against it.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Where to create the synthetic database, by default "", a temporary file.
+    n_markets : int, optional
+        Number of synthetic markets, by default 10_000.
+    markets_per_event : int, optional
+        Markets per synthetic event, by default 5.
+    price_points : int, optional
+        Total synthetic price points, by default 1_000_000.
+    n_tags : int, optional
+        Number of synthetic tags, by default 1_000.
+    insert_rows : int, optional
+        Rows per insert benchmark batch, by default 100_000.
+    repeat : int, optional
+        Timed runs per benchmark, by default 5.
+    seed : int, optional
+        Random seed for the generator and sample data, by default 0.
+    epoch : int, optional
+        Epoch seconds the synthetic dates are relative to, by default 2026-01-01 UTC.
+    Returns
+    -------
+    dict
+        JSON-serialisable report with environment metadata and one entry per benchmark.
+    """
+    if db_path == "":
+        db_path = str(Path(tempfile.mkdtemp(prefix="pms-bench-")) / "bench.db")
+
+    start = time.perf_counter()
+    summary = generate_database(
+        db_path,
+        n_markets=n_markets,
+        markets_per_event=markets_per_event,
+        price_points=price_points,
+        n_tags=n_tags,
+        seed=seed,
+        epoch=epoch,
+    )
+    generate_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed + 1)
+    events_db = EventsDB(db_path, log=False)
+    prices_db = PricesDB(db_path, log=False)
+    markets = events_db._read_data(f"SELECT * FROM {events_db.MARKET_TABLE}")
+    descriptions = events_db._attach_descriptions(markets.head(1_000), True)[
+        "description"
+    ].to_list()
+    event_id = summary["sample_event_id"]
+    token_id = summary["sample_clob_token_id"]
+    contract = Contract(event_id, "", db_path)
+
+    results = []
+    batches = iter(range(repeat * 2 + 2))
+
+    def new_batch():
+        # Fresh token ids for every run so nothing is ignored.
+        n = next(batches)
+        tokens = [f"bench{seed}-{n}-{i}" for i in range(max(1, insert_rows // 100))]
+        return (_prices_frame(rng, tokens, 100, 1_700_000_000),)
+
+    duplicate = new_batch()
+    prices_db._insert_price_data(*duplicate)
+
+    results.append(
+        _measure("insert_data[prices,new]", prices_db._insert_price_data, repeat, setup=new_batch)
+    )
+    results.append(
+        _measure(
+            "insert_data[prices,duplicate]",
+            prices_db._insert_price_data,
+            repeat,
+            setup=lambda: duplicate,
+        )
+    )
+    results.append(
+        _measure(
+            "read_data[markets,all]",
+            events_db._read_data,
+            repeat,
+            setup=lambda: (f"SELECT * FROM {events_db.MARKET_TABLE}",),
+        )
+    )
+    results.append(
+        _measure(
+            "read_data[prices,token]",
+            prices_db._read_price_data,
+            repeat,
+            setup=lambda: (token_id,),
+        )
+    )
+    results.append(
+        _measure("calc_dtr[markets]", calc_dtr, repeat, setup=lambda: (markets, "contract_end"))
+    )
+    results.append(
+        _measure(
+            "safe_parse_embedded_lists[markets]",
+            lambda df: safe_parse_embedded_lists(
+                safe_parse_embedded_lists(df, "outcomes"), "clob_token_ids"
+            ),
+            repeat,
+            setup=lambda: (markets,),
+        )
+    )
+    results.append(
+        _measure(
+            "date_extract[descriptions]",
+            lambda texts: [date_extract(text) for text in texts],
+            repeat,
+            setup=lambda: (descriptions,),
+        )
+    )
+    results.append(
+        _measure("contract_create_token_mapping", contract._create_token_mapping, repeat)
+    )
+    results.append(
+        _measure("get_price_data", get_price_data, repeat, setup=lambda: (db_path, token_id))
+    )
+    latest_tokens = prices_db._read_data(
+        f"SELECT clob_token_id FROM {prices_db.LATEST_TABLE} LIMIT 5000"
+    )["clob_token_id"].to_list()
+    results.append(
+        _measure(
+            "get_latest_prices[5000]",
+            get_latest_prices,
+            repeat,
+            setup=lambda: (db_path, latest_tokens),
+        )
+    )
+    results.append(_measure("scan_events", scan_events, repeat, setup=lambda: (db_path,)))
+    movers = MoversEngine(db_path)
+    results.append(_measure("top_movers", movers.top_movers, repeat))
+    events_db.close()
+    prices_db.close()
+
+    return {
+        "meta": {
+            "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "polars": pl.__version__,
+            "numpy": np.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "seed": seed,
+            "epoch": epoch,
+            "repeat": repeat,
+            "insert_rows": insert_rows,
+            "db_path": db_path,
+            "db_bytes": Path(db_path).stat().st_size,
+            "generate_seconds": generate_seconds,
+            "scale": summary,
+        },
+        "results": results,
+    }
+
+
+def _measure(name: str, func, repeat: int, setup=None) -> dict:
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        out = func(*args)
+        timings.append(time.perf_counter() - start)
+        if isinstance(out, pl.DataFrame):
+            rows = out.height
+        elif isinstance(out, (list, dict)):
+            rows = len(out)
+    return {
+        "name": name,
+        "repeat": repeat,
+        "rows": rows,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraper's hot paths.")
+    parser.add_argument("--db-path", default="", help="Synthetic database path.")
+    parser.add_argument("--markets", type=int, default=10_000)
+    parser.add_argument("--markets-per-event", type=int, default=5)
+    parser.add_argument("--price-points", type=int, default=1_000_000)
+    parser.add_argument("--tags", type=int, default=1_000)
+    parser.add_argument("--insert-rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--epoch", type=int, default=EPOCH)
+    parser.add_argument("--output", default="", help="Write the JSON report here.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        db_path=args.db_path,
+        n_markets=args.markets,
+        markets_per_event=args.markets_per_event,
+        price_points=args.price_points,
+        n_tags=args.tags,
+        insert_rows=args.insert_rows,
+        repeat=args.repeat,
+        seed=args.seed,
+        epoch=args.epoch,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import json
+import datetime as dt
+
+import numpy as np
+import polars as pl
+
+from ..events.local import EventsDB
+from ..prices.local import PricesDB
+from ..tags.local import TagsDB
+
+WORDS = [
+    "election", "bitcoin", "fed", "rates", "president", "nba", "finals", "ceasefire",
+    "inflation", "ethereum", "senate", "champion", "tweets", "gdp", "recession", "oscar",
+    "weather", "launch", "merger", "earnings", "world", "cup", "approval", "tariff",
+]
+MONTHS = [
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+]
+OUTCOMES = json.dumps(json.dumps(["Yes", "No"]))
+# Every generated date is relative to this instant (2026-01-01 UTC), not the clock.
+EPOCH = 1_767_225_600
+
+
+def generate_database(
+    db_path: str,
+    n_markets: int = 100_000,
+    markets_per_event: int = 5,
+    price_points: int = 1_000_000,
+    n_tags: int = 1_000,
+    seed: int = 0,
+    chunk_size: int = 500_000,
+    epoch: int = EPOCH,
+):
+    """
+    Populate a database with synthetic events, markets, prices and tags.
+
+    The frames have the same shape as the scraper output so the regular insert
+    paths (and any index maintenance they do) are exercised. Dates are placed
+    around 'epoch' rather than the current time, so the same seed and epoch always
+    produce the same database.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database to create or extend.
+    n_markets : int, optional
+        Number of markets, by default 100_000.
+    markets_per_event : int, optional
+        Markets per event, by default 5.
+    price_points : int, optional
+        Total price points, spread evenly over every market's two tokens, by default 1_000_000.
+    n_tags : int, optional
+        Number of tags, by default 1_000.
+    seed : int, optional
+        Random seed, by default 0.
+    chunk_size : int, optional
+        Rows generated and inserted per batch, bounds memory use, by default 500_000.
+    epoch : int, optional
+        Epoch seconds the generated dates are relative to, by default EPOCH
+        (2026-01-01 UTC). Contract ends fall 30 days before to 1,000 days after it,
+        prices run up to it.
+    Returns
+    -------
+    dict
+        Summary of what was generated, including a sample event id and token id.
+    """
+    rng = np.random.default_rng(seed)
+    now = dt.datetime.fromtimestamp(int(epoch), dt.timezone.utc)
+    n_events = max(1, -(-n_markets // markets_per_event))
+
+    events_db = EventsDB(db_path, log=False)
+    prices_db = PricesDB(db_path, log=False)
+    tags_db = TagsDB(db_path, log=False)
+    prices_db._create_prices_table()
+
+    event_ids = np.arange(100_000, 100_000 + n_events)
+    event_end_days = rng.integers(-30, 1_000, n_events)
+    for start in range(0, n_events, chunk_size):
+        ids = event_ids[start : start + chunk_size]
+        ends = event_end_days[start : start + chunk_size]
+        events_db._insert_event_data(_events_frame(rng, ids, ends, now))
+
+    market_ids = np.arange(500_000, 500_000 + n_markets)
+    market_events = event_ids[np.arange(n_markets) // markets_per_event]
+    market_ends = event_end_days[np.arange(n_markets) // markets_per_event]
+    for start in range(0, n_markets, chunk_size):
+        stop = start + chunk_size
+        events_db._insert_markets_data(
+            _markets_frame(
+                rng,
+                market_events[start:stop],
+                market_ids[start:stop],
+                market_ends[start:stop],
+                now,
+            )
+        )
+
+    tokens = [_token_id(m, o) for m in market_ids for o in (0, 1)]
+    points_per_token = max(1, price_points // len(tokens)) if price_points else 0
+    first_point = int(now.timestamp()) - points_per_token * 3600
+    tokens_per_chunk = max(1, chunk_size // max(points_per_token, 1))
+    for start in range(0, len(tokens) if points_per_token else 0, tokens_per_chunk):
+        chunk = tokens[start : start + tokens_per_chunk]
+        prices_db._insert_price_data(
+            _prices_frame(rng, chunk, points_per_token, first_point)
+        )
+
+    tags_db._insert_tags_data(
+        pl.DataFrame(
+            {
+                "name": [f"{WORDS[i % len(WORDS)]}-{i}" for i in range(n_tags)],
+                "id": [str(i) for i in range(n_tags)],
+            }
+        )
+    )
+    for db in (events_db, prices_db, tags_db):
+        db.close()
+
+    return {
+        "events": int(n_events),
+        "markets": int(n_markets),
+        "tokens": len(tokens),
+        "price_points": points_per_token * len(tokens),
+        "tags": int(n_tags),
+        "sample_event_id": str(event_ids[0]),
+        "sample_market_id": str(market_ids[0]),
+        "sample_clob_token_id": tokens[0],
+    }
+
+
+def _token_id(market_id: int, outcome: int) -> str:
+    # Real CLOB token ids are ~77 digit integers.
+    return f"{market_id:038d}{outcome:039d}"
+
+
+def _text(rng, n_words: int) -> str:
+    return " ".join(WORDS[i] for i in rng.integers(0, len(WORDS), n_words))
+
+
+def _iso(ts: dt.datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _events_frame(rng, ids, end_days, now) -> pl.DataFrame:
+    names, titles, descriptions, event_end, contract_end = [], [], [], [], []
+    for event_id, days in zip(ids, end_days):
+        end = now + dt.timedelta(days=int(days))
+        month = MONTHS[end.month - 1]
+        names.append(f"{_text(rng, 3).replace(' ', '-')}-{month}-{end.day}-{event_id}")
+        titles.append(f"{_text(rng, 5).capitalize()} by {month.capitalize()} {end.day}?")
+        descriptions.append(
+            f"This market will resolve to \"Yes\" if {_text(rng, 40)} "
+            f"by {month.capitalize()} {end.day}, {end.year}. {_text(rng, 120)}"
+        )
+        event_end.append(end.strftime("%Y-%m-%d %H:%M:%S"))
+        contract_end.append(_iso(end))
+    n = len(ids)
+    return pl.DataFrame(
+        {
+            "id": [str(i) for i in ids],
+            "name": names,
+            "title": titles,
+            "description": descriptions,
+            "volume": rng.uniform(0, 5_000_000, n).round(2),
+            "created": [_iso(now - dt.timedelta(days=60))] * n,
+            "updated": [_iso(now)] * n,
+            "event_end": event_end,
+            "contract_end": contract_end,
+            "active": [True] * n,
+            "closed": [False] * n,
+            "researched": [False] * n,
+        }
+    )
+
+
+def _markets_frame(rng, event_ids, market_ids, end_days, now) -> pl.DataFrame:
+    names, titles, descriptions, clob_ids, event_end, contract_end = [], [], [], [], [], []
+    for market_id, days in zip(market_ids, end_days):
+        end = now + dt.timedelta(days=int(days))
+        month = MONTHS[end.month - 1]
+        names.append(f"will-{_text(rng, 4).replace(' ', '-')}-{month}-{end.day}-{market_id}")
+        titles.append(f"Will {_text(rng, 6)} by {month.capitalize()} {end.day}?")
+        descriptions.append(
+            f"This market will resolve to \"Yes\" if {_text(rng, 40)} "
+            f"by {month.capitalize()} {end.day}, {end.year}. {_text(rng, 120)}"
+        )
+        clob_ids.append(json.dumps([_token_id(market_id, 0), _token_id(market_id, 1)]))
+        event_end.append(end.strftime("%Y-%m-%d %H:%M:%S"))
+        contract_end.append(_iso(end))
+    n = len(market_ids)
+    return pl.DataFrame(
+        {
+            "event_id": [str(i) for i in event_ids],
+            "id": [str(i) for i in market_ids],
+            "name": names,
+            "title": titles,
+            "condition_id": [f"0x{int(i):064x}" for i in market_ids],
+            "description": descriptions,
+            "outcomes": [OUTCOMES] * n,
+            "volume": rng.uniform(0, 1_000_000, n).round(2),
+            "clob_token_ids": clob_ids,
+            "created": [_iso(now - dt.timedelta(days=60))] * n,
+            "updated": [_iso(now)] * n,
+            "event_end": event_end,
+            "contract_end": contract_end,
+        }
+    )
+
+
+def _prices_frame(rng, tokens, points_per_token, first_point) -> pl.DataFrame:
+    # Random walk per token, clipped to a valid probability.
+    steps = rng.normal(0, 0.01, (len(tokens), points_per_token))
+    prices = np.clip(0.5 + np.cumsum(steps, axis=1), 0.001, 0.999).ravel().round(4)
+    seconds = np.tile(first_point + np.arange(points_per_token) * 3600, len(tokens))
+    return pl.DataFrame(
+        {
+            "clob_token_id": np.repeat(np.array(tokens, dtype=object), points_per_token),
+            "date": seconds,
+            "price": prices,
+        },
+        schema={"clob_token_id": pl.String, "date": pl.Int64, "price": pl.Float64},
+    )
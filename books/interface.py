@@ -0,0 +1,219 @@
+import numpy as np
+import polars as pl
+
+from .local import BooksDB
+from .web import BooksScraper, unpack_levels
+
+
+def snapshot_books(
+    db_path: str, clob_token_ids: list, batch_size: int = 500, workers: int = 4
+) -> int:
+    """
+    Fetch the current order books for 'clob_token_ids' and store them.
+
+    A snapshot is only written when the book changed since the last stored one,
+    so the book at any time is the latest snapshot at or before it.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    clob_token_ids : list
+        Tokens to snapshot.
+    batch_size : int, optional
+        Tokens per request to the batch books endpoint, by default 500.
+    workers : int, optional
+        Batches requested in parallel, by default 4.
+    Returns
+    -------
+    int
+        Number of snapshots written.
+    """
+    df = BooksScraper().fetch_books(clob_token_ids, batch_size, workers)
+    if df is None or df.is_empty():
+        return 0
+    db = BooksDB(db_path)
+    try:
+        latest = db._read_latest_digests(df["clob_token_id"].unique().to_list())
+        if latest:
+            previous = pl.col("clob_token_id").replace_strict(
+                latest, default=None, return_dtype=pl.String
+            )
+            df = df.filter(previous.is_null() | (pl.col("digest") != previous))
+        db._insert_books_data(df)
+    finally:
+        db.close()
+    return len(df)
+
+
+def get_book(db_path: str, clob_token_id: str, timestamp: int = 0) -> pl.DataFrame:
+    """
+    Levels of the book for a token, best price first on each side.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    clob_token_id : str
+        Token of the book.
+    timestamp : int, optional
+        Epoch milliseconds, the book as of this time, by default 0 (latest).
+    Returns
+    -------
+    pl.DataFrame
+        timestamp, side ('bid'/'ask'), level, price and size.
+    """
+    db = BooksDB(db_path, log=False)
+    try:
+        df = db._read_book_at(clob_token_id, timestamp)
+    finally:
+        db.close()
+    frames = []
+    if not df.is_empty():
+        row = df.row(0, named=True)
+        for side in ("bid", "ask"):
+            prices, sizes = unpack_levels(row[f"{side}s"])
+            frames.append(
+                pl.DataFrame(
+                    {
+                        "timestamp": np.full(len(prices), row["timestamp"], dtype=np.int64),
+                        "side": [side] * len(prices),
+                        "level": np.arange(len(prices), dtype=np.int64),
+                        "price": prices,
+                        "size": sizes.astype(np.float64),
+                    }
+                )
+            )
+    if not frames:
+        return pl.DataFrame(
+            schema={
+                "timestamp": pl.Int64,
+                "side": pl.String,
+                "level": pl.Int64,
+                "price": pl.Float64,
+                "size": pl.Float64,
+            }
+        )
+    return pl.concat(frames)
+
+
+def get_spreads(
+    db_path: str, clob_token_id: str = "", start: int = 0, end: int = 0
+) -> pl.DataFrame:
+    """
+    Best bid, best ask, spread and mid of every stored snapshot.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    clob_token_id : str, optional
+        Only this token, by default "" (every token).
+    start : int, optional
+        Epoch milliseconds, earliest snapshot, by default 0.
+    end : int, optional
+        Epoch milliseconds, latest snapshot, by default 0.
+    Returns
+    -------
+    pl.DataFrame
+        clob_token_id, timestamp, best_bid, best_ask, spread and mid.
+    """
+    db = BooksDB(db_path, log=False)
+    try:
+        df = db._read_books_data(
+            clob_token_id,
+            start,
+            end,
+            columns=["clob_token_id", "timestamp", "best_bid", "best_ask"],
+        )
+    finally:
+        db.close()
+    return df.with_columns(
+        spread=pl.col("best_ask") - pl.col("best_bid"),
+        mid=(pl.col("best_ask") + pl.col("best_bid")) / 2,
+    )
+
+
+def get_depth(
+    db_path: str,
+    clob_token_id: str,
+    side: str = "bid",
+    price: float = None,
+    distance: float = None,
+    start: int = 0,
+    end: int = 0,
+) -> pl.DataFrame:
+    """
+    Size available on one side of the book over time.
+
+    Bid depth counts levels priced at or above the limit, ask depth levels priced at
+    or below it. The limit is either a fixed 'price' or 'distance' from each
+    snapshot's mid. With neither, the whole side is counted.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    clob_token_id : str
+        Token of the book.
+    side : str, optional
+        'bid' or 'ask', by default "bid".
+    price : float, optional
+        Fixed price limit, by default None.
+    distance : float, optional
+        Limit relative to the mid, e.g. 0.02, by default None.
+    start : int, optional
+        Epoch milliseconds, earliest snapshot, by default 0.
+    end : int, optional
+        Epoch milliseconds, latest snapshot, by default 0.
+    Returns
+    -------
+    pl.DataFrame
+        timestamp, depth (shares) and notional (price * size).
+    """
+    if side not in ("bid", "ask"):
+        raise ValueError(f"side must be 'bid' or 'ask', not {side!r}")
+    db = BooksDB(db_path, log=False)
+    try:
+        df = db._read_books_data(
+            clob_token_id,
+            start,
+            end,
+            columns=["timestamp", "best_bid", "best_ask", f"{side}s"],
+        )
+    finally:
+        db.close()
+    if df.is_empty():
+        return pl.DataFrame(
+            schema={"timestamp": pl.Int64, "depth": pl.Float64, "notional": pl.Float64}
+        )
+
+    # Decode every snapshot once and aggregate all levels in one vectorised pass.
+    decoded = [unpack_levels(blob) for blob in df[f"{side}s"]]
+    counts = np.fromiter((len(p) for p, _ in decoded), dtype=np.int64, count=len(decoded))
+    snapshot = np.repeat(np.arange(len(decoded)), counts)
+    prices = np.concatenate([p for p, _ in decoded]) if counts.sum() else np.empty(0)
+    sizes = (
+        np.concatenate([s for _, s in decoded]).astype(np.float64)
+        if counts.sum()
+        else np.empty(0)
+    )
+
+    keep = np.ones(len(prices), dtype=bool)
+    if price is not None or distance is not None:
+        if price is not None:
+            limit = np.full(len(df), price, dtype=np.float64)
+        else:
+            mid = ((df["best_bid"] + df["best_ask"]) / 2).fill_null(np.nan).to_numpy()
+            limit = mid - distance if side == "bid" else mid + distance
+        limit = limit[snapshot]
+        # Small tolerance so float noise does not drop levels sitting on the limit.
+        keep = prices >= limit - 1e-9 if side == "bid" else prices <= limit + 1e-9
+
+    depth = np.bincount(snapshot[keep], weights=sizes[keep], minlength=len(df))
+    notional = np.bincount(
+        snapshot[keep], weights=(prices * sizes)[keep], minlength=len(df)
+    )
+    return pl.DataFrame(
+        {"timestamp": df["timestamp"], "depth": depth, "notional": notional}
+    )
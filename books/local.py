@@ -0,0 +1,81 @@
+import polars as pl
+from ..database import Database
+
+
+class BooksDB(Database):
+    def __init__(self, db_path: str, log: bool = True, read_only: bool = None):
+        self.TABLE = "books"
+        super().__init__(db_path, log, read_only=read_only)
+        self._create_books_table()
+
+    def _create_books_table(self):
+        # One row per snapshot, levels are packed into the bids/asks blobs.
+        query = f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    clob_token_id TEXT NOT NULL,
+                    timestamp BIGINT NOT NULL,
+                    condition_id TEXT,
+                    best_bid REAL,
+                    best_ask REAL,
+                    digest TEXT,
+                    bids BLOB,
+                    asks BLOB,
+                    PRIMARY KEY (clob_token_id, timestamp));
+                    """
+        self._init_schema(query, "")
+
+    def _insert_books_data(self, df: pl.DataFrame):
+        query = f"""INSERT OR IGNORE INTO {self.TABLE} (clob_token_id, timestamp, condition_id, best_bid, best_ask, digest, bids, asks)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                """
+        self._insert_data(df, query)
+
+    def _read_books_data(
+        self,
+        clob_token_id: str = "",
+        start: int = 0,
+        end: int = 0,
+        columns: list = None,
+    ):
+        query = f"""SELECT * FROM {self.TABLE}"""
+        column_map = {
+            "clob_token_id": "clob_token_id",
+            "start": ("timestamp", ">="),
+            "end": ("timestamp", "<="),
+        }
+        query, params = self._build_param_query(
+            query,
+            column_map,
+            columns,
+            clob_token_id=clob_token_id,
+            # 0 leaves the side unbounded.
+            start=start or None,
+            end=end or None,
+        )
+        query += " ORDER BY clob_token_id, timestamp"
+        return self._read_data(query, params)
+
+    def _read_book_at(self, clob_token_id: str, timestamp: int = 0):
+        """Latest snapshot at or before 'timestamp' (ms), or the latest one if 0."""
+        query = f"SELECT * FROM {self.TABLE} WHERE clob_token_id = ?"
+        params = (clob_token_id,)
+        if timestamp:
+            query += " AND timestamp <= ?"
+            params += (timestamp,)
+        query += " ORDER BY timestamp DESC LIMIT 1"
+        return self._read_data(query, params)
+
+    def _read_latest_digests(self, clob_token_ids: list) -> dict:
+        """Digest of the newest stored snapshot for each token."""
+        condition, params = self.backend.in_list("clob_token_id", clob_token_ids)
+        df = self._read_data(
+            f"""SELECT b.clob_token_id, b.digest
+                FROM {self.TABLE} b
+                JOIN (SELECT clob_token_id, max(timestamp) AS timestamp
+                      FROM {self.TABLE}
+                      WHERE {condition}
+                      GROUP BY clob_token_id) latest
+                ON b.clob_token_id = latest.clob_token_id AND b.timestamp = latest.timestamp
+            """,
+            params,
+        )
+        return dict(zip(df["clob_token_id"], df["digest"]))
@@ -0,0 +1,133 @@
+import time
+import hashlib
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import polars as pl
+
+from ..helper import fetch_url
+from ..metrics import PARSE_SECONDS, ROWS_FETCHED
+
+logger = logging.getLogger(__name__)
+
+# Prices are stored as integer ticks of 1/10000, the finest tick size the CLOB uses.
+PRICE_SCALE = 10_000
+_PRICE_DTYPE = np.dtype("<u2")
+_SIZE_DTYPE = np.dtype("<f4")
+_LEVEL_BYTES = _PRICE_DTYPE.itemsize + _SIZE_DTYPE.itemsize
+
+BOOK_SCHEMA = {
+    "clob_token_id": pl.String,
+    "timestamp": pl.Int64,
+    "condition_id": pl.String,
+    "best_bid": pl.Float64,
+    "best_ask": pl.Float64,
+    "digest": pl.String,
+    "bids": pl.Binary,
+    "asks": pl.Binary,
+}
+
+
+class BooksScraper:
+    def __init__(self):
+        self.books_url = "https://clob.polymarket.com/books"
+
+    def fetch_books(self, clob_token_ids: list, batch_size: int = 500, workers: int = 4):
+        """
+        Fetch order books for many tokens, 'batch_size' tokens per request.
+
+        Batches are requested in parallel on 'workers' threads. Returns one row per
+        book (see 'BOOK_SCHEMA'), or None if every request failed.
+        """
+        tokens = list(dict.fromkeys(clob_token_ids))
+        batches = [tokens[i : i + batch_size] for i in range(0, len(tokens), batch_size)]
+        logger.debug("Fetching %d books in %d batches", len(tokens), len(batches))
+        if workers <= 1 or len(batches) <= 1:
+            results = [self._fetch_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(
+                min(workers, len(batches)), thread_name_prefix="pms-books"
+            ) as executor:
+                results = list(executor.map(self._fetch_batch, batches))
+        frames = [df for df in results if df is not None]
+        if not frames:
+            return None
+        return pl.concat(frames)
+
+    def _books_body(self, clob_token_ids: list) -> list:
+        return [{"token_id": token} for token in clob_token_ids]
+
+    def _fetch_batch(self, clob_token_ids: list):
+        try:
+            response = fetch_url(
+                self.books_url,
+                "clob/books",
+                method="POST",
+                json_body=self._books_body(clob_token_ids),
+            )
+            response.raise_for_status()
+            return self._parse_books(response.json())
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching %d books: %s", len(clob_token_ids), e)
+            return None
+
+    def _parse_books(self, books: list) -> pl.DataFrame:
+        parse_start = time.perf_counter()
+        rows = {name: [] for name in BOOK_SCHEMA}
+        for book in books:
+            bid_prices, bid_sizes = _levels(book.get("bids") or [], descending=True)
+            ask_prices, ask_sizes = _levels(book.get("asks") or [], descending=False)
+            bids = pack_levels(bid_prices, bid_sizes)
+            asks = pack_levels(ask_prices, ask_sizes)
+            rows["clob_token_id"].append(book.get("asset_id", "unk"))
+            rows["timestamp"].append(int(book.get("timestamp") or time.time() * 1000))
+            rows["condition_id"].append(book.get("market", "unk"))
+            rows["best_bid"].append(bid_prices[0] / PRICE_SCALE if len(bid_prices) else None)
+            rows["best_ask"].append(ask_prices[0] / PRICE_SCALE if len(ask_prices) else None)
+            rows["digest"].append(hashlib.blake2b(bids + asks, digest_size=8).hexdigest())
+            rows["bids"].append(bids)
+            rows["asks"].append(asks)
+        df = pl.DataFrame(rows, schema=BOOK_SCHEMA)
+        PARSE_SECONDS.observe(time.perf_counter() - parse_start, stage="books")
+        ROWS_FETCHED.inc(len(df), table="books")
+        return df
+
+
+def _levels(levels: list, descending: bool):
+    """Price ticks and sizes of one side of a book, best price first."""
+    prices = np.fromiter(
+        (round(float(level["price"]) * PRICE_SCALE) for level in levels),
+        dtype=_PRICE_DTYPE,
+        count=len(levels),
+    )
+    sizes = np.fromiter(
+        (float(level["size"]) for level in levels), dtype=_SIZE_DTYPE, count=len(levels)
+    )
+    order = np.argsort(prices, kind="stable")
+    if descending:
+        order = order[::-1]
+    return prices[order], sizes[order]
+
+
+def pack_levels(prices: np.ndarray, sizes: np.ndarray) -> bytes:
+    """
+    Pack one side of a book into a single blob.
+
+    The blob holds every price tick (uint16) followed by every size (float32),
+    6 bytes per level.
+    """
+    return prices.astype(_PRICE_DTYPE).tobytes() + sizes.astype(_SIZE_DTYPE).tobytes()
+
+
+def unpack_levels(blob: bytes):
+    """Inverse of 'pack_levels', returns prices (as floats) and sizes."""
+    if not blob:
+        return np.empty(0), np.empty(0, dtype=_SIZE_DTYPE)
+    count = len(blob) // _LEVEL_BYTES
+    prices = np.frombuffer(blob, dtype=_PRICE_DTYPE, count=count)
+    sizes = np.frombuffer(
+        blob, dtype=_SIZE_DTYPE, count=count, offset=count * _PRICE_DTYPE.itemsize
+    )
+    return prices / PRICE_SCALE, sizes
@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import polars as pl
+
+from .backends import Backend
+from .metrics import QUERY_CACHE_HITS, QUERY_CACHE_MISSES
+
+_settings = {"enabled": False, "max_bytes": 64 * 2**20}
+_probes = {}
+_probes_lock = threading.Lock()
+
+
+class QueryCache:
+    """
+    Query results by (database, query, params), least recently used first out.
+
+    Entries are bounded by the estimated size of their frames. Each entry keeps
+    the database version it was read at and is dropped on lookup once the
+    version moved on, so a hit is always as fresh as running the query.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, version: int) -> pl.DataFrame:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, version: int, df: pl.DataFrame) -> None:
+        size = df.estimated_size()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (version, df, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+
+_cache = QueryCache(_settings["max_bytes"])
+
+
+def enable_query_cache(max_bytes: int = None) -> None:
+    """
+    Answer repeated identical reads from memory.
+
+    A read is served from the cache only if nothing was committed to its database
+    since it was cached, by any connection or process. SQLite only, reads on
+    DuckDB files and inside an open transaction always run the query.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Estimated size of all cached frames, by default 64 MiB.
+    """
+    if max_bytes is not None:
+        _settings["max_bytes"] = _cache.max_bytes = max_bytes
+    _settings["enabled"] = True
+
+
+def disable_query_cache() -> None:
+    """Stop caching and free every cached frame."""
+    _settings["enabled"] = False
+    clear_query_cache()
+    with _probes_lock:
+        probes = list(_probes.values())
+        _probes.clear()
+    for probe, _ in probes:
+        probe.close()
+
+
+def clear_query_cache() -> None:
+    _cache.clear()
+
+
+def cached_read(
+    db_path: Path, backend: Backend, conn, query: str, params: tuple, table: str, read
+) -> pl.DataFrame:
+    """
+    'read(query, params)' through the cache.
+
+    The database version comes from a separate connection that never writes, so
+    commits made through 'conn' itself move it too.
+    """
+    if not _settings["enabled"] or backend.in_transaction(conn):
+        return read(query, params)
+    key = (_key(db_path), query, params)
+    try:
+        hash(key)
+    except TypeError:
+        return read(query, params)
+    version = _data_version(db_path, backend)
+    if version is None:
+        return read(query, params)
+    df = _cache.get(key, version)
+    if df is not None:
+        QUERY_CACHE_HITS.inc(table=table)
+        return df
+    QUERY_CACHE_MISSES.inc(table=table)
+    # The version is taken before the query runs, a commit in between only
+    # makes the entry look older than it is.
+    df = read(query, params)
+    _cache.put(key, version, df)
+    return df
+
+
+def _data_version(db_path: Path, backend: Backend) -> int:
+    key = _key(db_path)
+    with _probes_lock:
+        probe = _probes.get(key)
+        if probe is None:
+            conn = backend.version_probe(db_path)
+            if conn is None:
+                return None
+            probe = _probes[key] = (conn, threading.Lock())
+    conn, lock = probe
+    with lock:
+        return backend.data_version(conn)
+
+
+def _key(db_path: Path) -> str:
+    return str(Path(db_path).resolve())
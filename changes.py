@@ -0,0 +1,194 @@
+import logging
+
+import polars as pl
+
+from .backends import frame_from_rows
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+# Logged tables and the columns that identify a row: key, event_id, date.
+CHANGE_KEYS = {
+    "events": ("id", None, None),
+    "markets": ("market_id", "event_id", None),
+    "prices": ("clob_token_id", None, "date"),
+    "descriptions": ("id", None, None),
+}
+_OPS = {"insert": "NEW", "update": "NEW", "delete": "OLD"}
+
+
+class ChangeLog(Database):
+    """
+    A sequenced log of every row inserted, updated or deleted in the logged tables.
+
+    Rows are appended by triggers, in the same transaction as the change, so the
+    log covers every writer of the file: inserts, status updates, the expiry sweep,
+    retention and other processes. 'seq' only ever grows, also after pruning.
+    Each entry holds the table, the operation and the columns that identify the
+    row (markets also carry their event_id, prices their date); consumers read the
+    current rows back with 'changes_since'. SQLite only.
+    """
+
+    def __init__(self, db_path: str, log: bool = True):
+        self.TABLE = "changes"
+        super().__init__(db_path, log)
+        if not self.backend.supports_triggers:
+            raise ValueError(f"The change log is not supported by {self.backend.name}")
+        self._create_changes_table()
+
+    def _create_changes_table(self):
+        query = f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    key TEXT,
+                    event_id TEXT,
+                    date BIGINT,
+                    changed BIGINT);
+                    """
+        self._init_schema(query, "")
+
+    def _enable(self) -> list:
+        """Create the triggers of every logged table that exists, returns the tables."""
+        tables = [t for t in CHANGE_KEYS if t in self.backend.tables(self.conn)]
+        with self._transaction():
+            for table in tables:
+                key, event_id, date = CHANGE_KEYS[table]
+                for op, row in _OPS.items():
+                    self.conn.execute(
+                        f"""CREATE TRIGGER IF NOT EXISTS {self.TABLE}_{table}_{op}
+                            AFTER {op.upper()} ON {table}
+                            BEGIN
+                                INSERT INTO {self.TABLE} (table_name, op, key, event_id, date, changed)
+                                VALUES (
+                                    '{table}',
+                                    '{op}',
+                                    {row}.{key},
+                                    {f"{row}.{event_id}" if event_id else "NULL"},
+                                    {f"{row}.{date}" if date else "NULL"},
+                                    CAST(strftime('%s', 'now') AS INTEGER)
+                                );
+                            END;"""
+                    )
+        return tables
+
+    def _disable(self) -> None:
+        with self._transaction():
+            for table in CHANGE_KEYS:
+                for op in _OPS:
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {self.TABLE}_{table}_{op}")
+
+    def _read_changes(self, seq: int, limit: int) -> pl.DataFrame:
+        return self._read_in_snapshot(
+            f"SELECT * FROM {self.TABLE} WHERE seq > ? ORDER BY seq LIMIT {int(limit)}",
+            (seq,),
+        )
+
+    def _read_changed_rows(self, table: str, first: int, last: int) -> pl.DataFrame:
+        """Current rows of 'table' changed between 'first' and 'last', deleted ones are gone."""
+        key, event_id, date = CHANGE_KEYS[table]
+        # Driven by the log: one primary key lookup per logged change.
+        conditions = [f"t.{key} = c.key"]
+        if event_id:
+            conditions.append(f"t.{event_id} = c.event_id")
+        if date:
+            conditions.append(f"t.{date} = c.date")
+        return self._read_in_snapshot(
+            f"""SELECT DISTINCT t.* FROM {self.TABLE} c
+                JOIN {table} t ON {" AND ".join(conditions)}
+                WHERE c.table_name = ? AND c.seq BETWEEN ? AND ?""",
+            (table, first, last),
+        )
+
+    def _read_in_snapshot(self, query: str, params: tuple) -> pl.DataFrame:
+        # Not self._read_data: it would commit and end the read transaction.
+        cur = self.conn.execute(query, params)
+        return frame_from_rows(cur.fetchall(), [col[0] for col in cur.description])
+
+    def _prune(self, seq: int) -> int:
+        return self.backend.write(self.conn, f"DELETE FROM {self.TABLE} WHERE seq <= ?", (seq,))
+
+
+def enable_change_log(db_path: str) -> list:
+    """
+    Start logging changes to events, markets, descriptions and prices.
+
+    The triggers live in the database file, so every process writing to it logs
+    its changes from then on. Tables created later are picked up by calling this
+    again.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    Returns
+    -------
+    list
+        The tables being logged.
+    """
+    with ChangeLog(db_path, log=False) as db:
+        tables = db._enable()
+    logger.info("Logging changes to %s in %s", tables, db_path)
+    return tables
+
+
+def disable_change_log(db_path: str) -> None:
+    """Stop logging changes. The entries logged so far are kept."""
+    with ChangeLog(db_path, log=False) as db:
+        db._disable()
+
+
+def changes_since(db_path: str, seq: int = 0, limit: int = 10_000, rows: bool = True) -> dict:
+    """
+    The next batch of changes after 'seq'.
+
+    Call it again with the returned 'seq' until 'changes' comes back empty. The
+    log and the rows are read in one transaction, so the rows are at least as new
+    as the last change in the batch.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    seq : int, optional
+        Last sequence number already consumed, by default 0 (from the start).
+    limit : int, optional
+        Changes per batch, by default 10,000.
+    rows : bool, optional
+        Also return the current rows of the changed keys, by default True.
+    Returns
+    -------
+    dict
+        'seq': sequence number to resume from, 'changes': the log entries
+        (seq, table_name, op, key, event_id, date, changed), and per logged table
+        the changed rows that still exist.
+    """
+    with ChangeLog(db_path, log=False) as db:
+        db.flush()
+        db.conn.execute("BEGIN")
+        try:
+            changes = db._read_changes(seq, limit)
+            batch = {"seq": seq, "changes": changes}
+            if changes.is_empty():
+                return batch
+            first, last = changes["seq"].min(), changes["seq"].max()
+            batch["seq"] = last
+            if rows:
+                for table in changes["table_name"].unique(maintain_order=True).to_list():
+                    batch[table] = db._read_changed_rows(table, first, last)
+        finally:
+            db.conn.rollback()
+    return batch
+
+
+def prune_changes(db_path: str, seq: int) -> int:
+    """
+    Delete log entries up to and including 'seq', once every consumer has them.
+
+    Returns
+    -------
+    int
+        Entries deleted.
+    """
+    with ChangeLog(db_path, log=False) as db:
+        return db._prune(seq)
@@ -0,0 +1,159 @@
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .crawl import crawl_catalogue
+from .metrics import to_prometheus
+from .retention import apply_retention
+from .snapshot import SNAPSHOT_TABLES, export_snapshot
+from .sync.daemon import SyncDaemon
+from .writer import enable_write_behind
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="polymarketscraper", description="Scrape events and markets from PolyMarket."
+    )
+    parser.add_argument("--log-level", default="INFO")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync = commands.add_parser("sync", help="Run the sync daemon.")
+    sync.add_argument("--db-path", default="events.db")
+    sync.add_argument("--catalogue-interval", type=float, default=900.0)
+    sync.add_argument("--expiry-interval", type=float, default=300.0)
+    sync.add_argument("--plan-interval", type=float, default=60.0)
+    sync.add_argument("--min-interval", type=float, default=60.0)
+    sync.add_argument("--max-interval", type=float, default=3600.0)
+    sync.add_argument("--price-workers", type=int, default=4)
+    sync.add_argument("--status-workers", type=int, default=2)
+    sync.add_argument("--max-pending", type=int, default=50_000)
+    sync.add_argument("--catalogue-limit", type=int, default=100)
+    sync.add_argument("--duration", type=float, default=None, help="Stop after N seconds.")
+    sync.add_argument(
+        "--metrics-port", type=int, default=0, help="Serve Prometheus metrics on this port."
+    )
+    sync.add_argument(
+        "--retention-interval",
+        type=float,
+        default=0.0,
+        help="Apply the retention policy every N seconds, 0 to disable.",
+    )
+    sync.add_argument(
+        "--write-behind",
+        action="store_true",
+        help="Queue inserts and write them from a background thread.",
+    )
+    _add_retention_arguments(sync)
+
+    retain = commands.add_parser("retain", help="Downsample and archive old price history.")
+    retain.add_argument("--db-path", default="events.db")
+    _add_retention_arguments(retain)
+
+    crawl = commands.add_parser("crawl", help="Resumable crawl of the full event catalogue.")
+    crawl.add_argument("--db-path", default="events.db")
+    crawl.add_argument("--job", default="catalogue")
+    crawl.add_argument("--page-size", type=int, default=100)
+    crawl.add_argument("--max-pages", type=int, default=None)
+    crawl.add_argument("--restart", action="store_true", help="Ignore the checkpoint.")
+
+    export = commands.add_parser("export", help="Write a Parquet/Arrow IPC snapshot.")
+    export.add_argument("--db-path", default="events.db")
+    export.add_argument("--out", required=True, help="Snapshot directory.")
+    export.add_argument(
+        "--format", nargs="+", choices=["parquet", "ipc"], default=["parquet", "ipc"]
+    )
+    export.add_argument("--tables", nargs="+", default=list(SNAPSHOT_TABLES))
+    export.add_argument("--overwrite", action="store_true")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    if args.command == "sync":
+        if args.metrics_port:
+            serve_metrics(args.metrics_port)
+        if args.write_behind:
+            enable_write_behind()
+        daemon = SyncDaemon(
+            args.db_path,
+            catalogue_interval=args.catalogue_interval,
+            expiry_interval=args.expiry_interval,
+            plan_interval=args.plan_interval,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            price_workers=args.price_workers,
+            status_workers=args.status_workers,
+            max_pending=args.max_pending,
+            catalogue_limit=args.catalogue_limit,
+            retention_interval=args.retention_interval,
+            retention_options=_retention_options(args),
+        )
+        daemon.run(args.duration)
+    elif args.command == "retain":
+        apply_retention(args.db_path, **_retention_options(args))
+    elif args.command == "crawl":
+        crawl_catalogue(
+            args.db_path,
+            job=args.job,
+            page_size=args.page_size,
+            max_pages=args.max_pages,
+            restart=args.restart,
+        )
+    elif args.command == "export":
+        export_snapshot(
+            args.db_path,
+            args.out,
+            formats=tuple(args.format),
+            tables=tuple(args.tables),
+            overwrite=args.overwrite,
+        )
+
+
+def _add_retention_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--full-days", type=float, default=7)
+    parser.add_argument("--hourly-days", type=float, default=90)
+    parser.add_argument("--resolved", choices=["archive", "drop", "keep"], default="archive")
+    parser.add_argument("--resolved-days", type=float, default=30)
+    parser.add_argument("--archive-dir", default="archive")
+    parser.add_argument("--vacuum-pages", type=int, default=2000)
+
+
+def _retention_options(args: argparse.Namespace) -> dict:
+    return {
+        "full_days": args.full_days,
+        "hourly_days": args.hourly_days,
+        "resolved": args.resolved,
+        "resolved_days": args.resolved_days,
+        "archive_dir": args.archive_dir,
+        "vacuum_pages": args.vacuum_pages,
+    }
+
+
+def serve_metrics(port: int, host: str = "") -> ThreadingHTTPServer:
+    """Serve 'to_prometheus()' at /metrics from a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    main()
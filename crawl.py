@@ -0,0 +1,222 @@
+import logging
+import datetime as dt
+
+import polars as pl
+
+from .database import Database
+from .events.local import EventsDB
+from .events.web import EventsScraper
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCheckpoints(Database):
+    """
+    Progress of long crawl jobs, so an interrupted job can pick up where it stopped.
+
+    'crawl_jobs' holds one row per job with its cursor (e.g. a page offset), pages
+    completed and last error. 'crawl_items' holds the items (tokens, event ids) a
+    job finished or failed on.
+    """
+
+    def __init__(self, db_path: str, log: bool = True):
+        self.TABLE = "crawl_jobs"
+        self.ITEM_TABLE = "crawl_items"
+        super().__init__(db_path, log)
+        self._create_jobs_table()
+        self._create_items_table()
+
+    def _create_jobs_table(self):
+        query = f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    job TEXT NOT NULL,
+                    cursor BIGINT DEFAULT 0,
+                    pages BIGINT DEFAULT 0,
+                    last_error TEXT,
+                    started TEXT,
+                    updated TEXT,
+                    PRIMARY KEY (job));
+                    """
+        self._init_schema(query, "")
+
+    def _create_items_table(self):
+        query = f"""CREATE TABLE IF NOT EXISTS {self.ITEM_TABLE} (
+                    job TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    error TEXT,
+                    updated TEXT,
+                    PRIMARY KEY (job, item));
+                    """
+        self._init_schema(query, "")
+
+    def _start_job(self, job: str) -> dict:
+        """Create the job if needed and return its row."""
+        self.backend.write(
+            self.conn,
+            f"""INSERT INTO {self.TABLE} (job, cursor, pages, started, updated)
+                VALUES (?, 0, 0, ?, ?)
+                ON CONFLICT (job) DO NOTHING""",
+            (job, _now(), _now()),
+        )
+        return self._read_job(job)
+
+    def _read_job(self, job: str) -> dict:
+        df = self._read_data(f"SELECT * FROM {self.TABLE} WHERE job = ?", (job,))
+        return df.row(0, named=True) if not df.is_empty() else None
+
+    def _advance_job(self, job: str, cursor: int, pages: int = 1) -> None:
+        """Move the cursor after a page was written, and clear the last error."""
+        # Write-behind inserts of the page must land before the cursor passes it.
+        self.flush()
+        self.backend.write(
+            self.conn,
+            f"""UPDATE {self.TABLE}
+                SET cursor = ?, pages = pages + ?, last_error = NULL, updated = ?
+                WHERE job = ?""",
+            (cursor, pages, _now(), job),
+        )
+
+    def _record_error(self, job: str, error: str) -> None:
+        self.flush()
+        self.backend.write(
+            self.conn,
+            f"UPDATE {self.TABLE} SET last_error = ?, updated = ? WHERE job = ?",
+            (error, _now(), job),
+        )
+
+    def _mark_items(self, job: str, items: list, status: str, error: str = None) -> None:
+        """Record items as 'done' or 'failed'. Marking an item again replaces its status."""
+        if not items:
+            return
+        # The items' rows must be written before they count as done.
+        self.flush()
+        items = list(dict.fromkeys(str(i) for i in items))
+        now = _now()
+        df = pl.DataFrame(
+            {
+                "job": [job] * len(items),
+                "item": items,
+                "status": [status] * len(items),
+                "error": [error] * len(items),
+                "updated": [now] * len(items),
+                "attempts": [1] * len(items),
+            },
+            schema={
+                "job": pl.String,
+                "item": pl.String,
+                "status": pl.String,
+                "error": pl.String,
+                "updated": pl.String,
+                "attempts": pl.Int64,
+            },
+        )
+        query = f"""INSERT INTO {self.ITEM_TABLE} (job, item, status, error, updated, attempts)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (job, item) DO UPDATE SET
+                        status = excluded.status,
+                        error = excluded.error,
+                        updated = excluded.updated,
+                        attempts = {self.ITEM_TABLE}.attempts + 1;
+                """
+        self._insert_data(df, query)
+
+    def _read_items(self, job: str, status: str = "") -> pl.DataFrame:
+        query = f"SELECT * FROM {self.ITEM_TABLE}"
+        column_map = {"job": "job", "status": "status"}
+        query, params = self._build_param_query(query, column_map, job=job, status=status)
+        return self._read_data(query, params)
+
+    def _done_items(self, job: str) -> set:
+        return set(self._read_items(job, "done")["item"].to_list())
+
+    def _copy_from(self, other: "CrawlCheckpoints") -> None:
+        """Carry item progress recorded in another database (a shard) into this one."""
+        items = other._read_items("")
+        for (job, status, error), group in items.group_by(["job", "status", "error"]):
+            self._mark_items(job, group["item"].to_list(), status, error)
+
+    def _reset_job(self, job: str) -> None:
+        with self._transaction():
+            self.conn.execute(f"DELETE FROM {self.ITEM_TABLE} WHERE job = ?", (job,))
+            self.conn.execute(f"DELETE FROM {self.TABLE} WHERE job = ?", (job,))
+
+
+def crawl_catalogue(
+    db_path: str,
+    job: str = "catalogue",
+    page_size: int = 100,
+    closed: bool = None,
+    max_pages: int = None,
+    restart: bool = False,
+) -> dict:
+    """
+    Page through every event on gamma, oldest first, and store events and markets.
+
+    The offset of the next page is checkpointed after each page is written, so an
+    interrupted crawl resumes from the first unfinished page instead of page one.
+    Events are inserted with INSERT OR IGNORE, so a page that is written twice
+    (e.g. after a crash between the write and the checkpoint) does no harm.
+    Running the job again later only fetches events added since it last finished.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    job : str, optional
+        Checkpoint name, by default "catalogue".
+    page_size : int, optional
+        Events per request, by default 100.
+    closed : bool, optional
+        Only closed (True) or open (False) events, by default None (both).
+    max_pages : int, optional
+        Stop after this many pages, by default None (until the last page).
+    restart : bool, optional
+        Forget the checkpoint and start from the first page, by default False.
+    Returns
+    -------
+    dict
+        Pages and events fetched this run, the final offset, whether the last page
+        was reached and the error that stopped the run, if any.
+    """
+    checkpoints = CrawlCheckpoints(db_path, log=False)
+    db = EventsDB(db_path, log=False)
+    scraper = EventsScraper()
+    stats = {"pages": 0, "events": 0, "offset": 0, "finished": False, "error": None}
+    try:
+        if restart:
+            checkpoints._reset_job(job)
+        offset = checkpoints._start_job(job)["cursor"]
+        if offset:
+            logger.info("Resuming %s at offset %d", job, offset)
+        while max_pages is None or stats["pages"] < max_pages:
+            result = scraper.fetch_events_page(offset, page_size, closed)
+            if result is None:
+                # _fetch_data logged the request error and returned None.
+                stats["error"] = f"Request failed at offset {offset}"
+                checkpoints._record_error(job, stats["error"])
+                break
+            event_data, market_data = result
+            if event_data.is_empty():
+                stats["finished"] = True
+                break
+            db._insert_event_data(event_data)
+            if not market_data.is_empty():
+                db._insert_markets_data(market_data)
+            offset += len(event_data)
+            checkpoints._advance_job(job, offset)
+            stats["pages"] += 1
+            stats["events"] += len(event_data)
+            if len(event_data) < page_size:
+                stats["finished"] = True
+                break
+    finally:
+        db.close()
+        checkpoints.close()
+    stats["offset"] = offset
+    logger.info("Crawl %s: %s", job, stats)
+    return stats
+
+
+def _now() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
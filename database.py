@@ -1,40 +1,73 @@
-import sqlite3
+import re
+import logging
+import time
+import datetime as dt
 from pathlib import Path
 from typing import Self
 
 import polars as pl
 
+from .backends import Backend, get_backend
+from .cache import cached_read
+from .metrics import ROWS_IGNORED, ROWS_INSERTED, SQL_SECONDS
+from .writer import get_writer
+
+logger = logging.getLogger(__name__)
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+SCHEMA_TABLE = "schema_version"
+_COLUMN_PATTERN = re.compile(r"^[A-Za-z_]\w*$")
+# Databases opened in reader mode by default, see 'enable_reader_mode'.
+_readers = {"all": False, "paths": set()}
+
 
 class Database:
-    def __init__(self, db_path: str, log: bool = True):
+    def __init__(
+        self,
+        db_path: str,
+        log: bool = True,
+        backend: str | Backend = None,
+        read_only: bool = None,
+    ):
         self.db_path = Path(db_path)
         self.log = log
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.backend = get_backend(self.db_path, backend)
+        # Readers open an existing file read-only and leave the schema to the writer.
+        self.read_only = _is_reader(self.db_path) if read_only is None else read_only
+        if not self.read_only:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.conn = self._connect()
 
-    def _connect(self, timeout: int = 30) -> sqlite3.Connection:
-        conn = sqlite3.connect(
-            str(self.db_path), timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        conn.execute("PRAGMA journal_mode = WAL;")
-        conn.execute("PRAGMA synchronous = NORMAL;")
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.execute("PRAGMA busy_timeout = 30000;")
-        return conn
+    def _connect(self, timeout: int = 30):
+        return self.backend.connect(self.db_path, timeout, read_only=self.read_only)
+
+    def _transaction(self):
+        """Context manager that commits on success and rolls back on error."""
+        self.flush()
+        return self.backend.transaction(self.conn)
+
+    def flush(self, timeout: float = None) -> None:
+        """Wait until inserts queued for this database are written (write-behind mode)."""
+        writer = get_writer(self.db_path, self.backend, create=False)
+        if writer is not None:
+            writer.flush(timeout)
 
     def _init_schema(self, create_table_query: str, index_query: str) -> None:
-        cur = self.conn.cursor()
-        cur.execute(create_table_query)
+        if self.read_only:
+            return
+        self.conn.execute(self.backend.ddl(create_table_query))
         if index_query != "":
-            cur.execute(index_query)
-        cur.close()
+            self.conn.execute(self.backend.ddl(index_query))
 
     def close(self) -> None:
         try:
-            self.conn.commit()
-        except Exception:
-            pass
-        self.conn.close()
+            self.flush()
+        finally:
+            try:
+                self.conn.commit()
+            except Exception:
+                pass
+            self.conn.close()
 
     # context manager support
     def __enter__(self) -> Self:
@@ -48,51 +81,226 @@ class Database:
         read_query: str,
         params: tuple = None,
     ):
+        self.flush()
+        return cached_read(
+            self.db_path,
+            self.backend,
+            self.conn,
+            read_query,
+            params,
+            _table_name(read_query),
+            self._run_read,
+        )
 
-        with self.conn:
-            cur = self.conn.cursor()
-            if params is None:
-                cur.execute(read_query)
-            else:
-                cur.execute(read_query, params)
-            rows = cur.fetchall()
-            columns = [col[0] for col in cur.description]
-            if not rows:
-                df = pl.DataFrame({c: [] for c in columns})
-            else:
-                df = pl.from_records(
-                    rows, schema=columns, orient="row", infer_schema_length=None
-                )
-
-            return df
+    def _run_read(self, read_query: str, params: tuple = None) -> pl.DataFrame:
+        start = time.perf_counter()
+        df = self.backend.read(self.conn, read_query, params)
+        SQL_SECONDS.observe(
+            time.perf_counter() - start, op="read", table=_table_name(read_query)
+        )
+        return df
 
     def _insert_data(self, df: pl.DataFrame, insert_query: str) -> None:
         if df.is_empty():
             return
 
+        table = _table_name(insert_query)
+        writer = get_writer(self.db_path, self.backend)
+        if writer is not None:
+            writer.put(df, insert_query, table, self.log)
+            return
         if self.log:
-            print(f"Inserting/updating {len(df)} records into the database...")
-        records = df.to_numpy().tolist()
-        with self.conn:
-            self.conn.executemany(insert_query, records)
+            logger.info("Inserting/updating %d records into %s", len(df), table)
+        start = time.perf_counter()
+        inserted = self.backend.insert(self.conn, df, insert_query)
+        SQL_SECONDS.observe(time.perf_counter() - start, op="write", table=table)
+        ROWS_INSERTED.inc(inserted, table=table)
+        ROWS_IGNORED.inc(len(df) - inserted, table=table)
+
+    def _merge_from(self, shard_path: str, tables: tuple) -> dict:
+        """
+        Copy rows from another database file into this one.
+
+        Only columns present in both tables are copied, duplicate keys are ignored.
+        Returns the number of rows inserted per table. SQLite only.
+        """
+        if not self.backend.supports_attach:
+            raise ValueError(f"Merging is not supported by {self.backend.name}")
+        merged = {}
+        self.conn.execute("ATTACH DATABASE ? AS shard", (str(shard_path),))
+        try:
+            shard_tables = {
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT name FROM shard.sqlite_master WHERE type = 'table'"
+                )
+            }
+            with self.conn:
+                for table in tables:
+                    if table not in shard_tables:
+                        continue
+                    main_cols = [
+                        r[1] for r in self.conn.execute(f"PRAGMA main.table_info({table})")
+                    ]
+                    shard_cols = {
+                        r[1] for r in self.conn.execute(f"PRAGMA shard.table_info({table})")
+                    }
+                    cols = ", ".join(c for c in main_cols if c in shard_cols)
+                    if not cols:
+                        continue
+                    start = time.perf_counter()
+                    cur = self.conn.execute(
+                        f"INSERT OR IGNORE INTO main.{table} ({cols}) SELECT {cols} FROM shard.{table}"
+                    )
+                    SQL_SECONDS.observe(time.perf_counter() - start, op="merge", table=table)
+                    ROWS_INSERTED.inc(cur.rowcount, table=table)
+                    merged[table] = cur.rowcount
+        finally:
+            self.conn.execute("DETACH DATABASE shard")
+        return merged
+
+    def _schema_version(self, component: str) -> int:
+        query = f"""CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (
+                    component TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    applied TEXT,
+                    PRIMARY KEY (component));
+                    """
+        self._init_schema(query, "")
+        row = self.conn.execute(
+            f"SELECT version FROM {SCHEMA_TABLE} WHERE component = ?", (component,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _set_schema_version(self, component: str, version: int) -> None:
+        self.backend.write(
+            self.conn,
+            f"""INSERT INTO {SCHEMA_TABLE} (component, version, applied)
+                VALUES (?, ?, ?)
+                ON CONFLICT (component) DO UPDATE
+                SET version = excluded.version, applied = excluded.applied""",
+            (component, version, dt.datetime.now(dt.timezone.utc).isoformat()),
+        )
+
+    def _migrate(self, component: str, migrations: list, fresh: bool = False) -> int:
+        """
+        Run the migrations of 'component' the database has not had yet.
+
+        'migrations[i]' takes the schema from version i to i + 1 and must be safe to
+        run again if it was interrupted. Tables that were just created already have
+        the latest schema, 'fresh' records that without running anything.
+        Returns the schema version.
+        """
+        if self._schema_version(component) >= len(migrations):
+            return len(migrations)
+        self.flush()
+        # One transaction holding the write lock: processes opening the database at
+        # the same time migrate one after the other, and an interrupted migration
+        # leaves nothing behind.
+        with self.backend.exclusive(self.conn):
+            # Another process may have finished while we waited for the lock.
+            version = self._schema_version(component)
+            if fresh and version == 0:
+                self._set_schema_version(component, len(migrations))
+                return len(migrations)
+            for target, migration in enumerate(migrations[version:], start=version + 1):
+                logger.info("Migrating %s in %s to version %d", component, self.db_path, target)
+                start = time.perf_counter()
+                migration()
+                self._set_schema_version(component, target)
+                SQL_SECONDS.observe(time.perf_counter() - start, op="migrate", table=component)
+        return max(version, len(migrations))
+
+    def _rebuild_table(self, table: str, create, convert, chunk_size: int = 200_000) -> None:
+        """
+        Copy 'table' into a new table with a different schema and swap it in.
+
+        'create(name)' creates the new table, 'convert(df)' maps a chunk of old rows
+        to the new column types. Rows are copied in rowid order in chunks, keeping
+        their rowids where the backend allows it (search indexes join on them). The
+        old table is only replaced once everything is copied, in one transaction,
+        so an interrupted rebuild leaves it untouched and simply starts over.
+        """
+        temp = f"{table}__rebuild"
+        with self._transaction():
+            self.conn.execute(f"DROP TABLE IF EXISTS {temp}")
+        create(temp)
+        old_columns = self._table_columns(table)
+        columns = [c for c in self._table_columns(temp) if c in old_columns]
+        keep_rowid = self.backend.supports_rowid_insert
+        targets = (["rowid"] if keep_rowid else []) + columns
+        insert_query = f"""INSERT OR IGNORE INTO {temp} ({", ".join(targets)})
+                           VALUES ({", ".join("?" for _ in targets)})"""
+        last = -1
+        while True:
+            df = self._read_data(
+                f"""SELECT rowid AS __rowid, {", ".join(columns)} FROM {table}
+                    WHERE rowid > ? ORDER BY rowid LIMIT {int(chunk_size)}""",
+                (last,),
+            )
+            if df.is_empty():
+                break
+            last = df["__rowid"].max()
+            df = convert(df).select((["__rowid"] if keep_rowid else []) + columns)
+            self.backend.insert(self.conn, df, insert_query)
+        triggers = self._table_triggers(table)
+        with self._transaction():
+            self.conn.execute(f"DROP TABLE {table}")
+            self.conn.execute(f"ALTER TABLE {temp} RENAME TO {table}")
+            # Dropping the table dropped its triggers.
+            for trigger in triggers:
+                self.conn.execute(trigger)
+
+    def _table_triggers(self, table: str) -> list:
+        if not self.backend.supports_triggers:
+            return []
+        rows = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _table_columns(self, table: str) -> list:
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})").fetchall()]
 
     def _drop_table(self, table_name: str):
-        with self.conn:
-            cursor = self.conn.cursor()
+        with self._transaction():
             query = f"DROP TABLE {table_name}"
-            cursor.execute(query)
+            self.conn.execute(query)
 
-    def _build_param_query(self, base_query: str, column_map: dict, **kwargs):
+    def _build_param_query(
+        self, base_query: str, column_map: dict, columns: list = None, **kwargs
+    ):
+        """
+        Add a WHERE clause for every non-blank keyword named in 'column_map'.
+
+        Scalars compile to 'col = ?' and lists (tuples, sets, Series) to a single
+        IN condition, see 'Backend.in_list'. A 'column_map' entry of (column, op)
+        is a bound instead, e.g. {"start": ("date", ">=")}.
+        """
+        if columns:
+            # Narrow "SELECT *" to the requested columns.
+            base_query = base_query.replace("*", _column_list(columns), 1)
         conditions = []
         params = []
         for arg, value in kwargs.items():
             # Check if the argument is valid and the value is not empty
-            if arg in column_map and value not in (None, ""):
+            if arg in column_map and not is_blank(value):
                 db_col = column_map[arg]
 
-                # Build the condition string (e.g., "id = ?")
-                conditions.append(f"{db_col} = ?")
-                params.append(value)
+                if isinstance(db_col, tuple):
+                    # A bound, e.g. ("date", ">=")
+                    db_col, op = db_col
+                    conditions.append(f"{db_col} {op} ?")
+                    params.append(value)
+                elif is_batch(value):
+                    # Many keys in one query (e.g., "id IN (?, ?, ?)")
+                    condition, batch_params = self.backend.in_list(db_col, batch_values(value))
+                    conditions.append(condition)
+                    params.extend(batch_params)
+                else:
+                    # Build the condition string (e.g., "id = ?")
+                    conditions.append(f"{db_col} = ?")
+                    params.append(value)
 
         # 3. Assemble the query
         if conditions:
@@ -100,3 +308,64 @@ class Database:
             base_query += " WHERE " + " AND ".join(conditions)
 
         return base_query, tuple(params)
+
+
+def enable_reader_mode(db_path: str = None) -> None:
+    """
+    Open databases read-only from now on, for processes that only analyse data.
+
+    Readers open the file with 'mode=ro' and 'query_only', memory-map it and skip
+    every CREATE and migration, so they need no write access and never take the
+    writer's lock. They read the live database of an ingester (WAL mode) while it
+    writes, and never scrape: reads that find nothing return nothing.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Only this database, by default every database.
+    """
+    if db_path is None:
+        _readers["all"] = True
+    else:
+        _readers["paths"].add(Path(db_path).resolve())
+
+
+def disable_reader_mode(db_path: str = None) -> None:
+    """Open databases for writing again, by default every database."""
+    if db_path is None:
+        _readers["all"] = False
+        _readers["paths"].clear()
+    else:
+        _readers["paths"].discard(Path(db_path).resolve())
+
+
+def _is_reader(db_path: Path) -> bool:
+    return _readers["all"] or (
+        bool(_readers["paths"]) and db_path.resolve() in _readers["paths"]
+    )
+
+
+def is_blank(value) -> bool:
+    """Filter values that mean 'no filter', None and ""."""
+    return value is None or (isinstance(value, str) and value == "")
+
+
+def is_batch(value) -> bool:
+    return isinstance(value, (list, tuple, set, frozenset, pl.Series))
+
+
+def batch_values(value) -> list:
+    values = value.to_list() if isinstance(value, pl.Series) else value
+    return list(dict.fromkeys(values))
+
+
+def _table_name(query: str) -> str:
+    match = _TABLE_PATTERN.search(query)
+    return match.group(1) if match else ""
+
+
+def _column_list(columns: list) -> str:
+    for column in columns:
+        if not _COLUMN_PATTERN.match(column):
+            raise ValueError(f"Invalid column name: {column!r}")
+    return ", ".join(dict.fromkeys(columns))
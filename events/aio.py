@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from typing import Literal
+
+from .interface import _finalise_events, _finalise_markets, _read_columns
+from .local import EventsDB
+from .web import EventsScraper
+from ..aio import HTTPError, fetch_url_async, get_data_async
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEventsScraper(EventsScraper):
+    """EventsScraper whose fetch methods are coroutines sharing one connection pool."""
+
+    async def fetch_soon_resolving_markets(
+        self, resolve_threshold: int = 3, limit: int = 100
+    ):
+        params = self._soon_resolving_params(limit)
+        return await self._fetch_data(
+            self.event_url, params, resolve_threshold=resolve_threshold
+        )
+
+    async def fetch_top_active_markets(self, limit: int = 100):
+        params = self._top_active_params(limit)
+        return await self._fetch_data(self.event_url, params)
+
+    async def fetch_event_by_X(
+        self, event_id: str, event_name: str, resolve_threshold: int = 3000
+    ):
+        params = self._event_params(event_id, event_name)
+        return await self._fetch_data(self.event_url, params, resolve_threshold=resolve_threshold)
+
+    async def _fetch_data(self, url: str, params: dict = {}, resolve_threshold: int = 3000):
+        try:
+            response = await fetch_url_async(url, "gamma/events", params=params or None)
+            response.raise_for_status()
+        except HTTPError as e:
+            logger.error("Error fetching data: %s", e)
+            return None
+        # Date extraction is CPU heavy, keep it off the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._parse_events, response.json(), resolve_threshold
+        )
+
+
+async def get_events_data_async(
+    db_path: str,
+    event_id: str = "",
+    event_name: str = "",
+    scrape_func=None,
+    active: bool = True,
+    sort_by: Literal["dtr", "volume"] = "dtr",
+    end_date_filter: Literal["event_end", "contract_end"] = "contract_end",
+    use_for_dtr: Literal["event_end", "contract_end"] = "contract_end",
+    force_update: bool = False,
+    dtr: int = 10_000,
+    include_description: bool = False,
+    columns: list = None,
+):
+    """
+    Async counterpart of 'get_events_data', takes the same parameters.
+
+    'scrape_func' must be a coroutine function, e.g. a method of AsyncEventsScraper.
+    """
+    scraper = AsyncEventsScraper()
+    if event_id != "" or event_name != "":
+        scrape_func = scraper.fetch_event_by_X
+    if scrape_func is None:
+        scrape_func = scraper.fetch_top_active_markets
+    params = {"event_id": event_id, "event_name": event_name}
+    read_columns = _read_columns(columns, use_for_dtr, end_date_filter, "active", sort_by)
+
+    data = await get_data_async(
+        EventsDB,
+        db_path,
+        read_method="_read_event_data",
+        read_params={
+            **params,
+            "include_description": include_description,
+            "columns": read_columns,
+        },
+        fetch_func=scrape_func,
+        fetch_params=params,
+        insert_methods=["_insert_event_data", "_insert_markets_data"],
+        force_update=force_update,
+    )
+    return _finalise_events(
+        data, active, sort_by, end_date_filter, use_for_dtr, dtr, columns
+    )
+
+
+async def get_markets_data_async(
+    db_path: str,
+    event_id: str = "",
+    market_id: str = "",
+    market_name: str = "",
+    scrape_func=None,
+    sort_by: Literal["dtr", "volume"] = "dtr",
+    end_date_filter: Literal["event_end", "contract_end"] = "contract_end",
+    use_for_dtr: Literal["event_end", "contract_end"] = "contract_end",
+    force_update: bool = False,
+    dtr: int = 10_000,
+    include_description: bool = False,
+    columns: list = None,
+):
+    """
+    Async counterpart of 'get_markets_data', takes the same parameters.
+
+    'scrape_func' must be a coroutine function, e.g. a method of AsyncEventsScraper.
+    """
+    scraper = AsyncEventsScraper()
+    if event_id != "" or market_name != "":
+        scrape_func = scraper.fetch_event_by_X
+    if scrape_func is None:
+        scrape_func = scraper.fetch_top_active_markets
+    params = {
+        "event_id": event_id,
+        "market_id": market_id,
+        "market_name": market_name,
+        "event_name": market_name,
+    }
+    read_columns = _read_columns(columns, use_for_dtr, end_date_filter, sort_by)
+    df = await get_data_async(
+        EventsDB,
+        db_path,
+        read_method="_read_market_data",
+        read_params={
+            **params,
+            "include_description": include_description,
+            "columns": read_columns,
+        },
+        fetch_func=scrape_func,
+        fetch_params=params,
+        insert_methods=["_insert_event_data", "_insert_markets_data"],
+        force_update=force_update,
+    )
+    return _finalise_markets(df, sort_by, end_date_filter, use_for_dtr, dtr, columns)
@@ -0,0 +1,319 @@
+import time
+import logging
+
+import numpy as np
+import polars as pl
+
+from .local import EventsDB
+
+logger = logging.getLogger(__name__)
+
+_SECONDS_PER_DAY = 86_400.0
+
+
+class MarketRecord:
+    """Routing metadata for one market, built from the catalogue's columns on access."""
+
+    __slots__ = (
+        "event_id",
+        "market_id",
+        "condition_id",
+        "outcomes",
+        "clob_token_ids",
+        "volume",
+        "end_ts",
+    )
+
+    def __init__(
+        self,
+        event_id: str,
+        market_id: str,
+        condition_id: str,
+        outcomes: tuple,
+        clob_token_ids: tuple,
+        volume: float,
+        end_ts: float,
+    ):
+        self.event_id = event_id
+        self.market_id = market_id
+        self.condition_id = condition_id
+        self.outcomes = outcomes
+        self.clob_token_ids = clob_token_ids
+        self.volume = volume
+        self.end_ts = end_ts
+
+    @property
+    def dtr(self) -> float:
+        """Days to resolution from now, None if the end date is unknown."""
+        if self.end_ts is None:
+            return None
+        return (self.end_ts - time.time()) / _SECONDS_PER_DAY
+
+    def __repr__(self):
+        return f"MarketRecord(market_id={self.market_id!r}, event_id={self.event_id!r})"
+
+
+class MarketCatalogue:
+    """
+    In-memory catalogue of every market in the 'markets' table.
+
+    Fields are kept column-wise, one row per market: ids as fixed-width byte
+    strings in NumPy arrays, event ids and outcome lists as codes into tables of
+    their distinct values, and token ids in one flat array with an offset per row.
+    The indexes by market_id, condition_id and clob_token_id are sorted arrays of
+    id hashes with the row of each, so no id is held as a Python object; a lookup
+    checks the id stored in the row. Records are built on access.
+
+    'refresh' only re-reads rows inserted since the last load or whose 'updated'
+    timestamp is newer than any already loaded, so keeping the catalogue current is cheap.
+    """
+
+    _COLUMNS = (
+        "event_id",
+        "market_id",
+        "condition_id",
+        "outcomes",
+        "clob_token_ids",
+        "volume",
+        "contract_end",
+    )
+
+    def __init__(self, db_path: str, load: bool = True):
+        self.db_path = db_path
+        self.last_rowid = 0
+        self.last_updated = 0
+        self._market_id = np.empty(0, "S1")
+        self._condition_id = np.empty(0, "S1")
+        self._event = np.empty(0, np.int32)
+        self._outcome = np.empty(0, np.int32)
+        self._volume = np.empty(0, np.float64)
+        self._end_ts = np.empty(0, np.float64)
+        self._token_start = np.empty(0, np.int64)
+        self._token_count = np.empty(0, np.int32)
+        self._tokens = np.empty(0, "S1")
+        # Distinct event ids and outcome lists, most markets share a handful of the latter.
+        self._events, self._event_codes = [], {}
+        self._outcome_lists, self._outcome_codes = [], {}
+        self._by_market_id = _HashIndex()
+        self._by_condition_id = _HashIndex()
+        self._by_token_id = _HashIndex()
+        if load:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._volume)
+
+    def __contains__(self, market_id: str) -> bool:
+        return self._market_row(market_id) is not None
+
+    def __iter__(self):
+        return (self._record(row) for row in range(len(self)))
+
+    def get(self, market_id: str) -> MarketRecord:
+        return self._record(self._market_row(market_id))
+
+    def by_condition(self, condition_id: str) -> MarketRecord:
+        return self._record(self._by_condition_id.find(condition_id, self._is_condition))
+
+    def by_token(self, clob_token_id: str) -> MarketRecord:
+        return self._record(self._by_token_id.find(clob_token_id, self._has_token))
+
+    def event_id(self, market_id: str) -> str:
+        row = self._market_row(market_id)
+        return None if row is None else self._events[self._event[row]]
+
+    def refresh(self) -> int:
+        """
+        Load rows added or updated since the last refresh.
+
+        Returns
+        -------
+        int
+            Number of records loaded.
+        """
+        db = EventsDB(self.db_path, log=False)
+        try:
+            query = f"""SELECT rowid AS row_number, updated, {', '.join(self._COLUMNS)}
+                        FROM {db.MARKET_TABLE}
+                        WHERE rowid > ? OR updated > ?
+                    """
+            df = db._read_data(query, (self.last_rowid, self.last_updated))
+        finally:
+            db.close()
+
+        loaded = len(df)
+        if loaded:
+            # A market listed twice (under two events) keeps its last row.
+            self._load(
+                df.drop("row_number", "updated").unique(
+                    "market_id", keep="last", maintain_order=True
+                )
+            )
+            self.last_rowid = max(self.last_rowid, df["row_number"].max())
+            newest = df["updated"].max()
+            if newest and newest > self.last_updated:
+                self.last_updated = newest
+        logger.debug("Catalogue loaded %d markets (%d total)", loaded, len(self))
+        return loaded
+
+    def _market_row(self, market_id: str) -> int:
+        return self._by_market_id.find(market_id, self._is_market)
+
+    def _is_market(self, row: int, market_id: str) -> bool:
+        return self._market_id[row].decode() == market_id
+
+    def _is_condition(self, row: int, condition_id: str) -> bool:
+        return self._condition_id[row].decode() == condition_id
+
+    def _has_token(self, row: int, clob_token_id: str) -> bool:
+        start = int(self._token_start[row])
+        tokens = self._tokens[start : start + int(self._token_count[row])].tolist()
+        return clob_token_id.encode() in tokens
+
+    def _record(self, row: int) -> MarketRecord:
+        if row is None:
+            return None
+        start = int(self._token_start[row])
+        tokens = self._tokens[start : start + int(self._token_count[row])].tolist()
+        end_ts = float(self._end_ts[row])
+        return MarketRecord(
+            self._events[self._event[row]],
+            self._market_id[row].decode(),
+            self._condition_id[row].decode() or None,
+            self._outcome_lists[self._outcome[row]],
+            tuple(map(bytes.decode, tokens)),
+            float(self._volume[row]),
+            None if end_ts != end_ts else end_ts,
+        )
+
+    def _load(self, df: pl.DataFrame) -> None:
+        size = len(self)
+        rows, added, updated = [], [], []
+        for market_id in df["market_id"].to_list():
+            row = self._market_row(market_id)
+            if row is None:
+                row = size + len(added)
+                added.append(market_id)
+            else:
+                updated.append(row)
+            rows.append(row)
+
+        conditions = [
+            None if c in (None, "", "unk") else c for c in df["condition_id"].to_list()
+        ]
+        tokens = [
+            [t for t in _parse_list(value) if t != "unk"]
+            for value in df["clob_token_ids"].to_list()
+        ]
+        flat = [token.encode() for market in tokens for token in market]
+        counts = np.fromiter((len(market) for market in tokens), np.int32, len(tokens))
+        starts = len(self._tokens) + np.cumsum(counts, dtype=np.int64) - counts
+        condition_bytes = [b"" if c is None else c.encode() for c in conditions]
+
+        grow = len(added)
+        self._market_id = _extend(self._market_id, [m.encode() for m in added], grow)
+        self._condition_id = _extend(self._condition_id, condition_bytes, grow)
+        self._event = _extend(self._event, (), grow)
+        self._outcome = _extend(self._outcome, (), grow)
+        self._volume = _extend(self._volume, (), grow)
+        self._end_ts = _extend(self._end_ts, (), grow)
+        self._token_start = _extend(self._token_start, (), grow)
+        self._token_count = _extend(self._token_count, (), grow)
+        # Tokens of updated markets are appended, their old ones are left unused.
+        self._tokens = np.concatenate([self._tokens, np.array(flat, "S")])
+
+        positions = np.array(rows, np.int64)
+        self._market_id[size:] = [m.encode() for m in added]
+        self._condition_id[positions] = condition_bytes
+        self._event[positions] = [
+            _code(self._events, self._event_codes, e, e) for e in df["event_id"].to_list()
+        ]
+        self._outcome[positions] = [
+            _code(self._outcome_lists, self._outcome_codes, o, tuple(_parse_list(o)))
+            for o in df["outcomes"].to_list()
+        ]
+        self._volume[positions] = df["volume"].cast(pl.Float64, strict=False).fill_null(0.0)
+        self._end_ts[positions] = (
+            df["contract_end"].cast(pl.Float64, strict=False).fill_null(np.nan).to_numpy()
+        )
+        self._token_start[positions] = starts
+        self._token_count[positions] = counts
+
+        self._by_market_id.replace([], added, range(size, size + grow))
+        self._by_condition_id.replace(
+            updated,
+            [c for c in conditions if c is not None],
+            [row for row, c in zip(rows, conditions) if c is not None],
+        )
+        self._by_token_id.replace(
+            updated,
+            [token for market in tokens for token in market],
+            np.repeat(positions, counts),
+        )
+
+
+class _HashIndex:
+    """
+    Sorted hashes of ids with the catalogue row of each. Ids whose hashes are
+    equal are all kept, 'find' checks the id stored in the row.
+    """
+
+    __slots__ = ("hashes", "rows")
+
+    def __init__(self):
+        self.hashes = np.empty(0, np.int64)
+        self.rows = np.empty(0, np.int32)
+
+    def find(self, key: str, matches) -> int:
+        """Row of 'key', 'matches(row, key)' tells whether the row holds it."""
+        h = hash(key)
+        i = int(self.hashes.searchsorted(h))
+        while i < len(self.hashes) and self.hashes[i] == h:
+            row = int(self.rows[i])
+            if matches(row, key):
+                return row
+            i += 1
+        return None
+
+    def replace(self, rows: list, keys: list, key_rows) -> None:
+        """Drop the entries of 'rows', then add 'keys' pointing at 'key_rows'."""
+        if len(rows):
+            keep = ~np.isin(self.rows, rows)
+            self.hashes, self.rows = self.hashes[keep], self.rows[keep]
+        if not keys:
+            return
+        hashes = np.fromiter(map(hash, keys), np.int64, len(keys))
+        order = np.argsort(hashes, kind="stable")
+        hashes = hashes[order]
+        at = self.hashes.searchsorted(hashes, side="right")
+        self.hashes = np.insert(self.hashes, at, hashes)
+        self.rows = np.insert(self.rows, at, np.asarray(key_rows, np.int32)[order])
+
+
+def _extend(column: np.ndarray, values, grow: int) -> np.ndarray:
+    """'column' with 'grow' empty rows added, widened to fit the byte strings in 'values'."""
+    width = max((len(v) for v in values), default=0)
+    if column.dtype.kind == "S" and width > column.dtype.itemsize:
+        column = column.astype(f"S{width}")
+    fill = np.nan if column.dtype.kind == "f" else 0
+    return np.concatenate([column, np.full(grow, fill, column.dtype)])
+
+
+def _code(values: list, codes: dict, key, value) -> int:
+    """Position of 'key' in 'values', appending 'value' for a new key."""
+    code = codes.get(key)
+    if code is None:
+        code = codes[key] = len(values)
+        values.append(value)
+    return code
+
+
+def _parse_list(value: str) -> list:
+    """Same parsing as 'safe_parse_embedded_lists', for a single value."""
+    if not value:
+        return []
+    value = value.replace("\\", "").strip('"').strip("[]")
+    if not value:
+        return []
+    return [s.strip('"') for s in value.split(", ")]
+
@@ -3,6 +3,7 @@ import pickle
 import polars as pl
 from .local import EventsDB
 from .interface import get_events_data, get_markets_data, get_X_where_Y
+from ..utils.dates import format_epoch
 
 try:
     from ..prices.interface import get_price_data
@@ -23,9 +24,9 @@ class Contract:
         self.db = EventsDB(db_path)
 
     def __str__(self):
-        data = self.get_event_data()
-        event_end = data["event_end"][0]
-        end = data["contract_end"][0]
+        data = self.get_event_data(include_description=True)
+        event_end = format_epoch(data["event_end"][0])
+        end = format_epoch(data["contract_end"][0])
         desc = data["description"][0]
         return f"""
         ID: {self.event_id}
@@ -38,21 +39,23 @@ class Contract:
         """
 
     def get_market_ids(self, id_col: str = "market_id") -> list:
-        data = get_markets_data(self.db_path, event_id=self.event_id)
+        data = get_markets_data(self.db_path, event_id=self.event_id, columns=[id_col])
         return data[id_col]
 
-    def get_event_data(self, force_update: bool = False):
+    def get_event_data(self, force_update: bool = False, include_description: bool = False):
         if self.event_id == "":
             params = {
                 "db_path": self.db_path,
                 "event_name": self.event_name,
                 "force_update": force_update,
+                "include_description": include_description,
             }
         else:
             params = {
                 "db_path": self.db_path,
                 "event_id": self.event_id,
                 "force_update": force_update,
+                "include_description": include_description,
             }
         data = get_events_data(**params)
         return data
@@ -77,6 +80,7 @@ class Contract:
             event_id=self.event_id,
             market_id=market_id,
             force_update=force_update,
+            columns=["event_id", "market_id", "clob_token_ids"],
         )
         if market_id != "":
             data = data.filter(pl.col("market_id") == market_id)
@@ -87,7 +91,11 @@ class Contract:
             return data["clob_token_ids"]
 
     def get_outcomes(self, market_id: str = "", verbose: bool = False) -> list:
-        data = get_markets_data(self.db_path, market_id=market_id)
+        data = get_markets_data(
+            self.db_path,
+            market_id=market_id,
+            columns=["event_id", "market_id", "outcomes"],
+        )
         if market_id != "":
             data = data.filter(pl.col("market_id") == market_id)
         if verbose:
@@ -1,14 +1,23 @@
 import ast
 import json
+import logging
 import datetime as dt
 import polars as pl
 import pickle
 import numpy as np
 from typing import Literal
 
-from .local import EventsDB
+from .local import EventsDB, description_columns, fill_descriptions, inflate
 from .web import EventsScraper
+from ..database import is_blank
 from ..helper import get_data
+from ..metrics import PARSE_SECONDS
+from ..snapshot import read_snapshot, scan_table
+from ..utils.dates import to_epoch, to_epoch_columns
+
+logger = logging.getLogger(__name__)
+
+_SECONDS_PER_DAY = 86_400
 
 
 def get_events_data(
@@ -22,6 +31,10 @@ def get_events_data(
     use_for_dtr: Literal["event_end", "contract_end"] = "contract_end",
     force_update: bool = False,
     dtr: int = 10_000,
+    snapshot: str = "",
+    snapshot_format: Literal["parquet", "ipc"] = "parquet",
+    include_description: bool = False,
+    columns: list = None,
 ):
     """
     Get market data.
@@ -51,11 +64,38 @@ def get_events_data(
     dtr: int
         Determines to include contracts with a dtr value lower than the parameter value.
         Example, if dtr = 3, contracts with 3 days or less to resolution will be returned.
+    snapshot: str
+        Directory written by 'snapshot.export_snapshot'. If given, data is read lazily
+        from the snapshot instead of SQLite and nothing is scraped.
+    snapshot_format: str
+        Snapshot format to read, "parquet" or "ipc".
+    include_description: bool
+        Decompress and return the 'description' column, by default False.
+    columns: list
+        Only read and return these columns (plus 'dtr'), by default None (all).
     Returns
     -------
     pl.DataFrame
         Dataframe containing event data.
     """
+    read_columns = _read_columns(columns, use_for_dtr, end_date_filter, "active", sort_by)
+    if snapshot != "":
+        read_columns, include_description = description_columns(
+            read_columns, include_description
+        )
+        data = read_snapshot(
+            snapshot,
+            "events",
+            snapshot_format,
+            read_columns,
+            event_id=event_id,
+            event_name=event_name,
+        )
+        data = _snapshot_descriptions(snapshot, snapshot_format, data, include_description)
+        return _finalise_events(
+            data, active, sort_by, end_date_filter, use_for_dtr, dtr, columns
+        )
+
     db = EventsDB(db_path)
     scraper = EventsScraper()
 
@@ -68,22 +108,20 @@ def get_events_data(
 
     data = get_data(
         read_func=db._read_event_data,
-        read_params=params,
+        read_params={
+            **params,
+            "include_description": include_description,
+            "columns": read_columns,
+        },
         fetch_func=scrape_func,
         fetch_params=params,
         insert_func=[db._insert_event_data, db._insert_markets_data],
         force_update=force_update,
     )
 
-    data = calc_dtr(data, use_for_dtr)
-
-    data = data.filter(
-        (pl.col("dtr") >= 0)
-        & (pl.col("dtr") <= dtr)
-        & (pl.col(end_date_filter) != "unk")
-        & (pl.col("active") == active)
-    ).sort(by=sort_by)
-    return data
+    return _finalise_events(
+        data, active, sort_by, end_date_filter, use_for_dtr, dtr, columns
+    )
 
 
 def get_markets_data(
@@ -97,6 +135,10 @@ def get_markets_data(
     use_for_dtr: Literal["event_end", "contract_end"] = "contract_end",
     force_update: bool = False,
     dtr: int = 10_000,
+    snapshot: str = "",
+    snapshot_format: Literal["parquet", "ipc"] = "parquet",
+    include_description: bool = False,
+    columns: list = None,
 ) -> pl.DataFrame:
     """
     Get market data.
@@ -126,11 +168,37 @@ def get_markets_data(
     dtr: int
         Determines to include contracts with a dtr value lower than the parameter value.
         Example, if dtr = 3, contracts with 3 days or less to resolution will be returned.
+    snapshot: str
+        Directory written by 'snapshot.export_snapshot'. If given, data is read lazily
+        from the snapshot instead of SQLite and nothing is scraped.
+    snapshot_format: str
+        Snapshot format to read, "parquet" or "ipc".
+    include_description: bool
+        Decompress and return the 'description' column, by default False.
+    columns: list
+        Only read and return these columns (plus 'dtr'), by default None (all).
     Returns
     -------
     pl.DataFrame
         Dataframe containing market data.
     """
+    read_columns = _read_columns(columns, use_for_dtr, end_date_filter, sort_by)
+    if snapshot != "":
+        read_columns, include_description = description_columns(
+            read_columns, include_description
+        )
+        df = read_snapshot(
+            snapshot,
+            "markets",
+            snapshot_format,
+            read_columns,
+            event_id=event_id,
+            market_id=market_id,
+            market_name=market_name,
+        )
+        df = _snapshot_descriptions(snapshot, snapshot_format, df, include_description)
+        return _finalise_markets(df, sort_by, end_date_filter, use_for_dtr, dtr, columns)
+
     db = EventsDB(db_path)
     scraper = EventsScraper()
     if event_id != "" or market_name != "":
@@ -145,20 +213,87 @@ def get_markets_data(
     }
     df = get_data(
         read_func=db._read_market_data,
-        read_params=params,
+        read_params={
+            **params,
+            "include_description": include_description,
+            "columns": read_columns,
+        },
         fetch_func=scrape_func,
         fetch_params=params,
         insert_func=[db._insert_event_data, db._insert_markets_data],
         force_update=force_update,
     )
+    return _finalise_markets(df, sort_by, end_date_filter, use_for_dtr, dtr, columns)
+
+
+def _snapshot_descriptions(
+    snapshot: str, snapshot_format: str, df: pl.DataFrame, include_description: bool
+) -> pl.DataFrame:
+    # Same as 'EventsDB._attach_descriptions', reading bodies from the snapshot.
+    if not include_description:
+        return df.drop("description", "description_id", strict=False)
+    if "description_id" not in df.columns:
+        return df
+    ids = df["description_id"].drop_nulls().unique()
+    bodies = (
+        scan_table(snapshot, "descriptions", snapshot_format)
+        .filter(pl.col("id").is_in(ids.implode()))
+        .collect()
+    )
+    return fill_descriptions(df, dict(zip(bodies["id"], map(inflate, bodies["body"]))))
+
+
+def _read_columns(columns: list, *required) -> list:
+    """Columns to read for 'columns', plus the ones filtering and sorting need."""
+    if not columns:
+        return None
+    return [c for c in dict.fromkeys([*columns, *required]) if c != "dtr"]
+
+
+def _output_columns(df: pl.DataFrame, columns: list) -> pl.DataFrame:
+    if not columns:
+        return df
+    return df.select(list(dict.fromkeys([*columns, "dtr"])))
+
+
+def _finalise_events(
+    data: pl.DataFrame,
+    active: bool,
+    sort_by: str,
+    end_date_filter: str,
+    use_for_dtr: str,
+    dtr: int,
+    columns: list = None,
+) -> pl.DataFrame:
+    data = calc_dtr(data, use_for_dtr)
+
+    data = data.filter(
+        (pl.col("dtr") >= 0)
+        & (pl.col("dtr") <= dtr)
+        & pl.col(end_date_filter).is_not_null()
+        & (pl.col("active") == active)
+    ).sort(by=sort_by)
+    return _output_columns(data, columns)
+
+
+def _finalise_markets(
+    df: pl.DataFrame,
+    sort_by: str,
+    end_date_filter: str,
+    use_for_dtr: str,
+    dtr: int,
+    columns: list = None,
+) -> pl.DataFrame:
     df = calc_dtr(df, use_for_dtr)
     df = df.filter(
         (pl.col("dtr") >= 0)
         & (pl.col("dtr") <= dtr)
-        & (pl.col(end_date_filter) != "unk")
+        & pl.col(end_date_filter).is_not_null()
     ).sort(by=sort_by)
-    df = safe_parse_embedded_lists(df, "outcomes")
-    df = safe_parse_embedded_lists(df, "clob_token_ids")
+    df = _output_columns(df, columns)
+    for column in ("outcomes", "clob_token_ids"):
+        if column in df.columns:
+            df = safe_parse_embedded_lists(df, column)
     return df
 
 
@@ -189,13 +324,161 @@ def get_X_where_Y(db_path: str, x_col: str, y_col: str, y_match_value, table_nam
     """
     db = EventsDB(db_path)
     query = f"SELECT {x_col} FROM {table_name} WHERE {y_col} = '{y_match_value}'"
-    with db.conn:
-        cursor = db.conn.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
+    with db._transaction():
+        data = db.conn.execute(query).fetchall()
         return data
 
 
+def search_events(
+    db_path: str,
+    query: str,
+    limit: int = 50,
+    raw: bool = False,
+    include_description: bool = False,
+):
+    """
+    Full-text search over event names (slugs), titles and descriptions.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to database.
+    query : str
+        Keywords to search for. Every keyword must match.
+    limit : int, optional
+        Maximum number of results, by default 50.
+    raw : bool, optional
+        If True, 'query' is passed to FTS5 as-is so operators such as OR,
+        NEAR and prefix* can be used, by default False.
+    include_description : bool, optional
+        Decompress and return the 'description' column, by default False.
+    Returns
+    -------
+    pl.DataFrame
+        Matching events ordered by relevance, best match first.
+    """
+    db = EventsDB(db_path)
+    if not db.search_enabled:
+        raise RuntimeError("SQLite was built without FTS5, search is unavailable.")
+    if not raw:
+        query = _quote_search_terms(query)
+    if query == "":
+        return pl.DataFrame()
+    return db._search_events(query, limit, include_description)
+
+
+def search_markets(
+    db_path: str,
+    query: str,
+    limit: int = 50,
+    raw: bool = False,
+    include_description: bool = False,
+):
+    """
+    Full-text search over market names (slugs), titles and descriptions.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to database.
+    query : str
+        Keywords to search for. Every keyword must match.
+    limit : int, optional
+        Maximum number of results, by default 50.
+    raw : bool, optional
+        If True, 'query' is passed to FTS5 as-is so operators such as OR,
+        NEAR and prefix* can be used, by default False.
+    include_description : bool, optional
+        Decompress and return the 'description' column, by default False.
+    Returns
+    -------
+    pl.DataFrame
+        Matching markets ordered by relevance, best match first.
+    """
+    db = EventsDB(db_path)
+    if not db.search_enabled:
+        raise RuntimeError("SQLite was built without FTS5, search is unavailable.")
+    if not raw:
+        query = _quote_search_terms(query)
+    if query == "":
+        return pl.DataFrame()
+    df = db._search_markets(query, limit, include_description)
+    df = safe_parse_embedded_lists(df, "outcomes")
+    df = safe_parse_embedded_lists(df, "clob_token_ids")
+    return df
+
+
+def _quote_search_terms(query: str) -> str:
+    # Quote each keyword so punctuation in user input is not read as FTS5 syntax.
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+def get_volume_history(
+    db_path: str,
+    event_id: str | list = "",
+    market_id: str | list = "",
+    start: int | str = None,
+    end: int | str = None,
+    every: int = None,
+) -> pl.DataFrame:
+    """
+    Volume and status over time of many events, or markets, at once.
+
+    Every sync appends an observation when an event's volume, active or closed
+    flag changed, or a market's volume; nothing is scraped here.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to database.
+    event_id : str | list, optional
+        Event ID(s), by default "", if blank (and no 'market_id') every event.
+    market_id : str | list, optional
+        Market ID(s), if given market series are returned instead of event series.
+    start : int | str, optional
+        First time (epoch seconds or "YYYY-MM-DD HH:MM:SS"), by default the first
+        observation. Each series starts with its values at 'start'.
+    end : int | str, optional
+        Last time, by default the last observation.
+    every : int, optional
+        Resample to one row every 'every' seconds per entity, carrying the last
+        observation forward, by default None (one row per change).
+    Returns
+    -------
+    pl.DataFrame
+        entity_id, ts, volume, active, closed; sorted by entity_id and ts. Markets
+        have no status, their 'active' and 'closed' are null.
+    """
+    if is_blank(market_id):
+        entity, entity_id = "event", event_id
+    else:
+        entity, entity_id = "market", market_id
+    with EventsDB(db_path, log=False) as db:
+        df = db._read_history(entity, entity_id, start, end).drop("entity")
+    if every is None or df.is_empty():
+        return df
+    with PARSE_SECONDS.time(stage="history"):
+        return _resample_history(df, every, to_epoch(start), to_epoch(end))
+
+
+def _resample_history(df: pl.DataFrame, every: int, start: int, end: int) -> pl.DataFrame:
+    start = df["ts"].min() if start is None else start
+    end = df["ts"].max() if end is None else end
+    grid = (
+        df.select("entity_id")
+        .unique(maintain_order=True)
+        .join(pl.DataFrame({"ts": pl.int_range(start, end + 1, every, eager=True)}), how="cross")
+        .sort("ts")
+    )
+    return (
+        grid.join_asof(
+            df.sort("ts"), on="ts", by="entity_id", strategy="backward", check_sortedness=False
+        )
+        .sort("entity_id", "ts")
+    )
+
+
 #####################################
 # Update Status
 #####################################
@@ -209,46 +492,22 @@ def update_expired_markets(db_path: str):
         Path to the database.
     """
     db = EventsDB(db_path)
-    cursor = db.conn.cursor()
-
-    # 1. Fetch only markets that are currently marked as active
-    cursor.execute(f"SELECT id, end_date FROM {db.TABLE} WHERE active = 1")
-    active_markets = cursor.fetchall()
-    expired_ids = []
-    now = dt.datetime.now(dt.timezone.utc)
-    # 2. Iterate and check dates
-    for market_id, end_date_str in active_markets:
-        if not end_date_str:
-            continue  # Skip if empty
-        try:
-            # Parse the stored date safely
-            market_end_date = dt.datetime.fromisoformat(
-                end_date_str.replace("Z", "+00:00")
-            )
-            # 3. Compare with current time
-            if now > market_end_date:
-                expired_ids.append(market_id)
-                print(f"Marking market {market_id} as closed (Expired: {end_date_str})")
-        except ValueError as e:
-            print(f"Error parsing date for {market_id}: {e}")
-    # 4. Batch Update
-    if expired_ids:
-        # Create a placeholder string like (?, ?, ?)
-        placeholders = ", ".join(["?"] * len(expired_ids))
-
-        query = f"""
-            UPDATE {db.TABLE} 
-            SET active = 0, closed = 1 
-            WHERE id IN ({placeholders})
-        """
-
-        cursor.execute(query, expired_ids)
-        db.conn.commit()
-        print(f"Updated {len(expired_ids)} markets.")
+
+    # Unknown end dates are NULL and never compare as passed.
+    now = int(dt.datetime.now(dt.timezone.utc).timestamp())
+    query = f"""
+        UPDATE {db.TABLE}
+        SET active = 0, closed = 1
+        WHERE active = 1 AND contract_end < ?
+    """
+    db.flush()
+    updated = db.backend.write(db.conn, query, (now,))
+    if updated:
+        logger.info("Updated %d markets.", updated)
     else:
-        print("No markets needed updating.")
+        logger.info("No markets needed updating.")
 
-    db.conn.close()
+    db.close()
 
 
 def update_research_status(db_path: str, event_id: str, research_value: bool):
@@ -302,40 +561,46 @@ def update_closed_status(db_path: str, event_id: str, closed_value: bool):
 
 def _update_status(db_path: str, query: str, params: tuple, table_name: str):
     db = EventsDB(db_path)
-    with db.conn:
-        cursor = db.conn.cursor()
-        cursor.execute(
+    with db._transaction():
+        db.conn.execute(
             query.format(table_name),
             params,
         )
 
 
 def calc_dtr(df: pl.DataFrame, date_col: str):
+    with PARSE_SECONDS.time(stage="calc_dtr"):
+        return _calc_dtr(df, date_col)
+
+
+def _calc_dtr(df: pl.DataFrame, date_col: str):
+    # Dates are epoch seconds; frames from older snapshots may still hold strings.
+    df = to_epoch_columns(df, [date_col])
     # Drop rows with unknown end_date
-    # Parse the date string into a datetime object.
-    df = df.filter((pl.col(date_col) != "unk")).with_columns(
-        parsed_end_date=pl.col(date_col).str.to_datetime(time_zone="UTC")
-    )
+    df = df.filter(pl.col(date_col).is_not_null())
     # Calculate the 'days-to-resolve'(dtr) for the contract.
     # Days to resolve refers to when the contract ends and resolved the outcome.
+    now = dt.datetime.now(dt.timezone.utc).timestamp()
     df = df.with_columns(
-        dtr=(
-            pl.col("parsed_end_date") - dt.datetime.now(dt.timezone.utc)
-        ).dt.total_days()
-    ).drop("parsed_end_date")
+        dtr=((pl.col(date_col) - now) / _SECONDS_PER_DAY).cast(pl.Int64)
+    )
     return df
 
 
 def safe_parse_embedded_lists(df: pl.DataFrame, column: str) -> pl.DataFrame:
+    with PARSE_SECONDS.time(stage="embedded_lists"):
+        return _parse_embedded_lists(df, column)
+
+
+def _parse_embedded_lists(df: pl.DataFrame, column: str) -> pl.DataFrame:
     df = df.with_columns(
         pl.col(column)
+        .cast(pl.String)  # Empty reads come back untyped
         .str.replace_all(r"\\", "")  # Remove backslashes
         .str.strip_chars('"')  # Remove outer quotes first
         .str.strip_chars("[]")  # Then remove brackets
         .str.split(", ")  # Split by comma-space
-        .map_elements(
-            lambda x: [s.strip('"') for s in x], return_dtype=pl.List(pl.String)
-        )
+        .list.eval(pl.element().str.strip_chars('"'))
         .alias(column)  # Strip quotes from each element
     )
     return df
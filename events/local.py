@@ -1,37 +1,59 @@
+import zlib
+import time
+import hashlib
 import polars as pl
 from ..database import Database
+from ..utils.dates import to_epoch, to_epoch_columns
 
 from sqlite3 import OperationalError
 
 
 class EventsDB(Database):
-    def __init__(self, db_path: str, log: bool = True):
+    def __init__(self, db_path: str, log: bool = True, read_only: bool = None):
         self.TABLE = "events"
         self.MARKET_TABLE = "markets"
-        super().__init__(db_path, log)
+        self.SEARCH_TABLE = "events_fts"
+        self.MARKET_SEARCH_TABLE = "markets_fts"
+        self.DESCRIPTION_TABLE = "descriptions"
+        self.HISTORY_TABLE = "history"
+        super().__init__(db_path, log, read_only=read_only)
+        if self.read_only:
+            self.search_enabled = self.backend.supports_fts and self.SEARCH_TABLE in (
+                self.backend.tables(self.conn)
+            )
+            return
+        fresh = self.TABLE not in self.backend.tables(self.conn)
         self._create_events_table()
         self._create_markets_table()
+        self._create_descriptions_table()
+        self._create_search_tables()
+        self._create_history_table()
+        self._migrate("events", [self._migrate_native_types], fresh)
 
-    def _create_events_table(self):
-        query = f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+    def _create_events_table(self, table: str = None):
+        # Dates are epoch seconds (UTC), NULL when unknown.
+        query = f"""CREATE TABLE IF NOT EXISTS {table or self.TABLE} (
                     id TEXT NOT NULL,
                     name TEXT,
                     title TEXT,
                     description TEXT,
                     volume REAL,
-                    created TEXT,
-                    updated TEXT,
-                    event_end TEXT,
-                    contract_end TEXT,
+                    created BIGINT,
+                    updated BIGINT,
+                    event_end BIGINT,
+                    contract_end BIGINT,
                     active BOOLEAN,
                     closed BOOLEAN,
                     researched BOOLEAN,
+                    description_id TEXT,
                     PRIMARY KEY (id));
                     """
-        self._init_schema(query, "")
+        index = f"""CREATE INDEX IF NOT EXISTS idx_events_active_end
+                    ON {self.TABLE} (active, contract_end);"""
+        self._init_schema(query, "" if table else index)
 
-    def _create_markets_table(self):
-        query = f"""CREATE TABLE IF NOT EXISTS {self.MARKET_TABLE} (
+    def _create_markets_table(self, table: str = None):
+        query = f"""CREATE TABLE IF NOT EXISTS {table or self.MARKET_TABLE} (
                     event_id TEXT NOT NULL,
                     market_id TEXT NOT NULL,
                     name TEXT,
@@ -41,32 +63,401 @@ class EventsDB(Database):
                     outcomes TEXT,
                     volume REAL,
                     clob_token_ids TEXT,
-                    created TEXT,
-                    updated TEXT,
-                    event_end TEXT,
-                    contract_end TEXT,
+                    created BIGINT,
+                    updated BIGINT,
+                    event_end BIGINT,
+                    contract_end BIGINT,
+                    description_id TEXT,
                     PRIMARY KEY (event_id, market_id));
                     """
+        index = f"""CREATE INDEX IF NOT EXISTS idx_markets_contract_end
+                    ON {self.MARKET_TABLE} (contract_end);"""
+        self._init_schema(query, "" if table else index)
+
+    def _migrate_native_types(self):
+        """Version 1: TEXT dates ('unk', ISO, '%Y-%m-%d %H:%M:%S') become epoch seconds."""
+        self._rebuild_table(self.TABLE, self._create_events_table, native_dates)
+        self._rebuild_table(self.MARKET_TABLE, self._create_markets_table, native_dates)
+        # The indexes went with the old tables.
+        self._create_events_table()
+        self._create_markets_table()
+
+    def _create_descriptions_table(self):
+        """
+        Descriptions are stored once per distinct text, zlib compressed and keyed by
+        a hash of the text. The base tables only hold the key in 'description_id'.
+
+        Tables created before this keep their text in 'description' until it is
+        moved over here the first time they are opened.
+        """
+        query = f"""CREATE TABLE IF NOT EXISTS {self.DESCRIPTION_TABLE} (
+                    id TEXT NOT NULL,
+                    body BLOB,
+                    PRIMARY KEY (id));
+                    """
         self._init_schema(query, "")
+        for table in (self.TABLE, self.MARKET_TABLE):
+            if "description_id" in self._table_columns(table):
+                continue
+            self.flush()
+            # Under the write lock, so processes opening the database at the same
+            # time move the descriptions once.
+            with self.backend.exclusive(self.conn):
+                # Another process may have finished while we waited for the lock.
+                if "description_id" not in self._table_columns(table):
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN description_id TEXT")
+                    self._compress_descriptions(table)
+
+    def _compress_descriptions(self, table: str):
+        """Move plain text descriptions of 'table' into the descriptions table."""
+        df = self._read_data(
+            f"SELECT rowid AS row_number, description FROM {table} WHERE description IS NOT NULL"
+        )
+        if df.is_empty():
+            return
+        ids = self._store_descriptions(df["description"])
+        with self._transaction():
+            self.conn.executemany(
+                f"UPDATE {table} SET description_id = ?, description = NULL WHERE rowid = ?",
+                list(zip(ids.to_list(), df["row_number"].to_list())),
+            )
+
+    def _store_descriptions(self, descriptions: pl.Series) -> pl.Series:
+        """Insert the distinct texts of 'descriptions', returns their ids."""
+        keys = {
+            text: description_id(text)
+            for text in descriptions.unique().to_list()
+            if text is not None
+        }
+        bodies = pl.DataFrame(
+            {
+                "id": list(keys.values()),
+                "body": [zlib.compress(text.encode(), 9) for text in keys],
+            },
+            schema={"id": pl.String, "body": pl.Binary},
+        )
+        query = f"""INSERT OR IGNORE INTO {self.DESCRIPTION_TABLE} (id, body)
+                    VALUES (?, ?);
+                """
+        self._insert_data(bodies, query)
+        return descriptions.replace_strict(keys, default=None, return_dtype=pl.String)
+
+    def _attach_descriptions(self, df: pl.DataFrame, include_description: bool):
+        """
+        Fill in 'description' when asked for, otherwise drop it.
+
+        Only the bodies of the rows in 'df' are read and decompressed.
+        """
+        if not include_description:
+            return df.drop("description", "description_id", strict=False)
+        if "description_id" not in df.columns:
+            return df
+        ids = df["description_id"].drop_nulls().unique().to_list()
+        condition, params = self.backend.in_list("id", ids)
+        bodies = self._read_data(
+            f"SELECT id, body FROM {self.DESCRIPTION_TABLE} WHERE {condition}", params
+        )
+        return fill_descriptions(df, dict(zip(bodies["id"], map(inflate, bodies["body"]))))
+
+    def _create_history_table(self):
+        """
+        Volume and status observations of events and markets, delta encoded.
+
+        A row is only appended when an entity's volume, active or closed flag differ
+        from its previous row, so a series holds its changes and the value at any
+        time is that of the last row before it. Markets have no status, only volume.
+        """
+        query = f"""CREATE TABLE IF NOT EXISTS {self.HISTORY_TABLE} (
+                    entity TEXT NOT NULL,
+                    entity_id TEXT NOT NULL,
+                    ts BIGINT NOT NULL,
+                    volume REAL,
+                    active BOOLEAN,
+                    closed BOOLEAN,
+                    PRIMARY KEY (entity, entity_id, ts));
+                    """
+        self._init_schema(query, "")
+
+    def _record_history(self, entity: str, df: pl.DataFrame, ts: int = None):
+        """
+        Append the rows of 'df' whose volume or status changed since their last observation.
+
+        Parameters
+        ----------
+        entity : str
+            "event" or "market", 'df' is keyed by its 'id' column.
+        df : pl.DataFrame
+            Freshly fetched rows.
+        ts : int, optional
+            Epoch seconds of the observation, by default now.
+        """
+        if df is None or df.is_empty() or "volume" not in df.columns:
+            return
+        observed = history_observations(df, entity, int(time.time()) if ts is None else ts)
+        condition, params = self.backend.in_list("entity_id", observed["entity_id"].to_list())
+        last = self._read_data(
+            f"""SELECT h.entity_id, h.volume, h.active, h.closed
+                FROM {self.HISTORY_TABLE} h
+                JOIN (SELECT entity_id, max(ts) AS ts
+                      FROM {self.HISTORY_TABLE}
+                      WHERE entity = ? AND {condition}
+                      GROUP BY entity_id) l
+                ON h.entity_id = l.entity_id AND h.ts = l.ts
+                WHERE h.entity = ?""",
+            (entity, *params, entity),
+        )
+        last = last.cast({k: HISTORY_SCHEMA[k] for k in last.columns}).with_columns(
+            seen=pl.lit(True)
+        )
+        changed = observed.join(last, on="entity_id", how="left", suffix="_last").filter(
+            pl.col("seen").is_null()
+            | pl.any_horizontal(
+                pl.col(c).ne_missing(pl.col(f"{c}_last")) for c in ("volume", "active", "closed")
+            )
+        )
+        query = f"""INSERT OR IGNORE INTO {self.HISTORY_TABLE} (entity, entity_id, ts, volume, active, closed)
+                    VALUES (?, ?, ?, ?, ?, ?);
+                """
+        self._insert_data(changed.select(list(HISTORY_SCHEMA)), query)
+
+    def _read_history(
+        self,
+        entity: str,
+        entity_id: str | list = "",
+        start: int | str = None,
+        end: int | str = None,
+    ) -> pl.DataFrame:
+        """
+        Observations of 'entity', oldest first per entity_id.
+
+        With 'start', the last observation before it is kept and moved to 'start', it
+        holds the values at that time.
+        """
+        if self.HISTORY_TABLE not in self.backend.tables(self.conn):
+            return pl.DataFrame(schema=HISTORY_SCHEMA)
+        start, end = to_epoch(start), to_epoch(end)
+        query, params = self._build_param_query(
+            f"SELECT * FROM {self.HISTORY_TABLE}",
+            {"entity": "entity", "entity_id": "entity_id", "end": ("ts", "<=")},
+            entity=entity,
+            entity_id=entity_id,
+            end=end,
+        )
+        df = (
+            self._read_data(query + " ORDER BY entity_id, ts", params)
+            .cast(HISTORY_SCHEMA)
+            .select(list(HISTORY_SCHEMA))
+        )
+        if start is not None:
+            before = pl.col("ts") < start
+            df = df.filter(
+                ~before | (pl.col("ts") == pl.col("ts").filter(before).max().over("entity_id"))
+            ).with_columns(ts=pl.max_horizontal("ts", pl.lit(start)))
+        # Series merged from shards can repeat a state, keep its first row only.
+        repeated = pl.all_horizontal(
+            pl.col(c).eq_missing(pl.col(c).shift().over("entity_id"))
+            for c in ("volume", "active", "closed")
+        ) & (pl.col("entity_id").shift() == pl.col("entity_id"))
+        return df.filter(~repeated)
+
+    def _create_search_tables(self):
+        """
+        Create the FTS5 indexes over name (slug), title and description.
+
+        The indexes are contentless, the text lives only in the base tables and
+        search results are joined back on rowid. Existing rows are indexed the
+        first time the tables are created.
+        """
+        self.search_enabled = self.backend.supports_fts
+        if not self.search_enabled:
+            return
+        # Lets the index read compressed descriptions, see '_description_text'.
+        self.conn.create_function("pms_inflate", 1, inflate, deterministic=True)
+        for search_table, base_table in (
+            (self.SEARCH_TABLE, self.TABLE),
+            (self.MARKET_SEARCH_TABLE, self.MARKET_TABLE),
+        ):
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (search_table,),
+            ).fetchone()
+            if exists:
+                continue
+            query = f"""CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(
+                        name,
+                        title,
+                        description,
+                        content='',
+                        tokenize='porter unicode61');
+                        """
+            try:
+                with self._transaction():
+                    self.conn.execute(query)
+                    self.conn.execute(
+                        f"""INSERT INTO {search_table} (rowid, name, title, description)
+                            SELECT t.rowid, t.name, t.title, {self._description_text()}
+                            FROM {base_table} t {self._description_join()};
+                        """
+                    )
+            except OperationalError:
+                # SQLite build without FTS5, search falls back to being unavailable.
+                self.search_enabled = False
+                return
+
+    def _description_text(self) -> str:
+        return "coalesce(t.description, pms_inflate(d.body))"
+
+    def _description_join(self) -> str:
+        return f"LEFT JOIN {self.DESCRIPTION_TABLE} d ON d.id = t.description_id"
 
     def _insert_event_data(self, df: pl.DataFrame):
-        query = f"""INSERT OR IGNORE INTO {self.TABLE} (id, name, title, description, volume, created, updated, event_end, contract_end, active, closed, researched)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+        query = f"""INSERT OR IGNORE INTO {self.TABLE} (id, name, title, description, volume, created, updated, event_end, contract_end, active, closed, researched, description_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
                 """
-        self._insert_data(df, query)
+        columns = [
+            "id",
+            "name",
+            "title",
+            "description",
+            "volume",
+            "created",
+            "updated",
+            "event_end",
+            "contract_end",
+            "active",
+            "closed",
+            "researched",
+        ]
+        self._insert_data(self._with_description_ids(df, columns), query)
+        self._index_search_rows(df, self.SEARCH_TABLE, self.TABLE, ["id"], ["id"])
+        self._record_history("event", df)
 
     def _insert_markets_data(self, df: pl.DataFrame):
-        query = f"""INSERT OR IGNORE INTO {self.MARKET_TABLE} (event_id, market_id, name, title, condition_id, description, outcomes, volume, clob_token_ids, created, updated, event_end, contract_end)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+        query = f"""INSERT OR IGNORE INTO {self.MARKET_TABLE} (event_id, market_id, name, title, condition_id, description, outcomes, volume, clob_token_ids, created, updated, event_end, contract_end, description_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """
+        columns = [
+            "event_id",
+            "id",
+            "name",
+            "title",
+            "condition_id",
+            "description",
+            "outcomes",
+            "volume",
+            "clob_token_ids",
+            "created",
+            "updated",
+            "event_end",
+            "contract_end",
+        ]
+        self._insert_data(self._with_description_ids(df, columns), query)
+        self._index_search_rows(
+            df,
+            self.MARKET_SEARCH_TABLE,
+            self.MARKET_TABLE,
+            ["event_id", "id"],
+            ["event_id", "market_id"],
+        )
+        self._record_history("market", df)
+
+    def _with_description_ids(self, df: pl.DataFrame, columns: list) -> pl.DataFrame:
+        # Swap the text for its id, 'description' itself is left NULL. Frames read
+        # back without descriptions are inserted with none.
+        if df.is_empty():
+            return df
+        if "description" not in df.columns:
+            df = df.with_columns(description=pl.lit(None, dtype=pl.String))
+        df = native_dates(df)
+        return df.select(columns).with_columns(
+            description=pl.lit(None, dtype=pl.String),
+            description_id=self._store_descriptions(df["description"]),
+        )
+
+    def _index_search_rows(
+        self,
+        df: pl.DataFrame,
+        search_table: str,
+        base_table: str,
+        df_keys: list,
+        db_keys: list,
+    ):
+        """
+        Add freshly inserted rows to the search index.
+
+        Rows that were ignored by the insert are already indexed and skipped.
+        """
+        if df is None or df.is_empty() or not self.search_enabled:
+            return
+        conditions = " AND ".join(f"t.{col} = ?" for col in db_keys)
+        query = f"""INSERT INTO {search_table} (rowid, name, title, description)
+                    SELECT t.rowid, t.name, t.title, {self._description_text()}
+                    FROM {base_table} t {self._description_join()}
+                    WHERE {conditions}
+                    AND NOT EXISTS (SELECT 1 FROM {search_table} s WHERE s.rowid = t.rowid);
+                """
+        with self._transaction():
+            self.conn.executemany(query, df.select(df_keys).rows())
+
+    def _index_missing_search_rows(self):
+        """Index every base row that is not in the search index yet (e.g. after a merge)."""
+        if not self.search_enabled:
+            return
+        with self._transaction():
+            for search_table, base_table in (
+                (self.SEARCH_TABLE, self.TABLE),
+                (self.MARKET_SEARCH_TABLE, self.MARKET_TABLE),
+            ):
+                self.conn.execute(
+                    f"""INSERT INTO {search_table} (rowid, name, title, description)
+                        SELECT t.rowid, t.name, t.title, {self._description_text()}
+                        FROM {base_table} t {self._description_join()}
+                        WHERE NOT EXISTS (SELECT 1 FROM {search_table} s WHERE s.rowid = t.rowid);
+                    """
+                )
+
+    def _search(
+        self,
+        search_table: str,
+        base_table: str,
+        query: str,
+        limit: int,
+        include_description: bool = False,
+    ):
+        search_query = f"""SELECT t.*, bm25({search_table}) AS rank
+                    FROM {search_table}
+                    JOIN {base_table} t ON t.rowid = {search_table}.rowid
+                    WHERE {search_table} MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
                 """
-        self._insert_data(df, query)
+        data = self._read_data(search_query, (query, limit))
+        return self._attach_descriptions(data, include_description)
 
-    def _read_event_data(self, event_id: str, event_name: str = ""):
+    def _search_events(self, query: str, limit: int = 50, include_description: bool = False):
+        return self._search(
+            self.SEARCH_TABLE, self.TABLE, query, limit, include_description
+        )
+
+    def _search_markets(self, query: str, limit: int = 50, include_description: bool = False):
+        return self._search(
+            self.MARKET_SEARCH_TABLE, self.MARKET_TABLE, query, limit, include_description
+        )
+
+    def _read_event_data(
+        self,
+        event_id: str | list,
+        event_name: str | list = "",
+        include_description: bool = False,
+        columns: list = None,
+    ):
         query = f"""SELECT * FROM {self.TABLE}"""
         column_map = {"event_id": "id", "event_name": "name"}
+        columns, include_description = description_columns(columns, include_description)
         final_query, params = self._build_param_query(
             query,
             column_map,
+            columns,
             event_id=event_id,
             event_name=event_name,
         )
@@ -75,13 +466,15 @@ class EventsDB(Database):
         except OperationalError:
             self._create_events_table()
             data = self._read_data(final_query, params)
-        return data
+        return self._attach_descriptions(data, include_description)
 
     def _read_market_data(
         self,
-        event_id: str,
-        market_id: str = "",
-        market_name: str = "",
+        event_id: str | list,
+        market_id: str | list = "",
+        market_name: str | list = "",
+        include_description: bool = False,
+        columns: list = None,
     ):
         query = f"""SELECT * FROM {self.MARKET_TABLE}"""
         column_map = {
@@ -89,9 +482,11 @@ class EventsDB(Database):
             "market_id": "market_id",
             "market_name": "name",
         }
+        columns, include_description = description_columns(columns, include_description)
         final_query, params = self._build_param_query(
             query,
             column_map,
+            columns,
             event_id=event_id,
             market_id=market_id,
             market_name=market_name,
@@ -101,4 +496,68 @@ class EventsDB(Database):
         except OperationalError:
             self._create_markets_table()
             data = self._read_data(final_query, params)
-        return data
+        return self._attach_descriptions(data, include_description)
+
+
+DATE_COLUMNS = ["created", "updated", "event_end", "contract_end"]
+HISTORY_SCHEMA = {
+    "entity": pl.String,
+    "entity_id": pl.String,
+    "ts": pl.Int64,
+    "volume": pl.Float64,
+    "active": pl.Boolean,
+    "closed": pl.Boolean,
+}
+
+
+def native_dates(df: pl.DataFrame) -> pl.DataFrame:
+    """Epoch second dates, NULL for 'unk', whatever 'df' holds now."""
+    return to_epoch_columns(df, DATE_COLUMNS)
+
+
+def history_observations(df: pl.DataFrame, entity: str, ts: int) -> pl.DataFrame:
+    """One history row per entity in 'df', the last one wins."""
+    status = [
+        pl.col(c).cast(pl.Boolean, strict=False) if c in df.columns else pl.lit(None, pl.Boolean)
+        for c in ("active", "closed")
+    ]
+    return (
+        df.select(
+            entity=pl.lit(entity),
+            entity_id=pl.col("id").cast(pl.String),
+            ts=pl.lit(ts, pl.Int64),
+            volume=pl.col("volume").cast(pl.Float64, strict=False),
+            active=status[0],
+            closed=status[1],
+        )
+        .filter(pl.col("entity_id").is_not_null())
+        .unique("entity_id", keep="last", maintain_order=True)
+    )
+
+
+def description_id(text: str) -> str:
+    """Content address of a description."""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def description_columns(columns: list, include_description: bool):
+    """Asking for 'description' in 'columns' also reads the id it is stored under."""
+    if columns and "description" in columns:
+        return [*columns, "description_id"], True
+    return columns, include_description
+
+
+def inflate(body: bytes) -> str:
+    return None if body is None else zlib.decompress(body).decode()
+
+
+def fill_descriptions(df: pl.DataFrame, texts: dict) -> pl.DataFrame:
+    """Replace 'description_id' with the text it points to."""
+    return df.with_columns(
+        description=pl.coalesce(
+            pl.col("description").cast(pl.String),
+            pl.col("description_id").replace_strict(
+                texts, default=None, return_dtype=pl.String
+            ),
+        )
+    ).drop("description_id")
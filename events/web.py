@@ -1,9 +1,15 @@
 import json
+import time
+import logging
 import requests
 import datetime as dt
 
 import polars as pl
-from ..utils.dates import date_extract
+from ..helper import fetch_url
+from ..metrics import PARSE_SECONDS, ROWS_FETCHED
+from ..utils.dates import date_extract, to_epoch_columns
+
+logger = logging.getLogger(__name__)
 
 
 class EventsScraper:
@@ -15,42 +21,99 @@ class EventsScraper:
     ):
         """
         Fetches active Polymarket events and filters for those ending within 'days_soon'.
+        Returns None if the request failed.
         """
 
+        params = self._soon_resolving_params(limit)
+        return self._fetch_data(self.event_url, params, resolve_threshold=resolve_threshold)
+
+    def fetch_top_active_markets(self, limit: int = 100):
+        """(event_data, market_data) of the top events by volume, None if the request failed."""
+        params = self._top_active_params(limit)
+        return self._fetch_data(self.event_url, params)
+
+    def fetch_event_by_X(
+        self, event_id: str, event_name: str, resolve_threshold: int = 3000
+    ):
+        """(event_data, market_data) of one event, None if the request failed."""
+        # url = f"https://gamma-api.polymarket.com/events/{event_id}"
+        params = self._event_params(event_id, event_name)
+        return self._fetch_data(self.event_url, params, resolve_threshold=resolve_threshold)
+
+    def fetch_events_page(self, offset: int, limit: int = 100, closed: bool = None):
+        """
+        One page of every event, oldest first, with the markets of every event,
+        ended ones included. Returns None if the request failed.
+        """
+        params = self._page_params(offset, limit, closed)
+        return self._fetch_data(self.event_url, params, resolve_threshold=None)
+
+    def fetch_resolutions_page(self, offset: int, limit: int = 100):
+        """
+        Resolution outcomes of one page of closed events, oldest first.
+
+        Returns (number of events on the page, resolutions), None if the request
+        failed. See '_parse_resolutions'.
+        """
+        params = self._page_params(offset, limit, closed=True)
+        try:
+            response = fetch_url(self.event_url, "gamma/events", params=params)
+            response.raise_for_status()
+            events = response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching data: %s", e)
+            return None
+        return len(events), self._parse_resolutions(events)
+
+    def _soon_resolving_params(self, limit: int) -> dict:
         # Query parameters: active markets only, sorted by volume to get relevant ones
-        params = {
+        return {
             "closed": "false",
             "active": "true",
             "limit": limit,  # Fetch top 50 active events to scan
             "order": "volume",  # Sort by volume to see popular markets first
         }
-        event_data, market_data = self._fetch_data(
-            self.event_url, params, resolve_threshold=resolve_threshold
-        )
-        return event_data, market_data
 
-    def fetch_top_active_markets(self, limit: int = 100):
+    def _top_active_params(self, limit: int) -> dict:
         # API Parameters
-        params = {
+        return {
             "closed": "false",  # Only active markets
             "active": "true",  # Double check for active status
             "limit": limit,  # Number of events to fetch
             "order": "volume",  # Sort by volume
             "ascending": "false",  # Highest volume first
         }
-        event_data, market_data = self._fetch_data(self.event_url, params)
-        return event_data, market_data
 
-    def fetch_event_by_X(self, event_id: str, event_name: str):
-        # url = f"https://gamma-api.polymarket.com/events/{event_id}"
+    def _page_params(self, offset: int, limit: int, closed: bool = None) -> dict:
+        # Ascending ids keep pages stable while new events are appended at the end.
+        params = {"limit": limit, "offset": offset, "order": "id", "ascending": "true"}
+        if closed is not None:
+            params["closed"] = "true" if closed else "false"
+        return params
+
+    def _event_params(self, event_id: str, event_name: str) -> dict:
         if event_id != "":
-            params = {"id": event_id}
+            return {"id": event_id}
         elif event_name != "":
-            params = {"slug": event_name}
-        event_data, market_data = self._fetch_data(self.event_url, params)
-        return event_data, market_data
+            return {"slug": event_name}
+        return {}
 
     def _fetch_data(self, url: str, params: dict = {}, resolve_threshold: int = 3000):
+        try:
+            response = fetch_url(url, "gamma/events", params=params or None)
+            response.raise_for_status()
+            return self._parse_events(response.json(), resolve_threshold)
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching data: %s", e)
+
+    def _parse_events(self, events: list, resolve_threshold: int = 3000):
+        """
+        Turn a gamma '/events' response into (event_data, market_data) frames.
+
+        Markets are only kept for events ending within 'resolve_threshold' days,
+        or for every event when it is None (catalogue crawls and backfills).
+        """
+        parse_start = time.perf_counter()
         event_data = {
             "id": [],
             "name": [],
@@ -80,105 +143,162 @@ class EventsScraper:
             "event_end": [],
             "contract_end": [],
         }
-        try:
-            if params:
-                response = requests.get(url, params=params)
-            else:
-                response = requests.get(url)
-            response.raise_for_status()
-            events = response.json()
-            # Calculate the threshold date (current time + days_soon)
-            now = dt.datetime.now(dt.timezone.utc)
+        # Calculate the threshold date (current time + days_soon)
+        now = dt.datetime.now(dt.timezone.utc)
+        threshold_date = None
+        if resolve_threshold is not None:
             threshold_date = now + dt.timedelta(days=resolve_threshold)
-
-            print(
-                f"--- Markets Resolving by {threshold_date.strftime('%Y-%m-%d')} ---\n"
+            logger.debug(
+                "Markets resolving by %s", threshold_date.strftime("%Y-%m-%d")
             )
-            found_markets = False
-
-            for event in events:
-                end_date_str = event.get("endDate")
-                event_id = event.get("id", "unk")
-                event_name = event.get("ticker", "unk")
-                description = event.get("description", "unk")
-                if description == "unk":
-                    event_end = "unk"
-                else:
-                    event_end = self._smart_extract(description, event_name)
-                event_data["id"].append(event_id)
-                event_data["name"].append(event_name)
-                event_data["title"].append(event.get("title", "unk"))
-                event_data["description"].append(description),
-                event_data["volume"].append(event.get("volume", 0.0))
-                event_data["created"].append(event.get("createdAt", "unk"))
-                event_data["updated"].append(event.get("updatedAt", "unk"))
-                event_data["event_end"].append(event_end)
-                event_data["contract_end"].append(end_date_str)
-                event_data["active"].append(event.get("active", True))
-                event_data["closed"].append(event.get("closed", True))
-                event_data["researched"].append(False)
-                # Safely get the end date (usually in ISO format like '2024-12-31T23:59:00Z')
-
-                if not end_date_str:
-                    continue
-
-                # Parse the ISO date string to a datetime object
-                # Note: Python 3.11+ handles 'Z' automatically, for older versions replace 'Z'
-                try:
-                    event_end_date = dt.datetime.fromisoformat(
-                        end_date_str.replace("Z", "+00:00")
-                    )
-                except ValueError:
-                    continue
+        found_markets = False
 
-                # Check if the event ends between NOW and our THRESHOLD
-                if now < event_end_date <= threshold_date:
-                    found_markets = True
-                    markets = event.get("markets", [])
-                    if markets:
-                        for m in markets:
-                            outcomes = m.get("outcomes", [])
-                            prices = m.get("outcomePrices")
-                            market_name = m.get("slug", "unk")
-                            market_description = m.get("description", "unk")
-                            if market_description == "unk":
-                                market_end = "unk"
-                            else:
-                                market_end = self._smart_extract(
-                                    market_description, market_name
-                                )
-
-                            if isinstance(outcomes, str):
-                                outcomes = json.dumps(outcomes)
-                            if isinstance(prices, str):
-                                prices = json.loads(prices)
-                            market_data["event_id"].append(event_id)
-                            market_data["id"].append(m.get("id", "unk"))
-                            market_data["name"].append(market_name)
-                            market_data["title"].append(m.get("question", "unk"))
-                            market_data["condition_id"].append(
-                                m.get("conditionId", "unk")
-                            )
-                            market_data["description"].append(market_description)
-                            market_data["outcomes"].append(outcomes)
-                            market_data["volume"].append(m.get("volumeNum", 0))
-                            market_data["clob_token_ids"].append(
-                                m.get("clobTokenIds", "unk")
+        for event in events:
+            end_date_str = event.get("endDate")
+            event_id = event.get("id", "unk")
+            event_name = event.get("ticker", "unk")
+            description = event.get("description", "unk")
+            if description == "unk":
+                event_end = "unk"
+            else:
+                event_end = self._smart_extract(description, event_name)
+            event_data["id"].append(event_id)
+            event_data["name"].append(event_name)
+            event_data["title"].append(event.get("title", "unk"))
+            event_data["description"].append(description),
+            event_data["volume"].append(event.get("volume", 0.0))
+            event_data["created"].append(event.get("createdAt", "unk"))
+            event_data["updated"].append(event.get("updatedAt", "unk"))
+            event_data["event_end"].append(event_end)
+            event_data["contract_end"].append(end_date_str)
+            event_data["active"].append(event.get("active", True))
+            event_data["closed"].append(event.get("closed", True))
+            event_data["researched"].append(False)
+            if threshold_date is None or self._ends_between(
+                end_date_str, now, threshold_date
+            ):
+                found_markets = True
+                markets = event.get("markets", [])
+                if markets:
+                    for m in markets:
+                        outcomes = m.get("outcomes", [])
+                        prices = m.get("outcomePrices")
+                        market_name = m.get("slug", "unk")
+                        market_description = m.get("description", "unk")
+                        if market_description == "unk":
+                            market_end = "unk"
+                        else:
+                            market_end = self._smart_extract(
+                                market_description, market_name
                             )
-                            market_data["created"].append(m.get("createdAt", "unk"))
-                            market_data["updated"].append(m.get("updatedAt", "unk"))
-                            market_data["event_end"].append(market_end)
-                            market_data["contract_end"].append(m.get("endDate", "unk"))
 
-            if not found_markets:
-                print("No high-volume markets found resolving in this window.")
+                        if isinstance(outcomes, str):
+                            outcomes = json.dumps(outcomes)
+                        if isinstance(prices, str):
+                            prices = json.loads(prices)
+                        market_data["event_id"].append(event_id)
+                        market_data["id"].append(m.get("id", "unk"))
+                        market_data["name"].append(market_name)
+                        market_data["title"].append(m.get("question", "unk"))
+                        market_data["condition_id"].append(
+                            m.get("conditionId", "unk")
+                        )
+                        market_data["description"].append(market_description)
+                        market_data["outcomes"].append(outcomes)
+                        market_data["volume"].append(m.get("volumeNum", 0))
+                        market_data["clob_token_ids"].append(
+                            m.get("clobTokenIds", "unk")
+                        )
+                        market_data["created"].append(m.get("createdAt", "unk"))
+                        market_data["updated"].append(m.get("updatedAt", "unk"))
+                        market_data["event_end"].append(market_end)
+                        market_data["contract_end"].append(m.get("endDate", "unk"))
 
-            event_data = pl.DataFrame(event_data)
-            market_data = pl.DataFrame(market_data)
-            return event_data, market_data
+        if not found_markets:
+            logger.info("No high-volume markets found resolving in this window.")
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data: {e}")
+        event_data = pl.DataFrame(event_data)
+        market_data = pl.DataFrame(market_data)
+        PARSE_SECONDS.observe(time.perf_counter() - parse_start, stage="events")
+        ROWS_FETCHED.inc(len(event_data), table="events")
+        ROWS_FETCHED.inc(len(market_data), table="markets")
+        return event_data, market_data
+
+    def _ends_between(
+        self, end_date_str: str, start: dt.datetime, end: dt.datetime
+    ) -> bool:
+        # Safely get the end date (usually in ISO format like '2024-12-31T23:59:00Z')
+        if not end_date_str:
+            return False
+
+        # Parse the ISO date string to a datetime object
+        # Note: Python 3.11+ handles 'Z' automatically, for older versions replace 'Z'
+        try:
+            event_end_date = dt.datetime.fromisoformat(end_date_str.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+
+        # Check if the event ends between NOW and our THRESHOLD
+        return start < event_end_date <= end
+
+    def _parse_resolutions(self, events: list) -> pl.DataFrame:
+        """
+        One row per outcome token of every settled market in a gamma '/events' response.
+
+        A closed market is settled once its outcome prices are final payouts (0, 0.5
+        or 1); closed markets still awaiting resolution show trading prices and are
+        skipped.
+        """
+        parse_start = time.perf_counter()
+        data = {
+            "clob_token_id": [],
+            "event_id": [],
+            "market_id": [],
+            "outcome": [],
+            "payout": [],
+            "contract_end": [],
+            "resolved": [],
+        }
+        for event in events:
+            for m in event.get("markets") or []:
+                if not m.get("closed"):
+                    continue
+                outcomes = _json_list(m.get("outcomes"))
+                tokens = _json_list(m.get("clobTokenIds"))
+                try:
+                    payouts = [float(p) for p in _json_list(m.get("outcomePrices"))]
+                except (TypeError, ValueError):
+                    continue
+                if not tokens or not len(tokens) == len(outcomes) == len(payouts):
+                    continue
+                if any(p not in (0.0, 0.5, 1.0) for p in payouts):
+                    continue
+                for token, outcome, payout in zip(tokens, outcomes, payouts):
+                    data["clob_token_id"].append(token)
+                    data["event_id"].append(event.get("id"))
+                    data["market_id"].append(m.get("id"))
+                    data["outcome"].append(outcome)
+                    data["payout"].append(payout)
+                    data["contract_end"].append(m.get("endDate"))
+                    data["resolved"].append(m.get("closedTime"))
+        df = to_epoch_columns(
+            pl.DataFrame(
+                data,
+                schema={
+                    "clob_token_id": pl.String,
+                    "event_id": pl.String,
+                    "market_id": pl.String,
+                    "outcome": pl.String,
+                    "payout": pl.Float64,
+                    "contract_end": pl.String,
+                    "resolved": pl.String,
+                },
+            ),
+            ["contract_end", "resolved"],
+        )
+        PARSE_SECONDS.observe(time.perf_counter() - parse_start, stage="resolutions")
+        ROWS_FETCHED.inc(len(df), table="resolutions")
+        return df
 
     def _smart_extract(self, description: str, name: str):
         end = date_extract(description)
@@ -191,3 +311,13 @@ class EventsScraper:
         else:
             end = dt.datetime.strftime(end, "%Y-%m-%d %H:%M:%S")
         return end
+
+
+def _json_list(value) -> list:
+    """gamma returns list fields as JSON encoded strings."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
@@ -1,5 +1,12 @@
+import time
 import inspect
-import polars as pl
+import logging
+import requests
+
+from .database import is_batch
+from .metrics import CACHE_HITS, CACHE_MISSES, HTTP_BYTES, HTTP_REQUESTS, HTTP_SECONDS
+
+logger = logging.getLogger(__name__)
 
 
 def get_data(
@@ -11,10 +18,16 @@ def get_data(
     force_update: bool,
     log: bool = True,
 ):
+    source = getattr(read_func, "__name__", "")
     if force_update:
         if log:
-            print(f"Force updating")
+            logger.info("Force updating")
+        read_params = _filter_params_for_function(read_func, read_params)
+        fetch_params = _filter_params_for_function(fetch_func, fetch_params)
         web_data = fetch_func(**fetch_params)
+        if web_data is None:
+            # The request failed, serve what is stored.
+            return read_func(**read_params)
         if isinstance(insert_func, list):
             index = 0
             for insert in insert_func:
@@ -27,13 +40,19 @@ def get_data(
     else:
         read_params = _filter_params_for_function(read_func, read_params)
         local_data = read_func(**read_params)
-        if local_data.is_empty():
+        if local_data.is_empty() and (_read_only(read_func) or _batch_read(read_params)):
+            # Readers cannot store what they would fetch, and the scrapers fetch
+            # one key at a time.
+            CACHE_MISSES.inc(source=source)
+        elif local_data.is_empty():
+            CACHE_MISSES.inc(source=source)
             if log:
-                print(f"Fetching from the web for data: {read_params}")
+                logger.info("Fetching from the web for data: %s", read_params)
             fetch_params = _filter_params_for_function(fetch_func, fetch_params)
             web_data = fetch_func(**fetch_params)
             if web_data is None:
-                return pl.DataFrame()
+                # The request failed, the empty read keeps the columns.
+                return local_data
             if isinstance(insert_func, list):
                 index = 0
                 for insert in insert_func:
@@ -42,9 +61,64 @@ def get_data(
             else:
                 insert_func(web_data)
             local_data = read_func(**read_params)
+        else:
+            CACHE_HITS.inc(source=source)
         return local_data
 
 
+def _read_only(read_func) -> bool:
+    return getattr(getattr(read_func, "__self__", None), "read_only", False)
+
+
+def _batch_read(read_params: dict) -> bool:
+    return any(is_batch(value) for value in read_params.values())
+
+
+def fetch_url(
+    url: str,
+    endpoint: str,
+    params: dict = None,
+    method: str = "GET",
+    json_body=None,
+    timeout: float = None,
+) -> requests.Response:
+    """
+    Make an HTTP request and record its latency, status and size.
+
+    Parameters
+    ----------
+    url : str
+        URL to request.
+    endpoint : str
+        Short name used to label the metrics, e.g. "gamma/events".
+    params : dict, optional
+        Query string parameters, by default None.
+    method : str, optional
+        HTTP method, by default "GET".
+    json_body : optional
+        JSON body to send, by default None.
+    timeout : float, optional
+        Request timeout in seconds, by default None (wait forever).
+    Returns
+    -------
+    requests.Response
+        The response, 'raise_for_status' has not been called.
+    """
+    start = time.perf_counter()
+    try:
+        response = requests.request(
+            method, url, params=params, json=json_body, timeout=timeout
+        )
+    except requests.exceptions.RequestException:
+        HTTP_REQUESTS.inc(endpoint=endpoint, status="error")
+        raise
+    finally:
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    HTTP_BYTES.inc(len(response.content), endpoint=endpoint)
+    return response
+
+
 def _filter_params_for_function(func, params):
     sig = inspect.signature(func)
     allowed = {k: v for k, v in params.items() if k in sig.parameters}
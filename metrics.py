@@ -0,0 +1,235 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.type = "counter"
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            {"labels": dict(zip(self.labelnames, key)), "value": value}
+            for key, value in items
+        ]
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+
+class Histogram(Counter):
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.type = "histogram"
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def value(self, **labels) -> dict:
+        state = self._values.get(self._key(labels))
+        return self._summarise(state) if state else {"count": 0, "sum": 0.0}
+
+    def samples(self) -> list:
+        with self._lock:
+            items = [(key, dict(state, counts=list(state["counts"]))) for key, state in self._values.items()]
+        return [
+            {"labels": dict(zip(self.labelnames, key)), "value": self._summarise(state)}
+            for key, state in items
+        ]
+
+    def _summarise(self, state: dict) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "count": state["count"],
+            "sum": state["sum"],
+            "mean": state["sum"] / state["count"] if state["count"] else 0.0,
+            "buckets": buckets,
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def stats(self) -> dict:
+        return {
+            name: {"type": metric.type, "help": metric.help, "samples": metric.samples()}
+            for name, metric in self._metrics.items()
+        }
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for sample in metric.samples():
+                labels = sample["labels"]
+                if metric.type == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {sample['value']}")
+                    continue
+                value = sample["value"]
+                for bound, count in value["buckets"].items():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=le))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Counter) -> Counter:
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "pms_http_requests_total", "HTTP requests made, by endpoint and status.", ("endpoint", "status")
+)
+HTTP_BYTES = REGISTRY.counter(
+    "pms_http_response_bytes_total", "Bytes received in HTTP response bodies.", ("endpoint",)
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "pms_http_request_seconds", "HTTP request latency in seconds.", ("endpoint",)
+)
+ROWS_FETCHED = REGISTRY.counter(
+    "pms_rows_fetched_total", "Rows parsed from API responses.", ("table",)
+)
+ROWS_INSERTED = REGISTRY.counter(
+    "pms_rows_inserted_total", "Rows written to the database.", ("table",)
+)
+ROWS_IGNORED = REGISTRY.counter(
+    "pms_rows_ignored_total", "Rows skipped by the database as duplicates.", ("table",)
+)
+SQL_SECONDS = REGISTRY.histogram(
+    "pms_sql_query_seconds", "SQL statement latency in seconds.", ("op", "table")
+)
+CACHE_HITS = REGISTRY.counter(
+    "pms_cache_hits_total", "Reads answered from the local database.", ("source",)
+)
+CACHE_MISSES = REGISTRY.counter(
+    "pms_cache_misses_total", "Reads that had to fall back to the web.", ("source",)
+)
+QUERY_CACHE_HITS = REGISTRY.counter(
+    "pms_query_cache_hits_total", "Reads answered from the query cache.", ("table",)
+)
+QUERY_CACHE_MISSES = REGISTRY.counter(
+    "pms_query_cache_misses_total", "Cacheable reads that ran the query.", ("table",)
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "pms_parse_seconds", "Time spent parsing and transforming data.", ("stage",)
+)
+SYNC_TASKS = REGISTRY.counter(
+    "pms_sync_tasks_total", "Sync daemon tasks run, by queue and outcome.", ("queue", "status")
+)
+SYNC_TASK_SECONDS = REGISTRY.histogram(
+    "pms_sync_task_seconds", "Sync daemon task duration in seconds.", ("queue",)
+)
+SYNC_REJECTED = REGISTRY.counter(
+    "pms_sync_rejected_total", "Tasks not scheduled because a queue was full.", ("queue",)
+)
+
+
+def get_stats() -> dict:
+    """
+    Snapshot of every metric as plain Python data.
+
+    Returns
+    -------
+    dict
+        Metric name -> {"type", "help", "samples"}. Counter samples hold a number,
+        histogram samples hold count, sum, mean and cumulative buckets.
+    """
+    return REGISTRY.stats()
+
+
+def reset_stats() -> None:
+    """Zero every metric."""
+    REGISTRY.reset()
+
+
+def to_prometheus() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns
+    -------
+    str
+        Text that can be served from a /metrics endpoint.
+    """
+    return REGISTRY.to_prometheus()
@@ -0,0 +1,48 @@
+import logging
+
+from .local import PricesDB
+from .web import PricesScraper
+from ..aio import fetch_url_async, get_data_async
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPricesScraper(PricesScraper):
+    """PricesScraper whose fetch methods are coroutines sharing one connection pool."""
+
+    async def fetch_prices(self, clob_token_id: str, interval: str = "1d"):
+        params = self._prices_params(clob_token_id, interval)
+        logger.debug("Fetching prices for CLOB token %s", clob_token_id)
+        try:
+            response = await fetch_url_async(
+                self.prices_url, "clob/prices-history", params=params
+            )
+            response.raise_for_status()
+            return self._parse_prices(response.json(), clob_token_id)
+
+        except Exception as e:
+            logger.error("Error fetching prices for %s: %s", clob_token_id, e)
+            return None
+
+
+async def get_price_data_async(
+    db_path: str,
+    clob_token_id: str | list,
+    date: int | str = "",
+    force_update: bool = False,
+    start: int | str = None,
+    end: int | str = None,
+):
+    """Async counterpart of 'get_price_data', takes the same parameters."""
+    scraper = AsyncPricesScraper()
+    params = {"clob_token_id": clob_token_id, "date": date, "start": start, "end": end}
+    return await get_data_async(
+        PricesDB,
+        db_path,
+        read_method="_read_price_data",
+        read_params=params,
+        fetch_func=scraper.fetch_prices,
+        fetch_params=params,
+        insert_methods="_insert_price_data",
+        force_update=force_update,
+    )
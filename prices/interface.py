@@ -1,15 +1,49 @@
+import polars as pl
+
 from .local import PricesDB
 from .web import PricesScraper
+from ..database import batch_values, is_batch
 from ..helper import get_data
+from ..snapshot import read_snapshot
+from ..utils.dates import to_epoch
 
 
 def get_price_data(
-    db_path: str, clob_token_id: str, date: str = "", force_update: bool = False
+    db_path: str,
+    clob_token_id: str | list,
+    date: int | str = "",
+    force_update: bool = False,
+    snapshot: str = "",
+    snapshot_format: str = "parquet",
+    start: int | str = None,
+    end: int | str = None,
 ):
+    """
+    Price history of one token, or of many tokens in one query.
+
+    A list of tokens (or dates) is read from the database only, nothing is
+    scraped for it. 'start' and 'end' bound the dates, both inclusive, as epoch
+    seconds or "YYYY-MM-DD HH:MM:SS" strings.
+    """
+    if snapshot != "":
+        if is_batch(date):
+            date = [to_epoch(d) for d in batch_values(date)]
+        else:
+            date = to_epoch(date)
+        # Read-only path, the token filter prunes every other partition.
+        return read_snapshot(
+            snapshot,
+            "prices",
+            snapshot_format,
+            clob_token_id=clob_token_id,
+            date=date,
+            start=to_epoch(start),
+            end=to_epoch(end),
+        )
 
     db = PricesDB(db_path)
     scraper = PricesScraper()
-    params = {"clob_token_id": clob_token_id, "date": date}
+    params = {"clob_token_id": clob_token_id, "date": date, "start": start, "end": end}
     data = get_data(
         read_func=db._read_price_data,
         read_params=params,
@@ -19,3 +53,40 @@ def get_price_data(
         force_update=force_update,
     )
     return data
+
+
+def get_latest_prices(
+    db_path: str, clob_token_ids: list, fetch_missing: bool = False
+) -> pl.DataFrame:
+    """
+    Most recent stored price of each token, one indexed row per token.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    clob_token_ids : list
+        Tokens to price.
+    fetch_missing : bool, optional
+        Fetch the history of tokens with no stored price first, by default False.
+    Returns
+    -------
+    pl.DataFrame
+        clob_token_id, date and price. Tokens without a price are left out.
+    """
+    tokens = list(dict.fromkeys(clob_token_ids))
+    db = PricesDB(db_path)
+    try:
+        data = db._read_latest_prices(tokens)
+        if fetch_missing and len(data) < len(tokens):
+            found = set(data["clob_token_id"].to_list())
+            missing = [token for token in tokens if token not in found]
+            scraper = PricesScraper()
+            for token in missing:
+                df = scraper.fetch_prices(token)
+                if df is not None:
+                    db._insert_price_data(df)
+            data = db._read_latest_prices(tokens)
+    finally:
+        db.close()
+    return data
@@ -1,44 +1,141 @@
-from ..database import Database
+from ..database import Database, batch_values, is_batch
+from ..utils.dates import to_epoch, to_epoch_columns
 
 import polars as pl
 from sqlite3 import OperationalError
 
 
 class PricesDB(Database):
-    def __init__(self, db_path: str, log: bool = True):
+    def __init__(self, db_path: str, log: bool = True, read_only: bool = None):
         self.TABLE = "prices"
-        super().__init__(db_path, log)
+        self.LATEST_TABLE = "latest_prices"
+        super().__init__(db_path, log, read_only=read_only)
+        if not self.read_only and self.TABLE in self.backend.tables(self.conn):
+            # Brings databases written by older versions up to date.
+            self._create_prices_table()
 
-    def _create_prices_table(self):
-        query = f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+    def _create_prices_table(self, table: str = None):
+        # 'date' is epoch seconds (UTC). The primary key serves per-token range scans.
+        fresh = self.TABLE not in self.backend.tables(self.conn)
+        query = f"""CREATE TABLE IF NOT EXISTS {table or self.TABLE} (
                     clob_token_id TEXT,
-                    date TEXT,
-                    price TEXT,
+                    date BIGINT,
+                    price REAL,
                     PRIMARY KEY (clob_token_id, date));
                     """
         self._init_schema(query, "")
+        if table is None:
+            self._migrate("prices", [self._migrate_native_types], fresh)
+            self._create_latest_prices_table()
+
+    def _create_latest_prices_table(self, table: str = None):
+        # Newest row of 'prices' for each token, kept current by '_insert_price_data'.
+        exists = self.LATEST_TABLE in self.backend.tables(self.conn)
+        query = f"""CREATE TABLE IF NOT EXISTS {table or self.LATEST_TABLE} (
+                    clob_token_id TEXT NOT NULL,
+                    date BIGINT,
+                    price REAL,
+                    PRIMARY KEY (clob_token_id));
+                    """
+        self._init_schema(query, "")
+        if not exists and table is None:
+            self._rebuild_latest_prices()
+
+    def _migrate_native_types(self):
+        """Version 1: TEXT dates and prices become epoch seconds and REAL."""
+        self._rebuild_table(self.TABLE, self._create_prices_table, native_prices)
+        if self.LATEST_TABLE in self.backend.tables(self.conn):
+            self._rebuild_table(
+                self.LATEST_TABLE, self._create_latest_prices_table, native_prices
+            )
 
     def _insert_price_data(self, df: pl.DataFrame):
         query = f"""INSERT OR IGNORE INTO {self.TABLE} (clob_token_id, date, price)
                     VALUES (?, ?, ?);
                 """
+        df = native_prices(df)
         self._insert_data(df, query)
+        self._upsert_latest_prices(df)
+
+    def _upsert_latest_prices(self, df: pl.DataFrame):
+        if df.is_empty():
+            return
+        latest = (
+            df.select("clob_token_id", "date", "price")
+            .sort("date")
+            .group_by("clob_token_id", maintain_order=True)
+            .last()
+        )
+        # Only move forward, an older backfill must not replace a newer price.
+        query = f"""INSERT INTO {self.LATEST_TABLE} (clob_token_id, date, price)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (clob_token_id) DO UPDATE
+                    SET date = excluded.date, price = excluded.price
+                    WHERE excluded.date > {self.LATEST_TABLE}.date;
+                """
+        try:
+            self._insert_data(latest, query)
+        except OperationalError:
+            # Database created before 'latest_prices' existed, build it from the history.
+            self._create_latest_prices_table()
+            self._insert_data(latest, query)
+
+    def _rebuild_latest_prices(self):
+        """Recompute 'latest_prices' from the full history, e.g. after merging shards."""
+        with self._transaction():
+            self.conn.execute(f"DELETE FROM {self.LATEST_TABLE}")
+            self.conn.execute(
+                f"""INSERT INTO {self.LATEST_TABLE} (clob_token_id, date, price)
+                    SELECT p.clob_token_id, p.date, p.price
+                    FROM {self.TABLE} p
+                    JOIN (SELECT clob_token_id, max(date) AS date
+                          FROM {self.TABLE}
+                          GROUP BY clob_token_id) latest
+                    ON p.clob_token_id = latest.clob_token_id AND p.date = latest.date;
+                """
+            )
+
+    def _read_latest_prices(self, clob_token_ids: list):
+        if not len(clob_token_ids):
+            return pl.DataFrame(
+                schema={"clob_token_id": pl.String, "date": pl.Int64, "price": pl.Float64}
+            )
+        query = f"""SELECT * FROM {self.LATEST_TABLE}"""
+        query, params = self._build_param_query(
+            query, {"clob_token_id": "clob_token_id"}, clob_token_id=list(clob_token_ids)
+        )
+        try:
+            return self._read_data(query, params)
+        except OperationalError:
+            self._create_prices_table()
+            return self._read_data(query, params)
 
     def _read_price_data(
         self,
-        clob_token_id: str = "",
-        date: str = "",
+        clob_token_id: str | list = "",
+        date: int | str | list = "",
+        start: int | str = None,
+        end: int | str = None,
     ):
+        # 'start' and 'end' bound 'date', both inclusive.
         query = f"""SELECT * FROM {self.TABLE}"""
         column_map = {
             "clob_token_id": "clob_token_id",
             "date": "date",
+            "start": ("date", ">="),
+            "end": ("date", "<="),
         }
+        if is_batch(date):
+            date = [to_epoch(d) for d in batch_values(date)]
+        else:
+            date = to_epoch(date)
         final_query, params = self._build_param_query(
             query,
             column_map,
             clob_token_id=clob_token_id,
             date=date,
+            start=to_epoch(start),
+            end=to_epoch(end),
         )
         try:
             data = self._read_data(final_query, params)
@@ -46,3 +143,11 @@ class PricesDB(Database):
             self._create_prices_table()
             data = self._read_data(final_query, params)
         return data
+
+
+def native_prices(df: pl.DataFrame) -> pl.DataFrame:
+    """Epoch second dates and float prices, whatever 'df' holds now."""
+    df = to_epoch_columns(df, ["date"])
+    if "price" in df.columns:
+        df = df.with_columns(pl.col("price").cast(pl.Float64, strict=False))
+    return df
@@ -0,0 +1,280 @@
+import math
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Literal
+
+import numpy as np
+import polars as pl
+
+from .local import PricesDB
+
+logger = logging.getLogger(__name__)
+
+# Window name -> seconds.
+WINDOWS = {"5m": 300, "1h": 3_600, "1d": 86_400}
+MOVERS_SCHEMA = {
+    "window": pl.String,
+    "clob_token_id": pl.String,
+    "ref_date": pl.Int64,
+    "ref_price": pl.Float64,
+    "date": pl.Int64,
+    "price": pl.Float64,
+    "change": pl.Float64,
+    "rel_change": pl.Float64,
+}
+
+
+class TokenSeries:
+    """Recent prices of one token, oldest first."""
+
+    __slots__ = ("dates", "prices")
+
+    def __init__(self):
+        self.dates = []
+        self.prices = []
+
+    def add(self, date: int, price: float) -> None:
+        if not self.dates or date > self.dates[-1]:
+            self.dates.append(date)
+            self.prices.append(price)
+            return
+        # Late or repeated points, e.g. a backfill.
+        i = bisect_left(self.dates, date)
+        if self.dates[i] == date:
+            self.prices[i] = price
+        else:
+            self.dates.insert(i, date)
+            self.prices.insert(i, price)
+
+    def trim(self, cutoff: int) -> None:
+        """Drop points before 'cutoff', except the last one, the price at 'cutoff'."""
+        i = bisect_right(self.dates, cutoff) - 1
+        if i > 0:
+            del self.dates[:i]
+            del self.prices[:i]
+
+    def reference(self, since: int) -> tuple:
+        """
+        (date, price) of the point a window starting at 'since' is measured from,
+        and the date of the point after it (when the reference moves next).
+
+        The reference is the last point at or before 'since', or the first point
+        when the series starts later.
+        """
+        i = max(bisect_right(self.dates, since) - 1, 0)
+        after = self.dates[i + 1] if i + 1 < len(self.dates) else math.inf
+        return self.dates[i], self.prices[i], after
+
+
+class MoversEngine:
+    """
+    Rolling-window price moves of every tracked token, kept in memory.
+
+    Each token holds only the points of the longest window plus the one before it.
+    Per window, the reference price of every token is kept with the date it next
+    changes at; a query only recomputes the tokens that received points or whose
+    reference moved since the last query, then ranks all tokens with a vectorized
+    partial sort. The cost does not depend on the length of the stored history.
+
+    'refresh' reads the price rows inserted since the last refresh, by any writer;
+    frames fetched in-process can also be fed directly with 'observe'. Windows end
+    at the newest price seen, not the wall clock, so the engine also works on
+    historical data.
+    """
+
+    def __init__(self, db_path: str, windows: dict = None, load: bool = True):
+        self.db_path = db_path
+        self.windows = dict(WINDOWS if windows is None else windows)
+        self.horizon = max(self.windows.values())
+        self.series = {}
+        self.tokens = []
+        self.last_rowid = 0
+        self.last_date = None
+        self._index = {}
+        self._last_date = np.empty(0, np.int64)
+        self._last_price = np.empty(0, np.float64)
+        self._refs = {
+            window: {
+                "date": np.empty(0, np.int64),
+                "price": np.empty(0, np.float64),
+                "after": np.empty(0, np.float64),
+                "dirty": set(),
+            }
+            for window in self.windows
+        }
+        if load:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def __contains__(self, clob_token_id: str) -> bool:
+        return clob_token_id in self.series
+
+    def refresh(self) -> int:
+        """
+        Load price rows inserted since the last refresh.
+
+        The first refresh only reads rows within the longest window of the newest
+        price, later ones only rows with a larger rowid.
+
+        Returns
+        -------
+        int
+            Number of price points loaded.
+        """
+        db = PricesDB(self.db_path, log=False)
+        try:
+            tables = db.backend.tables(db.conn)
+            if db.TABLE not in tables:
+                return 0
+            newest = "NULL"
+            if db.LATEST_TABLE in tables:
+                newest = f"(SELECT max(date) FROM {db.LATEST_TABLE})"
+            bounds = db._read_data(
+                f"SELECT (SELECT max(rowid) FROM {db.TABLE}) AS last_rowid, {newest} AS last_date"
+            )
+            last_rowid, last_date = bounds.row(0)
+            if last_rowid is None or last_rowid <= self.last_rowid:
+                return 0
+            cutoff = 0 if last_date is None else last_date - self.horizon
+            df = db._read_data(
+                f"""SELECT clob_token_id, date, price FROM {db.TABLE}
+                    WHERE rowid > ? AND rowid <= ? AND date >= ?""",
+                (self.last_rowid, last_rowid, cutoff),
+            )
+        finally:
+            db.close()
+        self.last_rowid = last_rowid
+        loaded = self.observe(df)
+        logger.debug("Movers loaded %d prices (%d tokens)", loaded, len(self))
+        return loaded
+
+    def observe(self, df: pl.DataFrame) -> int:
+        """
+        Add price points (clob_token_id, date, price), e.g. a freshly fetched frame.
+
+        Returns
+        -------
+        int
+            Number of price points added.
+        """
+        if df is None or df.is_empty():
+            return 0
+        df = df.select(
+            pl.col("clob_token_id").cast(pl.String),
+            pl.col("date").cast(pl.Int64, strict=False),
+            pl.col("price").cast(pl.Float64, strict=False),
+        ).drop_nulls()
+        if df.is_empty():
+            return 0
+        newest = df["date"].max()
+        if self.last_date is None or newest > self.last_date:
+            self.last_date = newest
+        cutoff = self.last_date - self.horizon
+        touched, new = set(), []
+        for token, date, price in df.sort("date").iter_rows():
+            if date < cutoff:
+                continue
+            series = self.series.get(token)
+            if series is None:
+                series = self.series[token] = TokenSeries()
+                new.append(token)
+            series.add(date, price)
+            touched.add(token)
+        self._grow(new)
+        for token in touched:
+            series = self.series[token]
+            series.trim(cutoff)
+            i = self._index[token]
+            self._last_date[i] = series.dates[-1]
+            self._last_price[i] = series.prices[-1]
+            for refs in self._refs.values():
+                refs["dirty"].add(i)
+        return df.height
+
+    def _grow(self, new: list) -> None:
+        """Extend the per-token arrays to the tokens in 'new', seen for the first time."""
+        if not new:
+            return
+        for token in new:
+            self._index[token] = len(self.tokens)
+            self.tokens.append(token)
+        n = len(new)
+        self._last_date = np.concatenate([self._last_date, np.zeros(n, np.int64)])
+        self._last_price = np.concatenate([self._last_price, np.zeros(n, np.float64)])
+        for refs in self._refs.values():
+            refs["date"] = np.concatenate([refs["date"], np.zeros(n, np.int64)])
+            refs["price"] = np.concatenate([refs["price"], np.zeros(n, np.float64)])
+            refs["after"] = np.concatenate([refs["after"], np.zeros(n, np.float64)])
+
+    def _references(self, window: str, since: int) -> dict:
+        """Bring the reference prices of 'window' up to date for 'since'."""
+        refs = self._refs[window]
+        stale = refs["dirty"].union(np.flatnonzero(refs["after"] <= since).tolist())
+        for i in stale:
+            refs["date"][i], refs["price"][i], refs["after"][i] = self.series[
+                self.tokens[i]
+            ].reference(since)
+        refs["dirty"] = set()
+        return refs
+
+    def top_movers(
+        self, k: int = 10, windows: list = None, by: Literal["abs", "rel"] = "abs"
+    ) -> pl.DataFrame:
+        """
+        The 'k' tokens that moved most in each window.
+
+        A token moved in a window if it has a price inside it; the move is from the
+        last price at or before the window start (or its first price, for a series
+        starting later) to its newest price.
+
+        Parameters
+        ----------
+        k : int, optional
+            Tokens per window, by default 10.
+        windows : list, optional
+            Window names, by default every window of the engine.
+        by : str, optional
+            "abs" ranks by the absolute price change, "rel" by the absolute change
+            relative to the reference price, by default "abs".
+        Returns
+        -------
+        pl.DataFrame
+            window, clob_token_id, ref_date, ref_price, date, price, change and
+            rel_change; largest move first within each window.
+        """
+        frames = [pl.DataFrame(schema=MOVERS_SCHEMA)]
+        if self.last_date is None:
+            return frames[0]
+        for window in windows or list(self.windows):
+            since = self.last_date - self.windows[window]
+            refs = self._references(window, since)
+            change = self._last_price - refs["price"]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rel_change = np.where(refs["price"] != 0, change / refs["price"], np.nan)
+            key = np.abs(rel_change if by == "rel" else change)
+            moved = (self._last_date > since) & (refs["date"] < self._last_date)
+            key = np.where(moved & ~np.isnan(key), key, -1.0)
+            n = min(k, len(key))
+            if n == 0:
+                continue
+            top = np.argpartition(-key, n - 1)[:n]
+            top = top[np.argsort(-key[top], kind="stable")]
+            top = top[key[top] >= 0]
+            frames.append(
+                pl.DataFrame(
+                    {
+                        "window": [window] * len(top),
+                        "clob_token_id": [self.tokens[i] for i in top],
+                        "ref_date": refs["date"][top],
+                        "ref_price": refs["price"][top],
+                        "date": self._last_date[top],
+                        "price": self._last_price[top],
+                        "change": change[top],
+                        "rel_change": rel_change[top],
+                    },
+                    schema=MOVERS_SCHEMA,
+                ).with_columns(pl.col("rel_change").fill_nan(None))
+            )
+        return pl.concat(frames)
@@ -1,42 +1,49 @@
-import requests
+import time
+import logging
 import polars as pl
-import pandas as pd
+
+from ..helper import fetch_url
+from ..metrics import PARSE_SECONDS, ROWS_FETCHED
+
+logger = logging.getLogger(__name__)
 
 
 class PricesScraper:
     def __init__(self):
-        pass
+        self.prices_url = "https://clob.polymarket.com/prices-history"
 
     def fetch_prices(self, clob_token_id: str, interval: str = "1d"):
-        url = "https://clob.polymarket.com/prices-history"
+        params = self._prices_params(clob_token_id, interval)
+        logger.debug("Fetching prices for CLOB token %s", clob_token_id)
+        try:
+            response = fetch_url(self.prices_url, "clob/prices-history", params=params)
+            logger.debug("Response: %s", response)
+            response.raise_for_status()
+            return self._parse_prices(response.json(), clob_token_id)
+
+        except Exception as e:
+            logger.error("Error fetching prices for %s: %s", clob_token_id, e)
+            return None
 
-        params = {
+    def _prices_params(self, clob_token_id: str, interval: str) -> dict:
+        return {
             "market": int(clob_token_id),  # CRITICAL: This must be the Token/Asset ID
             "interval": interval,
             "fidelity": 60,  # Resolution in minutes (optional)
         }
-        print(f"CLOB: {clob_token_id}")
-        try:
-            response = requests.get(url, params=params)
-            print(f"RESPONSE: {response}")
-            response.raise_for_status()
-            data = response.json()
-
-            if not data.get("history"):
-                print("No history found. Check your Token ID.")
-                return None
-
-            # Convert to DataFrame for easier reading
-            df = pd.DataFrame(data["history"])
 
-            # Convert unix timestamp to readable date
-            df["date"] = pd.to_datetime(df["t"], unit="s")
-            df = df.rename(columns={"p": "price"})
-            df["clob_token_id"] = clob_token_id
-            df = pl.from_pandas(df)
-            df = df.with_columns(pl.col("date").dt.to_string("%Y-%m-%d %H:%M:%S"))
-            return df.select(["clob_token_id", "date", "price"])
-
-        except Exception as e:
-            print(f"Error fetching data: {e}")
+    def _parse_prices(self, data: dict, clob_token_id: str):
+        parse_start = time.perf_counter()
+        if not data.get("history"):
+            logger.info("No history found for token %s.", clob_token_id)
             return None
+
+        # Dates are stored as the unix timestamps the API returns.
+        df = pl.DataFrame(data["history"]).select(
+            clob_token_id=pl.lit(clob_token_id, dtype=pl.String),
+            date=pl.col("t").cast(pl.Int64),
+            price=pl.col("p").cast(pl.Float64),
+        )
+        PARSE_SECONDS.observe(time.perf_counter() - parse_start, stage="prices")
+        ROWS_FETCHED.inc(len(df), table="prices")
+        return df
@@ -0,0 +1,173 @@
+import time
+import logging
+import datetime as dt
+from pathlib import Path
+
+from .events.interface import safe_parse_embedded_lists
+from .events.local import EventsDB
+from .metrics import SQL_SECONDS
+from .prices.local import PricesDB
+
+logger = logging.getLogger(__name__)
+
+# Bucket sizes in seconds, price dates are epoch seconds.
+_HOUR = 3_600
+_DAY = 86_400
+
+
+def apply_retention(
+    db_path: str,
+    full_days: float = 7,
+    hourly_days: float = 90,
+    resolved: str = "archive",
+    resolved_days: float = 30,
+    archive_dir: str = "archive",
+    vacuum_pages: int = 2000,
+    chunk_size: int = 500,
+    now: dt.datetime = None,
+) -> dict:
+    """
+    Thin out price history so the database stops growing with time.
+
+    - Points newer than 'full_days' are kept as they are.
+    - Points between 'full_days' and 'hourly_days' old are reduced to the last
+      point of each hour.
+    - Older points are reduced to the last point of each day.
+    - Tokens of markets that closed more than 'resolved_days' ago are written to
+      Parquet under 'archive_dir' and deleted ('archive'), deleted ('drop') or
+      left alone ('keep'). Their row in latest_prices is kept.
+
+    Work is done in transactions of 'chunk_size' tokens so writers are not blocked
+    for long, and at most 'vacuum_pages' freed pages are returned to the file system
+    per run. Meant to be run periodically, each run only deletes newly aged points.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    full_days : float, optional
+        Days of full resolution history, by default 7.
+    hourly_days : float, optional
+        Days of hourly history, by default 90.
+    resolved : str, optional
+        'archive', 'drop' or 'keep', by default "archive".
+    resolved_days : float, optional
+        Days after a market closes before its history is archived, by default 30.
+    archive_dir : str, optional
+        Where archived history is written, by default "archive".
+    vacuum_pages : int, optional
+        Pages to reclaim per run, 0 for all, by default 2000.
+    chunk_size : int, optional
+        Tokens per transaction, by default 500.
+    now : dt.datetime, optional
+        Reference time, by default the current UTC time.
+    Returns
+    -------
+    dict
+        Rows archived, dropped and downsampled, and pages reclaimed.
+    """
+    if resolved not in ("archive", "drop", "keep"):
+        raise ValueError(f"resolved must be 'archive', 'drop' or 'keep', not {resolved!r}")
+    if hourly_days < full_days:
+        raise ValueError("hourly_days must be at least full_days")
+    now = now or dt.datetime.now(dt.timezone.utc)
+    full_cutoff = int((now - dt.timedelta(days=full_days)).timestamp())
+    hourly_cutoff = int((now - dt.timedelta(days=hourly_days)).timestamp())
+    stats = {
+        "archived": 0,
+        "dropped": 0,
+        "downsampled_hourly": 0,
+        "downsampled_daily": 0,
+        "pages_reclaimed": 0,
+    }
+
+    db = PricesDB(db_path, log=False)
+    try:
+        db._create_prices_table()
+        if resolved != "keep":
+            tokens = _resolved_tokens(db_path, now - dt.timedelta(days=resolved_days))
+            for chunk in _chunks(tokens, chunk_size):
+                if resolved == "archive":
+                    stats["archived"] += _archive_prices(db, chunk, archive_dir, now)
+                stats["dropped"] += _delete_prices(db, chunk)
+
+        tokens = db._read_data(f"SELECT clob_token_id FROM {db.LATEST_TABLE}")
+        for chunk in _chunks(tokens["clob_token_id"].to_list(), chunk_size):
+            stats["downsampled_hourly"] += _downsample(
+                db, chunk, hourly_cutoff, full_cutoff, _HOUR
+            )
+            stats["downsampled_daily"] += _downsample(db, chunk, 0, hourly_cutoff, _DAY)
+
+        stats["pages_reclaimed"] = db.backend.reclaim(db.conn, vacuum_pages)
+    finally:
+        db.close()
+    logger.info("Retention on %s: %s", db_path, stats)
+    return stats
+
+
+def _resolved_tokens(db_path: str, closed_before: dt.datetime) -> list:
+    """Tokens of markets in closed events whose contract ended before 'closed_before'."""
+    db = EventsDB(db_path, log=False)
+    try:
+        df = db._read_data(
+            f"""SELECT m.clob_token_ids
+                FROM {db.MARKET_TABLE} m
+                JOIN {db.TABLE} e ON e.id = m.event_id
+                WHERE e.closed = 1 AND m.contract_end < ?
+            """,
+            (int(closed_before.timestamp()),),
+        )
+    finally:
+        db.close()
+    if df.is_empty():
+        return []
+    tokens = safe_parse_embedded_lists(df, "clob_token_ids")["clob_token_ids"].explode()
+    return [t for t in tokens.unique().to_list() if t not in (None, "", "unk")]
+
+
+def _archive_prices(db: PricesDB, tokens: list, archive_dir: str, now: dt.datetime) -> int:
+    condition, params = db.backend.in_list("clob_token_id", tokens)
+    df = db._read_data(f"SELECT * FROM {db.TABLE} WHERE {condition}", params)
+    if df.is_empty():
+        return 0
+    out_dir = Path(archive_dir) / "prices"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = now.strftime("%Y%m%dT%H%M%S")
+    index = len(list(out_dir.glob(f"prices-{stamp}-*.parquet")))
+    df.write_parquet(out_dir / f"prices-{stamp}-{index:05d}.parquet", compression="zstd")
+    return len(df)
+
+
+def _delete_prices(db: PricesDB, tokens: list) -> int:
+    condition, params = db.backend.in_list("clob_token_id", tokens)
+    return _execute(db, f"DELETE FROM {db.TABLE} WHERE {condition}", params)
+
+
+def _downsample(db: PricesDB, tokens: list, start: int, end: int, bucket: int) -> int:
+    """Keep only the last point of every 'bucket' seconds between 'start' and 'end'."""
+    condition, params = db.backend.in_list("clob_token_id", tokens)
+    query = f"""DELETE FROM {db.TABLE} WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, row_number() OVER (
+                            PARTITION BY clob_token_id, date - date % {bucket}
+                            ORDER BY date DESC
+                        ) AS position
+                        FROM {db.TABLE}
+                        WHERE {condition} AND date >= ? AND date < ?
+                    ) WHERE position > 1
+                )
+            """
+    return _execute(db, query, (*params, start, end))
+
+
+def _execute(db: PricesDB, query: str, params: tuple) -> int:
+    db.flush()
+    start = time.perf_counter()
+    deleted = db.backend.write(db.conn, query, params)
+    SQL_SECONDS.observe(time.perf_counter() - start, op="retention", table=db.TABLE)
+    return deleted
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
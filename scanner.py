@@ -0,0 +1,147 @@
+import time
+from typing import Literal
+
+import polars as pl
+
+from .events.interface import safe_parse_embedded_lists
+from .events.local import EventsDB
+from .metrics import PARSE_SECONDS
+from .prices.local import PricesDB
+
+_LATEST_SCHEMA = {"clob_token_id": pl.String, "date": pl.Int64, "price": pl.Float64}
+
+
+def scan_markets(db_path: str, now: int = None) -> pl.DataFrame:
+    """
+    Price consistency of every market of every active event.
+
+    Markets, their outcome/token pairs and the latest price of each token are
+    joined in one pass, all per-market and per-event figures are group operations.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    now : int, optional
+        Epoch seconds ages are measured against, by default the current time.
+    Returns
+    -------
+    pl.DataFrame
+        One row per market: 'price_sum' (sum of its outcome prices), 'deviation'
+        ('price_sum' - 1, null unless every outcome has a price), 'yes_price',
+        'last_price' (epoch seconds of its oldest latest price), 'age' (seconds
+        since then) and 'sibling_lag' (seconds behind the freshest market of the
+        same event).
+    """
+    now = int(time.time()) if now is None else now
+    with EventsDB(db_path, log=False) as events_db:
+        markets = events_db._read_data(
+            f"""SELECT m.event_id, e.title AS event_title, m.market_id, m.title,
+                       m.outcomes, m.clob_token_ids, m.volume, m.contract_end
+                FROM {events_db.MARKET_TABLE} m
+                JOIN {events_db.TABLE} e ON e.id = m.event_id
+                WHERE e.active = 1"""
+        )
+    with PricesDB(db_path, log=False) as prices_db:
+        if prices_db.LATEST_TABLE in prices_db.backend.tables(prices_db.conn):
+            latest = prices_db._read_data(
+                f"SELECT clob_token_id, date, price FROM {prices_db.LATEST_TABLE}"
+            ).cast(_LATEST_SCHEMA)
+        else:
+            latest = pl.DataFrame(schema=_LATEST_SCHEMA)
+
+    with PARSE_SECONDS.time(stage="scan"):
+        markets = safe_parse_embedded_lists(markets, "outcomes")
+        markets = safe_parse_embedded_lists(markets, "clob_token_ids")
+        tokens = (
+            markets.filter(
+                pl.col("outcomes").list.len() == pl.col("clob_token_ids").list.len()
+            )
+            .explode("outcomes", "clob_token_ids")
+            .rename({"outcomes": "outcome", "clob_token_ids": "clob_token_id"})
+            .join(latest, on="clob_token_id", how="left")
+        )
+        is_yes = pl.col("outcome").str.to_lowercase() == "yes"
+        return (
+            tokens.group_by("event_id", "market_id", maintain_order=True)
+            .agg(
+                pl.col("event_title", "title", "volume", "contract_end").first(),
+                outcomes=pl.len(),
+                priced=pl.col("price").count(),
+                price_sum=pl.col("price").sum(),
+                yes_price=pl.col("price").filter(is_yes).first(),
+                last_price=pl.col("date").min(),
+            )
+            .with_columns(
+                deviation=pl.when(pl.col("priced") == pl.col("outcomes")).then(
+                    pl.col("price_sum") - 1
+                ),
+                age=now - pl.col("last_price"),
+                sibling_lag=pl.col("last_price").max().over("event_id") - pl.col("last_price"),
+            )
+        )
+
+
+def scan_events(
+    db_path: str,
+    min_markets: int = 2,
+    sort_by: Literal["deviation", "staleness"] = "deviation",
+    now: int = None,
+) -> pl.DataFrame:
+    """
+    Rank every active event by how far its prices are from consistent.
+
+    For an event whose markets are mutually exclusive outcomes (one binary market
+    per candidate), the 'Yes' prices should sum to 1; 'deviation' is that sum
+    minus 1. Gamma's negRisk flag is not stored, so events with at least
+    'min_markets' markets are assumed to be mutually exclusive; the others get a
+    null 'deviation' and rank by their market deviations alone. Every market's
+    own outcome prices should also sum to 1, the worst miss is
+    'max_market_deviation'. Staleness is the age of the oldest latest
+    price ('max_age') and how far the stalest market trails its freshest sibling
+    ('max_sibling_lag'), both in seconds.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the database.
+    min_markets : int, optional
+        Markets an event needs for its 'deviation' to be computed, by default 2.
+        Values below 2 are raised to 2, a lone market is never a full outcome set.
+    sort_by : str, optional
+        "deviation" ranks by the larger of the absolute event and market
+        deviations, "staleness" by 'max_sibling_lag', by default "deviation".
+    now : int, optional
+        Epoch seconds ages are measured against, by default the current time.
+    Returns
+    -------
+    pl.DataFrame
+        One row per event, most inconsistent first.
+    """
+    markets = scan_markets(db_path, now)
+    with PARSE_SECONDS.time(stage="scan"):
+        events = (
+            markets.group_by("event_id", maintain_order=True)
+            .agg(
+                pl.col("event_title").first(),
+                markets=pl.len(),
+                priced_markets=pl.col("yes_price").count(),
+                yes_sum=pl.col("yes_price").sum(),
+                max_market_deviation=pl.col("deviation").abs().max(),
+                max_age=pl.col("age").max(),
+                max_sibling_lag=pl.col("sibling_lag").max(),
+                volume=pl.col("volume").sum(),
+                contract_end=pl.col("contract_end").max(),
+            )
+            .with_columns(
+                deviation=pl.when(
+                    (pl.col("markets") >= max(min_markets, 2))
+                    & (pl.col("priced_markets") == pl.col("markets"))
+                ).then(pl.col("yes_sum") - 1)
+            )
+        )
+        if sort_by == "staleness":
+            key = pl.col("max_sibling_lag")
+        else:
+            key = pl.max_horizontal(pl.col("deviation").abs(), pl.col("max_market_deviation"))
+        return events.sort(key, descending=True, nulls_last=True)
@@ -0,0 +1,350 @@
+import os
+import logging
+import tempfile
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import polars as pl
+
+from .books.local import BooksDB
+from .crawl import CrawlCheckpoints
+from .database import Database
+from .events.local import EventsDB
+from .events.web import EventsScraper
+from .prices.local import PricesDB
+from .prices.web import PricesScraper
+
+logger = logging.getLogger(__name__)
+
+# latest_prices is rebuilt from the merged history instead of being copied.
+MERGE_TABLES = ("events", "markets", "descriptions", "history", "prices", "tags", "books")
+
+
+def sharded_price_backfill(
+    db_path: str,
+    clob_token_ids: list,
+    workers: int = None,
+    interval: str = "max",
+    shard_dir: str = None,
+    batch_size: int = 50,
+    keep_shards: bool = False,
+    job: str = None,
+) -> dict:
+    """
+    Backfill price history for many tokens using one process per core.
+
+    Tokens are split across 'workers' processes. Each process writes to its own
+    shard database, so there is no lock contention, and the shards are merged into
+    'db_path' at the end.
+
+    With 'job' set, every written batch is checkpointed. Running the same job again
+    merges whatever an interrupted run left in its shards, skips tokens already
+    done and retries only the ones that failed or were never reached.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the main database.
+    clob_token_ids : list
+        Tokens to backfill.
+    workers : int, optional
+        Number of processes, by default os.cpu_count().
+    interval : str, optional
+        History interval passed to the prices endpoint, by default "max".
+    shard_dir : str, optional
+        Where shard files are written, by default a temporary directory.
+    batch_size : int, optional
+        Tokens fetched per shard insert, by default 50.
+    keep_shards : bool, optional
+        Keep the shard files after merging, by default False.
+    job : str, optional
+        Checkpoint name that makes the backfill resumable, by default None.
+    Returns
+    -------
+    dict
+        Tokens fetched, tokens that failed, tokens skipped as already done and rows
+        merged per table.
+    """
+    tokens = list(dict.fromkeys(clob_token_ids))
+    return _run_sharded(
+        db_path,
+        tokens,
+        _price_worker,
+        (interval, batch_size),
+        workers,
+        shard_dir,
+        keep_shards,
+        job,
+    )
+
+
+def sharded_event_backfill(
+    db_path: str,
+    event_ids: list,
+    workers: int = None,
+    shard_dir: str = None,
+    batch_size: int = 50,
+    keep_shards: bool = False,
+    job: str = None,
+) -> dict:
+    """
+    Fetch many events (and their markets) using one process per core.
+
+    With 'job' set the backfill is resumable, see 'sharded_price_backfill'.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the main database.
+    event_ids : list
+        Events to fetch.
+    workers : int, optional
+        Number of processes, by default os.cpu_count().
+    shard_dir : str, optional
+        Where shard files are written, by default a temporary directory.
+    batch_size : int, optional
+        Events fetched per shard insert, by default 50.
+    keep_shards : bool, optional
+        Keep the shard files after merging, by default False.
+    job : str, optional
+        Checkpoint name that makes the backfill resumable, by default None.
+    Returns
+    -------
+    dict
+        Events fetched, events that failed, events skipped as already done and rows
+        merged per table.
+    """
+    ids = list(dict.fromkeys(str(i) for i in event_ids))
+    return _run_sharded(
+        db_path, ids, _event_worker, (batch_size,), workers, shard_dir, keep_shards, job
+    )
+
+
+def merge_shards(db_path: str, shard_paths: list, tables: tuple = MERGE_TABLES) -> dict:
+    """
+    Merge shard databases into 'db_path' with ATTACH + INSERT OR IGNORE ... SELECT.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the main database.
+    shard_paths : list
+        Shard database files.
+    tables : tuple, optional
+        Tables to merge when present in a shard, by default events, markets, prices, tags.
+    Returns
+    -------
+    dict
+        Rows inserted per table.
+    """
+    # Make sure every table, index and search index exists in the main database.
+    EventsDB(db_path, log=False).close()
+    prices = PricesDB(db_path, log=False)
+    prices._create_prices_table()
+    prices.close()
+    BooksDB(db_path, log=False).close()
+
+    merged = {}
+    db = Database(db_path, log=False)
+    try:
+        for shard_path in shard_paths:
+            _migrate_shard(shard_path)
+            for table, rows in db._merge_from(shard_path, tables).items():
+                merged[table] = merged.get(table, 0) + rows
+    finally:
+        db.close()
+    if merged.get("prices"):
+        # Merged rows bypass the insert path that keeps 'latest_prices' current.
+        prices = PricesDB(db_path, log=False)
+        prices._rebuild_latest_prices()
+        prices.close()
+    if merged.get("events") or merged.get("markets"):
+        events = EventsDB(db_path, log=False)
+        # Shards written before descriptions were compressed still carry plain text.
+        events._compress_descriptions(events.TABLE)
+        events._compress_descriptions(events.MARKET_TABLE)
+        events._index_missing_search_rows()
+        events.close()
+    return merged
+
+
+def _migrate_shard(shard_path: str) -> None:
+    """Shards written by an older version are brought to the current schema first."""
+    shard = Database(shard_path, log=False)
+    existing = shard.backend.tables(shard.conn)
+    shard.close()
+    if "events" in existing:
+        EventsDB(shard_path, log=False).close()
+    PricesDB(shard_path, log=False).close()
+
+
+def _run_sharded(
+    db_path, items, worker, worker_args, workers, shard_dir, keep_shards, job=None
+):
+    stem = Path(db_path).stem
+    skipped = 0
+    # A directory the caller passed is theirs, only one made here is removed.
+    own_dir = not shard_dir
+    if job:
+        # A fixed shard directory, so a rerun finds what an interrupted run left.
+        shard_dir = Path(shard_dir or Path(db_path).with_name(f"{stem}.{job}.shards"))
+        _recover_shards(db_path, sorted(shard_dir.glob(f"{stem}.shard*.db")))
+        checkpoints = CrawlCheckpoints(db_path, log=False)
+        checkpoints._start_job(job)
+        finished = checkpoints._done_items(job)
+        checkpoints.close()
+        remaining = [item for item in items if str(item) not in finished]
+        skipped = len(items) - len(remaining)
+        if skipped:
+            logger.info("Job %s: skipping %d items already done", job, skipped)
+        items = remaining
+    workers = max(1, min(workers or os.cpu_count() or 1, len(items) or 1))
+    shard_dir = Path(shard_dir or tempfile.mkdtemp(prefix="pms-shards-"))
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    for i in range(workers):
+        part = items[i::workers]
+        if part:
+            jobs.append((str(shard_dir / f"{stem}.shard{i}.db"), part))
+
+    done, failed = 0, []
+    shard_paths = []
+    # polars' thread pool does not survive fork once the parent has used it.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(worker, path, part, *worker_args, job) for path, part in jobs
+        ]
+        for future in as_completed(futures):
+            shard_path, fetched, shard_failed = future.result()
+            shard_paths.append(shard_path)
+            done += fetched
+            failed += shard_failed
+            logger.info(
+                "Shard %s finished: %d fetched, %d failed",
+                shard_path,
+                fetched,
+                len(shard_failed),
+            )
+
+    merged = merge_shards(db_path, sorted(shard_paths))
+    if job:
+        _copy_checkpoints(db_path, shard_paths)
+    if not keep_shards:
+        for path in shard_paths:
+            _remove_shard(path)
+        if own_dir and not any(shard_dir.iterdir()):
+            shard_dir.rmdir()
+    return {"fetched": done, "failed": failed, "skipped": skipped, "merged": merged}
+
+
+def _recover_shards(db_path: str, shard_paths: list) -> None:
+    """Merge shards left behind by an interrupted run, then remove them."""
+    if not shard_paths:
+        return
+    logger.info("Recovering %d shards from an interrupted run", len(shard_paths))
+    shard_paths = [str(path) for path in shard_paths]
+    merge_shards(db_path, shard_paths)
+    _copy_checkpoints(db_path, shard_paths)
+    for path in shard_paths:
+        _remove_shard(path)
+
+
+def _copy_checkpoints(db_path: str, shard_paths: list) -> None:
+    checkpoints = CrawlCheckpoints(db_path, log=False)
+    try:
+        for path in shard_paths:
+            shard = CrawlCheckpoints(path, log=False)
+            checkpoints._copy_from(shard)
+            shard.close()
+    finally:
+        checkpoints.close()
+
+
+def _remove_shard(path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(path + suffix).unlink(missing_ok=True)
+
+
+def _price_worker(
+    shard_path: str, tokens: list, interval: str, batch_size: int, job: str = None
+):
+    db = PricesDB(shard_path, log=False)
+    db._create_prices_table()
+    checkpoints = _ShardCheckpoints(shard_path, job)
+    scraper = PricesScraper()
+    fetched, failed, batch, batch_tokens = 0, [], [], []
+    for token in tokens:
+        df = scraper.fetch_prices(token, interval=interval)
+        if df is None:
+            failed.append(token)
+            checkpoints.failed([token], "No price history returned")
+            continue
+        batch.append(df)
+        batch_tokens.append(token)
+        fetched += 1
+        if len(batch) >= batch_size:
+            db._insert_price_data(pl.concat(batch))
+            checkpoints.done(batch_tokens)
+            batch, batch_tokens = [], []
+    if batch:
+        db._insert_price_data(pl.concat(batch))
+        checkpoints.done(batch_tokens)
+    db.close()
+    checkpoints.close()
+    return shard_path, fetched, failed
+
+
+def _event_worker(shard_path: str, event_ids: list, batch_size: int, job: str = None):
+    db = EventsDB(shard_path, log=False)
+    checkpoints = _ShardCheckpoints(shard_path, job)
+    scraper = EventsScraper()
+    fetched, failed, events, markets, batch_ids = 0, [], [], [], []
+    for event_id in event_ids:
+        # No end-date window: backfills want the markets of ended events too.
+        result = scraper.fetch_event_by_X(event_id, "", resolve_threshold=None)
+        if result is None:
+            # _fetch_data logged the request error and returned None.
+            failed.append(event_id)
+            checkpoints.failed([event_id], "Request failed")
+            continue
+        event_data, market_data = result
+        events.append(event_data)
+        markets.append(market_data)
+        batch_ids.append(event_id)
+        fetched += 1
+        if len(events) >= batch_size:
+            db._insert_event_data(pl.concat(events, how="vertical_relaxed"))
+            db._insert_markets_data(pl.concat(markets, how="vertical_relaxed"))
+            checkpoints.done(batch_ids)
+            events, markets, batch_ids = [], [], []
+    if events:
+        db._insert_event_data(pl.concat(events, how="vertical_relaxed"))
+        db._insert_markets_data(pl.concat(markets, how="vertical_relaxed"))
+        checkpoints.done(batch_ids)
+    db.close()
+    checkpoints.close()
+    return shard_path, fetched, failed
+
+
+class _ShardCheckpoints:
+    """Records a worker's progress in its shard, a no-op when there is no job."""
+
+    def __init__(self, shard_path: str, job: str = None):
+        self.job = job
+        self.db = CrawlCheckpoints(shard_path, log=False) if job else None
+
+    def done(self, items: list) -> None:
+        if self.db is not None:
+            # Only called once the batch is written, so a crash never marks lost work.
+            self.db._mark_items(self.job, items, "done")
+
+    def failed(self, items: list, error: str) -> None:
+        if self.db is not None:
+            self.db._mark_items(self.job, items, "failed", error)
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
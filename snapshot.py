@@ -0,0 +1,236 @@
+import json
+import shutil
+import operator
+import logging
+import datetime as dt
+from pathlib import Path
+
+import polars as pl
+
+from .backends import frame_from_rows
+from .database import Database, batch_values, is_batch, is_blank
+from .events.local import EventsDB
+from .prices.local import PricesDB
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLES = ("events", "markets", "descriptions", "prices", "tags")
+PARTITION_SCHEMA = {"clob_token_id": pl.String, "month": pl.String}
+
+# Interface filter name -> column, per table.
+FILTER_COLUMNS = {
+    "events": {"event_id": "id", "event_name": "name"},
+    "markets": {"event_id": "event_id", "market_id": "market_id", "market_name": "name"},
+    "prices": {
+        "clob_token_id": "clob_token_id",
+        "date": "date",
+        "start": ("date", ">="),
+        "end": ("date", "<="),
+    },
+    "tags": {"tag_id": "id", "tag_name": "name"},
+}
+_OPERATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt}
+
+
+def export_snapshot(
+    db_path: str,
+    out_dir: str,
+    formats: tuple = ("parquet", "ipc"),
+    tables: tuple = SNAPSHOT_TABLES,
+    batch_size: int = 1_000_000,
+    compression: str = "zstd",
+    overwrite: bool = False,
+) -> dict:
+    """
+    Write a consistent snapshot of the database to Parquet and/or Arrow IPC.
+
+    Every table is read inside one read transaction, so the snapshot reflects a
+    single point in time even while an ingester keeps writing. Prices are read in
+    batches; in Parquet they are partitioned as
+    'prices/clob_token_id=<id>/month=<YYYY-MM>/part-0.parquet', in IPC they are
+    split into uncompressed part files that can be memory-mapped. The snapshot is
+    built next to 'out_dir' and moved into place when complete.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to database.
+    out_dir : str
+        Snapshot directory.
+    formats : tuple, optional
+        Any of "parquet" and "ipc", by default both.
+    tables : tuple, optional
+        Tables to export, by default events, markets, prices and tags.
+    batch_size : int, optional
+        Price rows read per batch, by default 1_000_000.
+    compression : str, optional
+        Parquet compression codec, by default "zstd".
+    overwrite : bool, optional
+        Replace an existing snapshot at 'out_dir', by default False.
+    Returns
+    -------
+    dict
+        The snapshot manifest, also written to 'manifest.json'.
+    """
+    out_dir = Path(out_dir)
+    if out_dir.exists() and not overwrite:
+        raise FileExistsError(f"Snapshot directory already exists: {out_dir}")
+    tmp_dir = out_dir.with_name(f".{out_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for fmt in formats:
+        (tmp_dir / fmt).mkdir(parents=True)
+
+    manifest = {
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "db_path": str(db_path),
+        "formats": list(formats),
+        "tables": {},
+    }
+    db = Database(db_path, log=False)
+    existing = db.backend.tables(db.conn)
+    # Bring older databases to the current schema before reading them.
+    if "events" in existing:
+        EventsDB(db_path, log=False).close()
+    PricesDB(db_path, log=False).close()
+    try:
+        db.conn.execute("BEGIN")
+        for table in tables:
+            if table not in existing:
+                continue
+            if table == "prices":
+                rows = _export_prices(db, tmp_dir, formats, batch_size, compression)
+            else:
+                df = _read_all(db, f"SELECT * FROM {table}")
+                if "parquet" in formats:
+                    df.write_parquet(
+                        tmp_dir / "parquet" / f"{table}.parquet", compression=compression
+                    )
+                if "ipc" in formats:
+                    df.write_ipc(tmp_dir / "ipc" / f"{table}.arrow")
+                rows = df.height
+            manifest["tables"][table] = {"rows": rows}
+            logger.info("Exported %d rows from %s", rows, table)
+    finally:
+        db.conn.rollback()
+        db.close()
+
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    tmp_dir.rename(out_dir)
+    return manifest
+
+
+def scan_table(snapshot_dir: str, table: str, format: str = "parquet") -> pl.LazyFrame:
+    """
+    Lazily scan one table of a snapshot.
+
+    Filters and column selections applied to the LazyFrame are pushed down to the
+    files: Parquet row groups and price partitions that cannot match are skipped,
+    IPC files are memory-mapped.
+
+    Parameters
+    ----------
+    snapshot_dir : str
+        Directory written by 'export_snapshot'.
+    table : str
+        Table name.
+    format : str, optional
+        "parquet" or "ipc", by default "parquet".
+    Returns
+    -------
+    pl.LazyFrame
+    """
+    base = Path(snapshot_dir) / format
+    if format == "parquet":
+        if table == "prices":
+            return pl.scan_parquet(
+                base / "prices" / "**" / "*.parquet",
+                hive_partitioning=True,
+                hive_schema=PARTITION_SCHEMA,
+            ).select("clob_token_id", "date", "price")
+        return pl.scan_parquet(base / f"{table}.parquet")
+    if format == "ipc":
+        if table == "prices":
+            return pl.scan_ipc(base / "prices" / "*.arrow")
+        return pl.scan_ipc(base / f"{table}.arrow")
+    raise ValueError(f"Unknown snapshot format: {format}")
+
+
+def read_snapshot(
+    snapshot_dir: str, table: str, format: str = "parquet", columns: list = None, **filters
+) -> pl.DataFrame:
+    """
+    Read rows of a snapshot table matching the interface-style 'filters'.
+
+    Filters use the same names as the interface functions (e.g. event_id,
+    market_name, clob_token_id); empty values are ignored and lists match any of
+    their values. If 'columns' is given only those columns are read.
+    """
+    lf = scan_table(snapshot_dir, table, format)
+    column_map = FILTER_COLUMNS.get(table, {})
+    for arg, value in filters.items():
+        if arg in column_map and not is_blank(value):
+            column = column_map[arg]
+            if isinstance(column, tuple):
+                column, op = column
+                lf = lf.filter(_OPERATORS[op](pl.col(column), value))
+            elif is_batch(value):
+                lf = lf.filter(pl.col(column).is_in(batch_values(value)))
+            else:
+                lf = lf.filter(pl.col(column) == value)
+    if columns:
+        lf = lf.select(list(dict.fromkeys(columns)))
+    return lf.collect()
+
+
+def _read_all(db: Database, query: str) -> pl.DataFrame:
+    # Not db._read_data: it would commit and end the snapshot transaction.
+    cur = db.conn.execute(query)
+    return frame_from_rows(cur.fetchall(), [col[0] for col in cur.description])
+
+
+def _export_prices(db, out_dir, formats, batch_size, compression) -> int:
+    cur = db.conn.execute(
+        "SELECT clob_token_id, date, price FROM prices ORDER BY clob_token_id, date"
+    )
+    columns = [col[0] for col in cur.description]
+    if "ipc" in formats:
+        (out_dir / "ipc" / "prices").mkdir(parents=True, exist_ok=True)
+    carry = None
+    total = 0
+    part = 0
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        df = frame_from_rows(rows, columns).with_columns(
+            pl.col("date").cast(pl.Int64), pl.col("price").cast(pl.Float64, strict=False)
+        )
+        total += df.height
+        if "ipc" in formats:
+            df.write_ipc(out_dir / "ipc" / "prices" / f"part-{part:05d}.arrow")
+            part += 1
+        if "parquet" in formats:
+            df = df.with_columns(
+                month=pl.from_epoch("date", time_unit="s").dt.strftime("%Y-%m")
+            )
+            if carry is not None:
+                df = pl.concat([carry, df])
+            # Rows are ordered, so only the last partition can continue in the next batch.
+            last = df.select("clob_token_id", "month").row(-1)
+            done = (pl.col("clob_token_id") != last[0]) | (pl.col("month") != last[1])
+            _write_price_partitions(df.filter(done), out_dir, compression)
+            carry = df.filter(~done)
+    if carry is not None:
+        _write_price_partitions(carry, out_dir, compression)
+    return total
+
+
+def _write_price_partitions(df: pl.DataFrame, out_dir: Path, compression: str) -> None:
+    for (token, month), part in df.group_by(["clob_token_id", "month"]):
+        path = out_dir / "parquet" / "prices" / f"clob_token_id={token}" / f"month={month}"
+        path.mkdir(parents=True, exist_ok=True)
+        part.select("date", "price").write_parquet(
+            path / "part-0.parquet", compression=compression
+        )
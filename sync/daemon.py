@@ -0,0 +1,314 @@
+import signal
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+
+from .scheduler import PriorityScheduler, Task, priority, refresh_interval
+from ..events.interface import (
+    calc_dtr,
+    safe_parse_embedded_lists,
+    update_active_status,
+    update_closed_status,
+    update_expired_markets,
+)
+from ..events.local import EventsDB
+from ..events.web import EventsScraper
+from ..metrics import SYNC_REJECTED, SYNC_TASK_SECONDS, SYNC_TASKS
+from ..prices.local import PricesDB
+from ..prices.web import PricesScraper
+from ..retention import apply_retention
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue:
+    """
+    A scheduler plus a bounded worker pool.
+
+    At most 'workers' tasks run at once. Due tasks wait in the scheduler until a
+    worker is free, so a slow API backs work up in the heap instead of in memory
+    behind the executor. Recurring tasks are re-scheduled after they finish for as
+    long as their key is wanted.
+    """
+
+    def __init__(self, name: str, workers: int = 1, max_pending: int = 100_000):
+        self.name = name
+        self.scheduler = PriorityScheduler(max_pending)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix=f"pms-{name}")
+        self.wanted = set()
+        self.running = set()
+        # Latest task pushed for a running key, used when it is re-scheduled.
+        self._updates = {}
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+
+    def schedule(self, task: Task, due: float = None) -> bool:
+        with self._lock:
+            self.wanted.add(task.key)
+            if task.key in self.running:
+                self._updates[task.key] = task
+                return True
+        if not self.scheduler.push(task, due):
+            SYNC_REJECTED.inc(queue=self.name)
+            return False
+        return True
+
+    def retain(self, keys: set) -> None:
+        """Stop scheduling every key that is not in 'keys'."""
+        with self._lock:
+            self.wanted = set(keys)
+        for key in self.scheduler.keys():
+            if key not in keys:
+                self.scheduler.discard(key)
+
+    def dispatch(self, now: float = None) -> int:
+        submitted = 0
+        while self._slots.acquire(blocking=False):
+            task = self.scheduler.pop_due(now)
+            if task is None:
+                self._slots.release()
+                break
+            with self._lock:
+                self.running.add(task.key)
+            self.executor.submit(self._run, task)
+            submitted += 1
+        return submitted
+
+    def next_due(self) -> float:
+        return self.scheduler.next_due()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, task: Task) -> None:
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            task.run()
+        except Exception:
+            status = "error"
+            logger.exception("%s task %s failed", self.name, task.key)
+        finally:
+            SYNC_TASK_SECONDS.observe(time.perf_counter() - start, queue=self.name)
+            SYNC_TASKS.inc(queue=self.name, status=status)
+            with self._lock:
+                self.running.discard(task.key)
+                task = self._updates.pop(task.key, task)
+                wanted = task.key in self.wanted
+            self._slots.release()
+            if wanted and task.interval:
+                self.schedule(task, time.time() + task.interval)
+
+
+class SyncDaemon:
+    """
+    Keeps a database fresh, spending API calls where freshness matters.
+
+    Four queues run side by side, five with retention enabled:
+
+    - catalogue: crawls the top active events for new events and markets.
+    - prices: refreshes each active token's price history.
+    - status: re-fetches each active event to pick up active/closed changes.
+    - expiry: closes events whose end date has passed (local only).
+    - retention: downsamples and archives old price history every
+      'retention_interval' seconds, see 'apply_retention'.
+
+    Price and status refreshes are re-planned from the database every
+    'plan_interval' seconds, with an interval from 'min_interval' for markets
+    resolving within a day up to 'max_interval' for far-dated ones.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        catalogue_interval: float = 900.0,
+        expiry_interval: float = 300.0,
+        plan_interval: float = 60.0,
+        min_interval: float = 60.0,
+        max_interval: float = 3600.0,
+        price_workers: int = 4,
+        status_workers: int = 2,
+        max_pending: int = 50_000,
+        catalogue_limit: int = 100,
+        retention_interval: float = 0.0,
+        retention_options: dict = None,
+    ):
+        self.db_path = db_path
+        self.catalogue_interval = catalogue_interval
+        self.expiry_interval = expiry_interval
+        self.plan_interval = plan_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.catalogue_limit = catalogue_limit
+        self.retention_interval = retention_interval
+        self.retention_options = retention_options or {}
+        self.queues = {
+            "catalogue": WorkQueue("catalogue", 1, 1),
+            "prices": WorkQueue("prices", price_workers, max_pending),
+            "status": WorkQueue("status", status_workers, max_pending),
+            "expiry": WorkQueue("expiry", 1, 1),
+        }
+        if retention_interval:
+            self.queues["retention"] = WorkQueue("retention", 1, 1)
+        self._stop = threading.Event()
+        self._next_plan = 0.0
+
+    def run(self, duration: float = None) -> None:
+        """
+        Run until stopped, or for 'duration' seconds.
+
+        SIGINT and SIGTERM stop the daemon when it runs on the main thread.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, lambda *_: self.stop())
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        deadline = None if duration is None else time.time() + duration
+        self.queues["catalogue"].schedule(
+            Task(("catalogue",), self._crawl_catalogue, (), self.catalogue_interval)
+        )
+        self.queues["expiry"].schedule(
+            Task(("expiry",), update_expired_markets, (self.db_path,), self.expiry_interval)
+        )
+        if self.retention_interval:
+            self.queues["retention"].schedule(
+                Task(("retention",), self._apply_retention, (), self.retention_interval),
+                time.time() + self.retention_interval,
+            )
+        logger.info("Sync daemon started on %s", self.db_path)
+        try:
+            while not self._stop.is_set():
+                now = time.time()
+                if deadline is not None and now >= deadline:
+                    break
+                if now >= self._next_plan:
+                    self._plan(now)
+                for queue in self.queues.values():
+                    queue.dispatch(now)
+                self._stop.wait(self._sleep_time(deadline))
+        finally:
+            for queue in self.queues.values():
+                queue.shutdown()
+            logger.info("Sync daemon stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _sleep_time(self, deadline: float) -> float:
+        wake = [self._next_plan]
+        wake += [due for due in (q.next_due() for q in self.queues.values()) if due]
+        if deadline is not None:
+            wake.append(deadline)
+        return min(1.0, max(0.05, min(wake) - time.time()))
+
+    def _plan(self, now: float) -> None:
+        self._next_plan = now + self.plan_interval
+        markets = self._active_markets()
+        price_keys, status_keys = set(), set()
+        event_urgency = {}
+        for event_id, dtr, volume, tokens in markets.select(
+            "event_id", "dtr", "volume", "clob_token_ids"
+        ).iter_rows():
+            interval = refresh_interval(
+                dtr, volume, self.min_interval, self.max_interval
+            )
+            rank = priority(dtr, volume)
+            for token in tokens:
+                if token in ("", "unk"):
+                    continue
+                key = ("prices", token)
+                price_keys.add(key)
+                self.queues["prices"].schedule(
+                    Task(key, self._sync_prices, (token,), interval, rank), now
+                )
+            best = event_urgency.get(event_id)
+            if best is None or interval < best[0]:
+                event_urgency[event_id] = (interval, rank)
+        for event_id, (interval, rank) in event_urgency.items():
+            key = ("status", event_id)
+            status_keys.add(key)
+            self.queues["status"].schedule(
+                Task(key, self._sync_status, (event_id,), interval, rank), now
+            )
+        self.queues["prices"].retain(price_keys)
+        self.queues["status"].retain(status_keys)
+        logger.info(
+            "Planned %d price and %d status refreshes", len(price_keys), len(status_keys)
+        )
+
+    def _active_markets(self) -> pl.DataFrame:
+        db = EventsDB(self.db_path, log=False)
+        try:
+            df = db._read_data(
+                f"""SELECT m.event_id, m.volume, m.clob_token_ids, m.contract_end
+                    FROM {db.MARKET_TABLE} m
+                    JOIN {db.TABLE} e ON e.id = m.event_id
+                    WHERE e.active = 1 AND e.closed = 0
+                """
+            )
+        finally:
+            db.close()
+        if df.is_empty():
+            return pl.DataFrame(
+                schema={
+                    "event_id": pl.String,
+                    "dtr": pl.Int64,
+                    "volume": pl.Float64,
+                    "clob_token_ids": pl.List(pl.String),
+                }
+            )
+        df = calc_dtr(df, "contract_end").filter(pl.col("dtr") >= 0)
+        return safe_parse_embedded_lists(df, "clob_token_ids")
+
+    def _sync_prices(self, clob_token_id: str) -> None:
+        df = PricesScraper().fetch_prices(clob_token_id)
+        if df is None:
+            return
+        db = PricesDB(self.db_path, log=False)
+        try:
+            db._create_prices_table()
+            db._insert_price_data(df)
+        finally:
+            db.close()
+
+    def _sync_status(self, event_id: str) -> None:
+        result = EventsScraper().fetch_event_by_X(event_id, "")
+        if result is None:
+            return
+        event_data, market_data = result
+        if event_data.is_empty():
+            return
+        active, closed = event_data.select("active", "closed").row(0)
+        db = EventsDB(self.db_path, log=False)
+        try:
+            db._insert_markets_data(market_data)
+            # Events are insert-or-ignore, the history still gets the new volume.
+            db._record_history("event", event_data)
+            current = db._read_event_data(event_id).select("active", "closed")
+        finally:
+            db.close()
+        if current.is_empty():
+            return
+        if bool(current["active"][0]) != bool(active):
+            update_active_status(self.db_path, event_id, active)
+        if bool(current["closed"][0]) != bool(closed):
+            update_closed_status(self.db_path, event_id, closed)
+
+    def _apply_retention(self) -> None:
+        apply_retention(self.db_path, **self.retention_options)
+
+    def _crawl_catalogue(self) -> None:
+        result = EventsScraper().fetch_top_active_markets(self.catalogue_limit)
+        if result is None:
+            return
+        event_data, market_data = result
+        db = EventsDB(self.db_path, log=False)
+        try:
+            db._insert_event_data(event_data)
+            db._insert_markets_data(market_data)
+        finally:
+            db.close()
+        # Plan straight away so new markets start syncing.
+        self._next_plan = 0.0
@@ -0,0 +1,153 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+
+def refresh_interval(
+    dtr: float,
+    volume: float = 0.0,
+    min_interval: float = 60.0,
+    max_interval: float = 3600.0,
+    near_dtr: float = 1.0,
+    far_dtr: float = 30.0,
+    volume_boost: float = 1_000_000.0,
+) -> float:
+    """
+    How often (in seconds) a market should be refreshed.
+
+    Markets resolving within 'near_dtr' days get 'min_interval', markets resolving
+    after 'far_dtr' days get 'max_interval', with a log-scale ramp in between.
+    High volume shortens the interval, down to 'min_interval'.
+
+    Parameters
+    ----------
+    dtr : float
+        Days to resolution.
+    volume : float, optional
+        Traded volume, by default 0.0.
+    min_interval : float, optional
+        Shortest interval in seconds, by default 60.0.
+    max_interval : float, optional
+        Longest interval in seconds, by default 3600.0.
+    near_dtr : float, optional
+        At or below this dtr the interval is 'min_interval', by default 1.0.
+    far_dtr : float, optional
+        At or above this dtr the interval is 'max_interval', by default 30.0.
+    volume_boost : float, optional
+        Volume at which the interval is halved, by default 1_000_000.0.
+    Returns
+    -------
+    float
+        Refresh interval in seconds.
+    """
+    if dtr is None or dtr <= near_dtr:
+        return min_interval
+    if dtr >= far_dtr:
+        interval = max_interval
+    else:
+        ratio = math.log(dtr / near_dtr) / math.log(far_dtr / near_dtr)
+        interval = min_interval * (max_interval / min_interval) ** ratio
+    if volume and volume > 0:
+        interval /= 1 + volume / volume_boost
+    return max(min_interval, min(max_interval, interval))
+
+
+def priority(dtr: float, volume: float = 0.0) -> float:
+    """Higher for markets resolving soon and trading heavily."""
+    return math.log1p(max(volume or 0.0, 0.0)) / (1.0 + max(dtr or 0.0, 0.0))
+
+
+class Task:
+    __slots__ = ("key", "func", "args", "interval", "priority")
+
+    def __init__(self, key, func, args: tuple = (), interval: float = 60.0, priority: float = 0.0):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.interval = interval
+        self.priority = priority
+
+    def run(self):
+        return self.func(*self.args)
+
+
+class PriorityScheduler:
+    """
+    Time-ordered task heap with at most one pending entry per task key.
+
+    Tasks are ordered by due time, then by priority. Pushing a key that is already
+    pending replaces its task but keeps its due time, brought forward by however
+    much the interval shrank.
+    """
+
+    def __init__(self, max_pending: int = 100_000):
+        self.max_pending = max_pending
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def push(self, task: Task, due: float = None) -> bool:
+        """Schedule 'task' at 'due' (epoch seconds). Returns False when full."""
+        due = time.time() if due is None else due
+        with self._lock:
+            current = self._entries.get(task.key)
+            if current is not None:
+                pending = current[3]
+                due = current[0] - max((pending.interval or 0) - (task.interval or 0), 0)
+                if due == current[0] and task.priority == pending.priority:
+                    current[3] = task
+                    return True
+                # The heap is ordered by the entry, so it is dropped and pushed again.
+                current[3] = None
+            elif len(self._entries) >= self.max_pending:
+                return False
+            entry = [due, -task.priority, next(self._counter), task]
+            self._entries[task.key] = entry
+            heapq.heappush(self._heap, entry)
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                # Re-planning drops entries faster than they reach the top of the heap.
+                self._heap = [e for e in self._heap if e[3] is not None]
+                heapq.heapify(self._heap)
+            return True
+
+    def pop_due(self, now: float = None) -> Task:
+        """Remove and return the most urgent due task, or None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._heap:
+                due, _, _, task = self._heap[0]
+                if task is None:
+                    heapq.heappop(self._heap)
+                    continue
+                if due > now:
+                    return None
+                heapq.heappop(self._heap)
+                del self._entries[task.key]
+                return task
+            return None
+
+    def next_due(self) -> float:
+        """Due time of the next task, or None if nothing is pending."""
+        with self._lock:
+            while self._heap and self._heap[0][3] is None:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def discard(self, key) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                entry[3] = None
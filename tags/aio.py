@@ -0,0 +1,35 @@
+import logging
+
+from .local import TagsDB
+from .web import TAGS_URL, _parse_tags
+from ..aio import HTTPError, fetch_url_async, get_data_async
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_tag_id_async(tag_name: str = ""):
+    """Async counterpart of 'fetch_tag_id'."""
+    try:
+        response = await fetch_url_async(TAGS_URL, "gamma/tags")
+        response.raise_for_status()
+        return _parse_tags(response.json(), tag_name)
+    except HTTPError as e:
+        logger.error("Error fetching tags: %s", e)
+        return None
+
+
+async def get_tag_id_async(
+    db_path: str, tag_name: str = "", tag_id: str = "", force_update: bool = False
+):
+    """Async counterpart of 'get_tag_id', takes the same parameters."""
+    params = {"tag_name": tag_name, "tag_id": tag_id}
+    return await get_data_async(
+        TagsDB,
+        db_path,
+        read_method="_read_tags_data",
+        read_params=params,
+        fetch_func=fetch_tag_id_async,
+        fetch_params=params,
+        insert_methods="_insert_tags_data",
+        force_update=force_update,
+    )
@@ -16,4 +16,4 @@ def get_tag_id(
         db._insert_tags_data,
         force_update=force_update,
     )
-    print(data)
+    return data
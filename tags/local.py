@@ -1,11 +1,14 @@
+import logging
 import polars as pl
-from ..database import Database
+from ..database import Database, is_blank
+
+logger = logging.getLogger(__name__)
 
 
 class TagsDB(Database):
-    def __init__(self, db_path: str, log: bool = True):
+    def __init__(self, db_path: str, log: bool = True, read_only: bool = None):
         self.TABLE = "tags"
-        super().__init__(db_path, log)
+        super().__init__(db_path, log, read_only=read_only)
         self._create_tags_table()
 
     def _create_tags_table(self):
@@ -23,17 +26,15 @@ class TagsDB(Database):
                 """
         self._insert_data(df, query)
 
-    def _read_tags_data(self, tag_id: str, tag_name: str = ""):
+    def _read_tags_data(self, tag_id: str | list, tag_name: str | list = ""):
         query = f"""SELECT * FROM {self.TABLE}"""
-
-        if tag_id is not None and tag_id != "":
-            query += " WHERE id = ?"
-            params = (tag_id,)
-        elif tag_name is not None and tag_name != "":
-            query += " WHERE name = ?"
-            params = (tag_name,)
-        else:
-            params = ()
-        print(f"QUERY: {query}")
+        column_map = {"tag_id": "id", "tag_name": "name"}
+        if not is_blank(tag_id):
+            # The id wins when both are given.
+            tag_name = ""
+        query, params = self._build_param_query(
+            query, column_map, tag_id=tag_id, tag_name=tag_name
+        )
+        logger.debug("Query: %s", query)
         data = self._read_data(query, params)
         return data
@@ -1,34 +1,45 @@
+import logging
 import requests
 import datetime as dt
 
 import polars as pl
 
+from ..helper import fetch_url
+from ..metrics import ROWS_FETCHED
+
+logger = logging.getLogger(__name__)
+
+TAGS_URL = "https://gamma-api.polymarket.com/tags"
+
 
 def fetch_tag_id(tag_name: str = ""):
     """
     Fetches all tags and finds the ID for the given name (case-insensitive).
     """
-    url = "https://gamma-api.polymarket.com/tags"
     try:
-        response = requests.get(url)
+        response = fetch_url(TAGS_URL, "gamma/tags")
         response.raise_for_status()
-        tags = response.json()
-        tag_data = []
-        # Look for a match
-        tag_name_lower = tag_name.lower()
-        for tag in tags:
-            # The API returns 'label' (display name) and 'id'
-            if tag.get("label", "").lower() == tag_name_lower and tag_name != "":
-                return tag.get("id")
-            elif tag.get("slug", "").lower() == tag_name_lower:
-                return tag.get("id")
-            else:
-                tag_data.append({"name": tag.get("label").lower(), "id": tag.get("id")})
-        # No 'tag_name' is passed,
-        if tag_name == "":
-            return pl.DataFrame(tag_data)
-        else:
-            return None
+        return _parse_tags(response.json(), tag_name)
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching tags: {e}")
+        logger.error("Error fetching tags: %s", e)
+        return None
+
+
+def _parse_tags(tags: list, tag_name: str = ""):
+    tag_data = []
+    # Look for a match
+    tag_name_lower = tag_name.lower()
+    for tag in tags:
+        # The API returns 'label' (display name) and 'id'
+        if tag.get("label", "").lower() == tag_name_lower and tag_name != "":
+            return tag.get("id")
+        elif tag.get("slug", "").lower() == tag_name_lower:
+            return tag.get("id")
+        else:
+            tag_data.append({"name": tag.get("label").lower(), "id": tag.get("id")})
+    # No 'tag_name' is passed,
+    if tag_name == "":
+        ROWS_FETCHED.inc(len(tag_data), table="tags")
+        return pl.DataFrame(tag_data)
+    else:
         return None
@@ -1,8 +1,15 @@
 import re
 import calendar
-from datetime import datetime
+from datetime import datetime, timezone
 from dateutil import parser
 
+import polars as pl
+
+# Dates arrive as ISO strings with 'Z', or '%Y-%m-%d %H:%M:%S' / '%Y-%m-%d' written by
+# '_smart_extract' and older versions of the database. 'T', 'Z', '+00:00' and '+00' are
+# normalised away before these are tried in turn.
+_EPOCH_FORMATS = ("%Y-%m-%d %H:%M:%S%.f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
 
 def date_extract(text, default_year=None):
     """
@@ -73,3 +80,53 @@ def date_extract(text, default_year=None):
                 continue
 
     return None
+
+
+def epoch_expr(column: str) -> pl.Expr:
+    """Parse a string date column to epoch seconds (UTC), NULL for 'unk' and garbage."""
+    text = (
+        pl.col(column)
+        .str.replace("T", " ", literal=True)
+        .str.strip_suffix("Z")
+        .str.strip_suffix("+00:00")
+        .str.strip_suffix("+00")
+    )
+    return (
+        pl.coalesce(
+            text.str.strptime(pl.Datetime("us"), fmt, strict=False) for fmt in _EPOCH_FORMATS
+        )
+        .dt.epoch("s")
+        .alias(column)
+    )
+
+
+def to_epoch_columns(df: pl.DataFrame, columns: list) -> pl.DataFrame:
+    """Convert the date 'columns' of 'df' to Int64 epoch seconds, whatever they hold now."""
+    exprs = []
+    for column in columns:
+        if column not in df.columns:
+            continue
+        if df.schema[column] == pl.String:
+            exprs.append(epoch_expr(column))
+        else:
+            exprs.append(pl.col(column).cast(pl.Int64, strict=False))
+    return df.with_columns(exprs) if exprs else df
+
+
+def to_epoch(value) -> int:
+    """Single value counterpart of 'epoch_expr', e.g. for query parameters."""
+    if value is None or value in ("", "unk"):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def format_epoch(value: int, format: str = "%Y-%m-%d %H:%M:%S") -> str:
+    if value is None:
+        return "unk"
+    return datetime.fromtimestamp(value, timezone.utc).strftime(format)
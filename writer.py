@@ -0,0 +1,216 @@
+import atexit
+import queue
+import logging
+import threading
+import time
+from pathlib import Path
+
+import polars as pl
+
+from .backends import Backend
+from .metrics import ROWS_IGNORED, ROWS_INSERTED, SQL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    "enabled": False,
+    "max_pending": 64,
+    "batch_rows": 50_000,
+    "linger": 0.05,
+}
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class WriteBehind:
+    """
+    A bounded queue of inserts and the one thread that writes them.
+
+    Producers hand over frames with 'put' and carry on; 'put' only blocks while
+    'max_pending' frames are waiting. The writer thread owns its own connection,
+    takes everything queued (up to 'batch_rows' rows, waiting at most 'linger'
+    seconds for more) and writes the frames of each insert statement together in
+    one transaction. Write errors are logged and raised again from the next
+    'put' or 'flush' in the producer.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        backend: Backend,
+        max_pending: int = 64,
+        batch_rows: int = 50_000,
+        linger: float = 0.05,
+    ):
+        self.db_path = Path(db_path)
+        self.backend = backend
+        self.batch_rows = batch_rows
+        self.linger = linger
+        self.queue = queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"pms-writer-{self.db_path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, df: pl.DataFrame, insert_query: str, table: str, log: bool = True) -> None:
+        self._raise_error()
+        self.queue.put(("insert", (df, insert_query, table, log)))
+
+    def flush(self, timeout: float = None) -> None:
+        """Wait until every frame queued so far is written."""
+        if self.queue.unfinished_tasks:
+            done = threading.Event()
+            self.queue.put(("flush", done))
+            if not done.wait(timeout):
+                raise TimeoutError(f"Pending writes to {self.db_path} not flushed in time")
+        self._raise_error()
+
+    def close(self, timeout: float = None) -> None:
+        """Flush, then stop the writer thread."""
+        try:
+            self.flush(timeout)
+        finally:
+            self.queue.put(("stop", None))
+            self._thread.join(timeout)
+
+    def _raise_error(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self) -> None:
+        conn = self.backend.connect(self.db_path)
+        try:
+            while True:
+                batch = [self.queue.get()]
+                rows = _rows(batch[-1])
+                deadline = time.monotonic() + self.linger
+                # Coalesce whatever else arrives, up to the next flush or stop.
+                while batch[-1][0] == "insert" and rows < self.batch_rows:
+                    try:
+                        batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                    except queue.Empty:
+                        break
+                    rows += _rows(batch[-1])
+                self._write(conn, [item for kind, item in batch if kind == "insert"])
+                for kind, item in batch:
+                    if kind == "flush":
+                        item.set()
+                    self.queue.task_done()
+                if batch[-1][0] == "stop":
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, inserts: list) -> None:
+        groups = {}
+        for df, insert_query, table, log in inserts:
+            groups.setdefault((insert_query, table, log), []).append(df)
+        for (insert_query, table, log), frames in groups.items():
+            try:
+                df = pl.concat(frames, how="vertical_relaxed")
+            except pl.exceptions.PolarsError:
+                # Frames with clashing dtypes are written one at a time.
+                for frame in frames:
+                    self._insert(conn, frame, insert_query, table, log)
+                continue
+            self._insert(conn, df, insert_query, table, log)
+
+    def _insert(self, conn, df: pl.DataFrame, insert_query: str, table: str, log: bool) -> None:
+        if log:
+            logger.info("Inserting/updating %d records into %s", len(df), table)
+        start = time.perf_counter()
+        try:
+            inserted = self.backend.insert(conn, df, insert_query)
+        except Exception as exc:
+            logger.exception("Write-behind insert into %s failed", table)
+            if self._error is None:
+                self._error = exc
+            return
+        SQL_SECONDS.observe(time.perf_counter() - start, op="write", table=table)
+        ROWS_INSERTED.inc(inserted, table=table)
+        ROWS_IGNORED.inc(len(df) - inserted, table=table)
+
+
+def _rows(entry: tuple) -> int:
+    kind, item = entry
+    return len(item[0]) if kind == "insert" else 0
+
+
+def enable_write_behind(
+    max_pending: int = None, batch_rows: int = None, linger: float = None
+) -> None:
+    """
+    Queue inserts and write them from one background thread per database file.
+
+    Fetchers no longer wait for (or contend on) the database lock. Reads and
+    transactions on a database first wait for the inserts queued for it, so code
+    that writes then reads sees its own rows. Queued rows are written on exit,
+    but are lost if the process is killed.
+
+    Parameters
+    ----------
+    max_pending : int, optional
+        Frames that can wait per database before 'put' blocks, by default 64.
+    batch_rows : int, optional
+        Rows coalesced into one write, by default 50,000.
+    linger : float, optional
+        Seconds the writer waits for more frames to coalesce, by default 0.05.
+    """
+    updates = {"max_pending": max_pending, "batch_rows": batch_rows, "linger": linger}
+    _settings.update({k: v for k, v in updates.items() if v is not None})
+    _settings["enabled"] = True
+
+
+def disable_write_behind(timeout: float = None) -> None:
+    """Write everything queued, stop the writer threads and insert synchronously again."""
+    _settings["enabled"] = False
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close(timeout)
+
+
+def flush_writes(db_path: str = None, timeout: float = None) -> None:
+    """
+    Wait until queued inserts are written.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Only this database, by default every database.
+    timeout : float, optional
+        Seconds to wait per database, by default no limit.
+    """
+    with _writers_lock:
+        if db_path is None:
+            writers = list(_writers.values())
+        else:
+            writers = [w for w in [_writers.get(_key(db_path))] if w is not None]
+    for writer in writers:
+        writer.flush(timeout)
+
+
+def get_writer(db_path: str, backend: Backend, create: bool = True) -> WriteBehind:
+    """The writer of 'db_path', None when write-behind is off."""
+    key = _key(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None and create and _settings["enabled"]:
+            writer = _writers[key] = WriteBehind(
+                db_path,
+                backend,
+                _settings["max_pending"],
+                _settings["batch_rows"],
+                _settings["linger"],
+            )
+    return writer
+
+
+def _key(db_path: str) -> str:
+    return str(Path(db_path).resolve())
+
+
+atexit.register(disable_write_behind)